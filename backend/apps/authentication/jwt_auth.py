@@ -1,28 +1,48 @@
 import jwt
-import os
 from django.contrib.auth.models import AnonymousUser
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from external.smoke_api import get_jwt_token
 from django.conf import settings
+from .tokens import get_token_verifier, get_token_claims
 import logging
 from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
+class TokenUser(AnonymousUser):
+    """User behind a verified token; there is no Django user row for it"""
+
+    def __init__(self, username):
+        super().__init__()
+        self.username = username
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    def __str__(self):
+        return self.username
+
+
 class JWTAuthentication(BaseAuthentication):
+    def authenticate_header(self, request):
+        # Makes DRF answer 401 instead of 403 when no valid token is sent
+        return 'Bearer realm="api"'
+
     def authenticate(self, request):
         token = request.COOKIES.get('token')
         if not token:
             return None
             
         try:
-            secret_key = os.getenv('SECRET_KEY')
-            decoded = jwt.decode(token, secret_key, algorithms=['HS256'])
+            claims = get_token_verifier().verify(token)
             
-            user = AnonymousUser()
-            user.username = decoded.get('username')
-            return (user, token)
+            return (TokenUser(claims.username), token)
             
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed('Session expired')
@@ -56,28 +76,12 @@ def create_jwt_token(username):
 
 def verify_jwt_token(token):
     """Verify JWT token and return True if valid"""
-    try:
-        import jwt
-        from django.conf import settings
-
-        # Decode and verify token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        return True
-    except jwt.ExpiredSignatureError:
-        return False
-    except jwt.InvalidTokenError:
-        return False
+    return get_token_claims(token) is not None
 
 
 def decode_jwt_token(token):
     """Decode JWT token and return payload"""
-    try:
-        import jwt
-        from django.conf import settings
-
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        return payload
-    except jwt.ExpiredSignatureError:
+    claims = get_token_claims(token)
+    if claims is None:
         return None
-    except jwt.InvalidTokenError:
-        return None
\ No newline at end of file
+    return {'username': claims.username, 'exp': claims.exp, 'iat': claims.iat}
\ No newline at end of file
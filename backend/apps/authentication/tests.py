@@ -1,3 +1,57 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.test import SimpleTestCase
+
+from .tokens import TokenVerifier, get_token_claims
+
+SECRET = 'test-secret'
+
+
+def make_token(exp_in=60, secret=SECRET, **claims):
+    payload = {'username': 'jan', 'iat': int(time.time()), **claims}
+    if exp_in is not None:
+        payload['exp'] = int(time.time()) + exp_in
+    return jwt.encode(payload, secret, algorithm='HS256')
+
+
+class TokenVerifierTests(SimpleTestCase):
+
+    def setUp(self):
+        self.verifier = TokenVerifier(SECRET)
+
+    def test_valid_token_is_decoded_once(self):
+        token = make_token()
+        self.assertEqual(self.verifier.verify(token).username, 'jan')
+        self.assertEqual(self.verifier.verify(token).username, 'jan')
+        self.assertEqual((self.verifier.misses, self.verifier.hits), (1, 1))
+
+    def test_expired_token_is_rejected(self):
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            self.verifier.verify(make_token(exp_in=-10))
+
+    def test_cached_claims_are_not_used_after_exp(self):
+        token = make_token(exp_in=60)
+        claims = self.verifier.verify(token)
+        # Past exp the cached claims are ignored and the token is decoded again
+        with mock.patch('apps.authentication.tokens.time.time', return_value=claims.exp + 1), \
+                mock.patch('apps.authentication.tokens.jwt.decode',
+                           side_effect=jwt.ExpiredSignatureError) as decode:
+            with self.assertRaises(jwt.ExpiredSignatureError):
+                self.verifier.verify(token)
+        decode.assert_called_once()
+        self.assertEqual(self.verifier.hits, 0)
+
+    def test_bad_signature_and_missing_exp_are_rejected(self):
+        with self.assertRaises(jwt.InvalidSignatureError):
+            self.verifier.verify(make_token(secret='other-secret'))
+        with self.assertRaises(jwt.MissingRequiredClaimError):
+            self.verifier.verify(make_token(exp_in=None))
+
+    def test_get_token_claims_returns_none_for_invalid_tokens(self):
+        with self.settings(SECRET_KEY=SECRET), \
+                mock.patch('apps.authentication.tokens._verifier', TokenVerifier(SECRET)):
+            self.assertEqual(get_token_claims(make_token()).username, 'jan')
+            self.assertIsNone(get_token_claims(make_token(exp_in=-10)))
+            self.assertIsNone(get_token_claims('not-a-token'))
@@ -0,0 +1,95 @@
+"""
+Single-decode JWT verification with a cache of verified claims.
+Both the DRF authentication class and the auth views go through here.
+"""
+import time
+import hashlib
+import threading
+import jwt
+from dataclasses import dataclass
+from cachetools import TLRUCache
+from django.conf import settings
+
+TOKEN_ALGORITHMS = ['HS256']
+TOKEN_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class TokenClaims:
+    """Verified claims of a session token"""
+    username: str | None
+    exp: float
+    iat: float | None = None
+
+
+def _claims_expiry(_key, claims, _now):
+    return claims.exp
+
+
+class TokenVerifier:
+    """
+    Decodes each token once and remembers the verified claims in a bounded
+    LRU keyed by the token's SHA-256 digest. Entries expire at the token's
+    own ``exp``, so a cached token is never accepted after it expires.
+    """
+
+    def __init__(self, secret_key, algorithms=TOKEN_ALGORITHMS, maxsize=TOKEN_CACHE_SIZE):
+        self._secret_key = secret_key
+        self._algorithms = list(algorithms)
+        self._cache = TLRUCache(maxsize=maxsize, ttu=_claims_expiry, timer=time.time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token):
+        """
+        Return verified claims for a token.
+
+        Raises:
+            jwt.ExpiredSignatureError: Token has expired
+            jwt.InvalidTokenError: Token is malformed or has a bad signature
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            claims = self._cache.get(key)
+        if claims is not None and claims.exp > time.time():
+            self.hits += 1
+            return claims
+
+        self.misses += 1
+        payload = jwt.decode(token, self._secret_key, algorithms=self._algorithms,
+                             options={'require': ['exp']})
+        claims = TokenClaims(
+            username=payload.get('username'),
+            exp=float(payload['exp']),
+            iat=float(payload['iat']) if payload.get('iat') is not None else None,
+        )
+        with self._lock:
+            self._cache[key] = claims
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_token_verifier():
+    """Return the process-wide verifier bound to settings.SECRET_KEY"""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier(settings.SECRET_KEY)
+    return _verifier
+
+
+def get_token_claims(token):
+    """Return verified claims, or None if the token is expired or invalid"""
+    try:
+        return get_token_verifier().verify(token)
+    except jwt.InvalidTokenError:
+        return None
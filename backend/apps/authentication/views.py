@@ -1,14 +1,16 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from .jwt_auth import verify_user_with_smoked_api, create_jwt_token
+from .tokens import get_token_claims
 from core.validators import validate_string_length, sanitize_input
 import logging
 
 logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def login(request):
     try:
@@ -44,6 +46,8 @@ def login(request):
         return Response({"error": "An error occurred during login"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def logout(request):
     logger.info("User logged out")
     response = Response({"success": True, "message": "Logged out successfully"})
@@ -52,6 +56,7 @@ def logout(request):
 
 
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def verify_token(request):
     """Verify if user is authenticated via JWT token in cookie"""
@@ -60,16 +65,11 @@ def verify_token(request):
         if not token:
             return Response({"authenticated": False}, status=status.HTTP_401_UNAUTHORIZED)
 
-        from .jwt_auth import verify_jwt_token, decode_jwt_token
-
-        if verify_jwt_token(token):
-            # Decode token to get username
-            payload = decode_jwt_token(token)
-            username = payload.get('username') if payload else None
-
+        claims = get_token_claims(token)
+        if claims is not None:
             return Response({
                 "authenticated": True,
-                "username": username
+                "username": claims.username
             }, status=status.HTTP_200_OK)
         else:
             return Response({"authenticated": False}, status=status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,143 @@
+"""
+Batch update of onboarding checklist flags in hist_det.
+Many (id, flag, value) triples are applied with one UPDATE ... FROM (VALUES ...)
+per flag, all in a single transaction.
+"""
+import logging
+from psycopg2.extras import execute_values
+from core.connection import db_cursor
+from core.validators import validate_id
+from core.queries import (
+    UPDATE_DETECTOR_FLAG_QUERIES, UPDATE_DETECTOR_FLAG_BATCH_QUERIES,
+    UPDATE_DETECTOR_FLAG_BATCH_TEMPLATE, GET_HIST_DET_COLUMN_TYPES
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 5000
+
+BOOLEAN_LITERALS = {
+    't': True, 'true': True, 'y': True, 'yes': True, 'on': True, '1': True,
+    'f': False, 'false': False, 'n': False, 'no': False, 'off': False, '0': False,
+}
+
+_column_types = None
+
+
+class FlagColumnError(Exception):
+    """A whitelisted flag column is missing from hist_det or is not boolean"""
+
+
+def get_column_types(cursor):
+    """hist_det column types, read from the catalog once per process"""
+    global _column_types
+    if _column_types is None:
+        cursor.execute(GET_HIST_DET_COLUMN_TYPES)
+        _column_types = dict(cursor.fetchall())
+    return _column_types
+
+
+def check_flag_columns(types, flags):
+    """Raise FlagColumnError unless every flag is a boolean hist_det column"""
+    if 'id' not in types:
+        raise FlagColumnError("Column id is missing from hist_det")
+    for flag in sorted(flags):
+        if flag not in types:
+            raise FlagColumnError(f"Column {flag} is missing from hist_det")
+        if types[flag] != 'boolean':
+            raise FlagColumnError(f"Column {flag} is {types[flag]}, not boolean")
+
+
+def coerce_boolean(value):
+    """A JSON checklist value as True/False/None; returns (value, error)"""
+    if value is None or isinstance(value, bool):
+        return value, None
+    if isinstance(value, (int, str)) and str(value).strip().lower() in BOOLEAN_LITERALS:
+        return BOOLEAN_LITERALS[str(value).strip().lower()], None
+    return None, "value must be a boolean"
+
+
+def validate_flag_update(update):
+    """Validate one {"id", "flag", "value"} entry; returns (id, error)"""
+    if not isinstance(update, dict):
+        return None, "Each update must be an object with id, flag and value"
+
+    valid, error = validate_id(update.get('id'), "id")
+    if not valid:
+        return None, error
+    if update.get('flag') not in UPDATE_DETECTOR_FLAG_QUERIES:
+        return None, f"Unknown flag: {update.get('flag')}"
+    if 'value' not in update:
+        return None, "value is required"
+    if isinstance(update['value'], (list, dict)):
+        return None, "value must be a scalar"
+    return int(update['id']), None
+
+
+def apply_flag_updates(updates):
+    """
+    Apply many flag updates in one transaction.
+
+    Args:
+        updates: List of {"id": int, "flag": str, "value": scalar}
+
+    Returns:
+        list: One {"index", "id", "flag", "status"[, "error"]} per input entry,
+              status being "updated", "not_found" or "invalid"
+
+    Raises:
+        FlagColumnError: A requested flag column is missing or not boolean
+    """
+    results = [None] * len(updates)
+    # flag -> {id: value}; a later entry for the same (id, flag) wins
+    by_flag = {}
+    positions = {}
+
+    for index, update in enumerate(updates):
+        row_id, error = validate_flag_update(update)
+        if error:
+            entry = update if isinstance(update, dict) else {}
+            results[index] = {"index": index, "id": entry.get('id'), "flag": entry.get('flag'),
+                              "status": "invalid", "error": error}
+            continue
+        flag = update['flag']
+        by_flag.setdefault(flag, {})[row_id] = update['value']
+        positions.setdefault((flag, row_id), []).append(index)
+
+    def report(flag, row_id, status, error=None):
+        for index in positions[(flag, row_id)]:
+            results[index] = {"index": index, "id": row_id, "flag": flag, "status": status}
+            if error:
+                results[index]["error"] = error
+
+    if by_flag:
+        with db_cursor() as (cursor, conn):
+            types = get_column_types(cursor)
+            check_flag_columns(types, by_flag)
+            template = UPDATE_DETECTOR_FLAG_BATCH_TEMPLATE.format(id_type=types['id'], value_type='boolean')
+            for flag, raw_values in by_flag.items():
+                values = {}
+                for row_id, raw in raw_values.items():
+                    value, error = coerce_boolean(raw)
+                    if error:
+                        report(flag, row_id, "invalid", error)
+                    else:
+                        values[row_id] = value
+                if not values:
+                    continue
+
+                updated = execute_values(
+                    cursor,
+                    UPDATE_DETECTOR_FLAG_BATCH_QUERIES[flag],
+                    list(values.items()),
+                    template=template,
+                    page_size=len(values),
+                    fetch=True
+                )
+                updated_ids = {row[0] for row in updated}
+                for row_id in values:
+                    report(flag, row_id, "updated" if row_id in updated_ids else "not_found")
+
+    updated_count = sum(1 for r in results if r["status"] == "updated")
+    logger.info(f"Checklist batch: {updated_count}/{len(updates)} flag updates applied in {len(by_flag)} statements")
+    return results
@@ -0,0 +1,95 @@
+"""
+Detector history access: keyset pagination on (data, godzina, id), with
+NULL dates and times sorted as the oldest. Exports stream through
+core.streaming.
+"""
+import json
+import base64
+import logging
+from datetime import date, time
+from core.connection import db_cursor_readonly
+from core.queries import GET_DETECTOR_HISTORY_KEYSET, DETECTOR_HISTORY_FILTERS, HISTORY_PAGE_LIMIT
+from core.instrumentation import register_query_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Sort keys of NULL data/godzina, as COALESCEd in GET_DETECTOR_HISTORY_KEYSET
+NULL_DATA_KEY = '-infinity'
+NULL_GODZINA_KEY = '00:00:00'
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just after the given history row"""
+    data, godzina = row['data'], row['godzina']
+    key = [
+        data.isoformat() if data is not None else NULL_DATA_KEY,
+        godzina.isoformat() if godzina is not None else NULL_GODZINA_KEY,
+        row['id'],
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (data, godzina, id); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data, godzina, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if data != NULL_DATA_KEY:
+            date.fromisoformat(data)
+        time.fromisoformat(godzina)
+        return data, godzina, int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def build_history_query(serial, after=None, date_from=None, date_to=None, typ=None, limit=None):
+    """
+    Compose the history statement from whitelisted filter fragments.
+
+    Returns:
+        tuple: (sql, params)
+    """
+    filters, params = [], [serial]
+    if after is not None:
+        filters.append(DETECTOR_HISTORY_FILTERS['after'])
+        params.extend(after)
+    if date_from is not None:
+        filters.append(DETECTOR_HISTORY_FILTERS['date_from'])
+        params.append(date_from)
+    if date_to is not None:
+        filters.append(DETECTOR_HISTORY_FILTERS['date_to'])
+        params.append(date_to)
+    if typ is not None:
+        filters.append(DETECTOR_HISTORY_FILTERS['typ'])
+        params.append(typ)
+    if limit is not None:
+        params.append(limit)
+
+    sql = GET_DETECTOR_HISTORY_KEYSET.format(
+        filters='\n'.join(filters),
+        limit=HISTORY_PAGE_LIMIT if limit is not None else ''
+    )
+    register_query_name(sql, 'GET_DETECTOR_HISTORY_KEYSET')
+    return sql, params
+
+
+def fetch_history_page(serial, page_size=DEFAULT_PAGE_SIZE, after=None, **filters):
+    """
+    Fetch one page of history, newest first.
+
+    Returns:
+        tuple: (list of row dicts, next cursor or None)
+    """
+    sql, params = build_history_query(serial, after=after, limit=page_size + 1, **filters)
+    with db_cursor_readonly() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
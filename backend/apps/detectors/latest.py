@@ -0,0 +1,36 @@
+"""
+Maintenance of the hist_det_latest projection (newest history row per serial).
+"""
+import logging
+from core.connection import db_cursor, db_cursor_readonly
+from core.queries import REBUILD_HIST_DET_LATEST, CHECK_HIST_DET_LATEST, COUNT_HIST_DET_LATEST
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_latest():
+    """
+    Recompute the whole projection from hist_det in one transaction.
+    Writers to hist_det are blocked while it runs.
+
+    Returns:
+        int: Number of serials in the projection
+    """
+    with db_cursor() as (cursor, conn):
+        cursor.execute(REBUILD_HIST_DET_LATEST)
+        cursor.execute(COUNT_HIST_DET_LATEST)
+        count = cursor.fetchone()[0]
+    logger.info(f"hist_det_latest rebuilt: {count} serials")
+    return count
+
+
+def check_latest():
+    """
+    Compare the projection with DISTINCT ON over hist_det.
+
+    Returns:
+        list: (serial, expected_id, actual_id) for every serial that differs
+    """
+    with db_cursor_readonly() as cursor:
+        cursor.execute(CHECK_HIST_DET_LATEST)
+        return cursor.fetchall()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.detectors.latest import check_latest, rebuild_latest
+
+
+class Command(BaseCommand):
+    help = "Verify that hist_det_latest matches the newest hist_det row of every serial"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true',
+                            help="Rebuild the projection when differences are found")
+        parser.add_argument('--show', type=int, default=20,
+                            help="Number of differing serials to print")
+
+    def handle(self, *args, **options):
+        mismatches = check_latest()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("hist_det_latest is consistent"))
+            return
+
+        for serial, expected_id, actual_id in mismatches[:options['show']]:
+            self.stdout.write(f"serial {serial}: expected id {expected_id}, projection has {actual_id}")
+
+        if options['repair']:
+            count = rebuild_latest()
+            self.stdout.write(self.style.WARNING(
+                f"{len(mismatches)} serials differed; projection rebuilt with {count} serials"
+            ))
+            return
+
+        raise CommandError(f"hist_det_latest differs from hist_det for {len(mismatches)} serials")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.detectors.latest import rebuild_latest
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hist_det_latest projection from hist_det"
+
+    def handle(self, *args, **options):
+        count = rebuild_latest()
+        self.stdout.write(self.style.SUCCESS(f"hist_det_latest rebuilt with {count} serials"))
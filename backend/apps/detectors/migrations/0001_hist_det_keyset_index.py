@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Matches the keyset order of the history API:
+# WHERE serial = ? ORDER BY data DESC, godzina DESC, id DESC
+CREATE_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS hist_det_serial_data_godzina_id_idx
+    ON hist_det (serial, data DESC, godzina DESC, id DESC);
+"""
+
+DROP_INDEX = """
+DROP INDEX CONCURRENTLY IF EXISTS hist_det_serial_data_godzina_id_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# One row per serial holding its newest hist_det row. Kept current by a row
+# trigger on hist_det, so every write (INSERT_DETECTOR_HISTORY, the
+# UPDATE_DETECTOR_FLAG_QUERIES statements, deletes) updates it in the same
+# transaction. Each refresh is a single probe of the keyset index from 0001.
+CREATE_PROJECTION = """
+CREATE TABLE hist_det_latest (LIKE hist_det INCLUDING DEFAULTS);
+ALTER TABLE hist_det_latest ADD PRIMARY KEY (serial);
+CREATE INDEX hist_det_latest_typ_idx ON hist_det_latest (typ);
+
+CREATE OR REPLACE FUNCTION refresh_hist_det_latest(p_serial hist_det.serial%TYPE) RETURNS void AS $$
+BEGIN
+    -- Serializes concurrent refreshes of the same serial
+    PERFORM pg_advisory_xact_lock(hashtext('hist_det_latest'), hashtext(p_serial::text));
+    DELETE FROM hist_det_latest WHERE serial = p_serial;
+    INSERT INTO hist_det_latest
+    SELECT * FROM hist_det
+    WHERE serial = p_serial
+    ORDER BY data DESC, godzina DESC, id DESC
+    LIMIT 1;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION hist_det_latest_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        TRUNCATE hist_det_latest;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_hist_det_latest(NEW.serial);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_hist_det_latest(OLD.serial);
+    ELSE
+        PERFORM refresh_hist_det_latest(NEW.serial);
+        IF NEW.serial IS DISTINCT FROM OLD.serial THEN
+            PERFORM refresh_hist_det_latest(OLD.serial);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER hist_det_latest_row AFTER INSERT OR UPDATE OR DELETE ON hist_det
+    FOR EACH ROW EXECUTE FUNCTION hist_det_latest_sync();
+CREATE TRIGGER hist_det_latest_truncate AFTER TRUNCATE ON hist_det
+    FOR EACH STATEMENT EXECUTE FUNCTION hist_det_latest_sync();
+
+INSERT INTO hist_det_latest
+SELECT DISTINCT ON (serial) *
+FROM hist_det
+ORDER BY serial, data DESC, godzina DESC, id DESC;
+"""
+
+DROP_PROJECTION = """
+DROP TRIGGER IF EXISTS hist_det_latest_row ON hist_det;
+DROP TRIGGER IF EXISTS hist_det_latest_truncate ON hist_det;
+DROP FUNCTION IF EXISTS hist_det_latest_sync();
+DROP FUNCTION IF EXISTS refresh_hist_det_latest;
+DROP TABLE IF EXISTS hist_det_latest;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detectors', '0001_hist_det_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_PROJECTION, DROP_PROJECTION),
+    ]
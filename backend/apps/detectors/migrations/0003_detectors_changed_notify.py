@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# Statement-level triggers on Detektory publish JSON arrays of the serials
+# whose assignment (Wieza_ID) or name changed, or that were inserted or
+# deleted, on the detectors_changed channel; 200 serials per notification to
+# stay below the 8000-byte payload limit. Sync updates that only touch
+# live_view_updated_at send nothing.
+CREATE_DETECTORS_NOTIFY = """
+CREATE OR REPLACE FUNCTION notify_detectors_changed() RETURNS trigger AS $$
+DECLARE
+    payload text;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        FOR payload IN
+            SELECT json_agg(c.serial)::text
+            FROM (SELECT n.serial, (row_number() OVER () - 1) / 200 AS chunk FROM new_rows n) c
+            GROUP BY c.chunk
+        LOOP
+            PERFORM pg_notify('detectors_changed', payload);
+        END LOOP;
+    ELSIF TG_OP = 'DELETE' THEN
+        FOR payload IN
+            SELECT json_agg(c.serial)::text
+            FROM (SELECT o.serial, (row_number() OVER () - 1) / 200 AS chunk FROM old_rows o) c
+            GROUP BY c.chunk
+        LOOP
+            PERFORM pg_notify('detectors_changed', payload);
+        END LOOP;
+    ELSE
+        FOR payload IN
+            SELECT json_agg(c.serial)::text
+            FROM (
+                SELECT n.serial, (row_number() OVER () - 1) / 200 AS chunk
+                FROM new_rows n
+                JOIN old_rows o ON o.serial = n.serial
+                WHERE (n."Wieza_ID", n."name") IS DISTINCT FROM (o."Wieza_ID", o."name")
+            ) c
+            GROUP BY c.chunk
+        LOOP
+            PERFORM pg_notify('detectors_changed', payload);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER detektory_changed_ins AFTER INSERT ON "Detektory"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_detectors_changed();
+CREATE TRIGGER detektory_changed_upd AFTER UPDATE ON "Detektory"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_detectors_changed();
+CREATE TRIGGER detektory_changed_del AFTER DELETE ON "Detektory"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_detectors_changed();
+"""
+
+DROP_DETECTORS_NOTIFY = """
+DROP TRIGGER IF EXISTS detektory_changed_ins ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_changed_upd ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_changed_del ON "Detektory";
+DROP FUNCTION IF EXISTS notify_detectors_changed();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detectors', '0002_hist_det_latest'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_DETECTORS_NOTIFY, DROP_DETECTORS_NOTIFY),
+    ]
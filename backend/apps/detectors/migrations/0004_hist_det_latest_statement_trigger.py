@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# Replaces the FOR EACH ROW trigger of 0002: a statement that touches many
+# history rows (the bulk cascade delete, batched checklist flag updates)
+# refreshed hist_det_latest once per row. Statement-level triggers now read
+# the transition tables and refresh each distinct serial once, with one
+# DELETE and one INSERT ... LATERAL probe of the keyset index for the whole
+# set. Advisory locks are taken in a fixed order so concurrent statements
+# over overlapping serials cannot deadlock.
+CREATE_STATEMENT_TRIGGERS = """
+CREATE OR REPLACE FUNCTION refresh_hist_det_latest_many(p_serials anyarray) RETURNS void AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('hist_det_latest'), hashtext(s.serial::text))
+    FROM (SELECT DISTINCT serial FROM unnest(p_serials) AS u(serial) ORDER BY serial) s;
+
+    DELETE FROM hist_det_latest WHERE serial = ANY(p_serials);
+    INSERT INTO hist_det_latest
+    SELECT newest.*
+    FROM (SELECT DISTINCT serial FROM unnest(p_serials) AS u(serial)) s
+    CROSS JOIN LATERAL (
+        SELECT * FROM hist_det h
+        WHERE h.serial = s.serial
+        ORDER BY h.data DESC, h.godzina DESC, h.id DESC
+        LIMIT 1
+    ) newest;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION hist_det_latest_sync_statement() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_hist_det_latest_many(ARRAY(SELECT DISTINCT serial FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_hist_det_latest_many(ARRAY(SELECT DISTINCT serial FROM old_rows));
+    ELSE
+        PERFORM refresh_hist_det_latest_many(ARRAY(
+            SELECT serial FROM new_rows UNION SELECT serial FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS hist_det_latest_row ON hist_det;
+CREATE TRIGGER hist_det_latest_ins AFTER INSERT ON hist_det
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hist_det_latest_sync_statement();
+CREATE TRIGGER hist_det_latest_upd AFTER UPDATE ON hist_det
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hist_det_latest_sync_statement();
+CREATE TRIGGER hist_det_latest_del AFTER DELETE ON hist_det
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hist_det_latest_sync_statement();
+"""
+
+DROP_STATEMENT_TRIGGERS = """
+DROP TRIGGER IF EXISTS hist_det_latest_ins ON hist_det;
+DROP TRIGGER IF EXISTS hist_det_latest_upd ON hist_det;
+DROP TRIGGER IF EXISTS hist_det_latest_del ON hist_det;
+DROP FUNCTION IF EXISTS hist_det_latest_sync_statement();
+DROP FUNCTION IF EXISTS refresh_hist_det_latest_many(anyarray);
+CREATE TRIGGER hist_det_latest_row AFTER INSERT OR UPDATE OR DELETE ON hist_det
+    FOR EACH ROW EXECUTE FUNCTION hist_det_latest_sync();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detectors', '0003_detectors_changed_notify'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_STATEMENT_TRIGGERS, DROP_STATEMENT_TRIGGERS),
+    ]
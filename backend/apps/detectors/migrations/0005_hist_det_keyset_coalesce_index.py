@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# Matches the keyset order of the history API, which sorts NULL data and
+# godzina as the oldest values so the cursor predicate never skips them:
+# WHERE serial = ?
+# ORDER BY COALESCE(data, '-infinity') DESC, COALESCE(godzina, '00:00') DESC, id DESC
+# The plain index of 0001 stays for the hist_det_latest refresh.
+CREATE_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS hist_det_keyset_coalesce_idx
+    ON hist_det (serial, COALESCE(data, '-infinity'::date) DESC, COALESCE(godzina, '00:00'::time) DESC, id DESC);
+"""
+
+DROP_INDEX = """
+DROP INDEX CONCURRENTLY IF EXISTS hist_det_keyset_coalesce_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('detectors', '0004_hist_det_latest_statement_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
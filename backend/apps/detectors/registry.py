@@ -0,0 +1,258 @@
+"""
+In-process registry of detectors for serial lookups.
+
+Every worker keeps serial -> (tower ID, name) for the whole fleet, plus one
+entry per tower with its name and institution, in ``__slots__`` records
+(a few hundred bytes per detector). The registry is loaded with two bulk
+queries on first use and then kept current from LISTEN notifications:
+triggers on Detektory send the serials whose assignment or name changed on
+``detectors_changed``, and the PAD/Wieze triggers announce tower and
+institution changes on ``reference_data_changed``. Notifications only mark
+entries stale; the next lookup re-reads just those rows. While the LISTEN
+connection is down, lookups go to the database, and after it comes back
+the registry is reloaded in full.
+"""
+import sys
+import json
+import logging
+import threading
+from core.connection import db_cursor_readonly
+from core.notifications import subscribe
+from core.reference_cache import REFERENCE_CHANNEL
+from core.queries import (
+    LOAD_DETECTOR_REGISTRY, LOAD_DETECTOR_REGISTRY_SERIALS, LOAD_TOWER_REGISTRY,
+    GET_DETECTOR_DETAILS_BY_SERIAL
+)
+
+logger = logging.getLogger(__name__)
+
+DETECTORS_CHANNEL = 'detectors_changed'
+TOWER_TABLES = ('Wieze', 'PAD')
+
+
+class DetectorEntry:
+    __slots__ = ('tower_id', 'name')
+
+    def __init__(self, tower_id, name):
+        self.tower_id = tower_id
+        self.name = name
+
+
+class TowerEntry:
+    __slots__ = ('name', 'institution_id', 'institution_name')
+
+    def __init__(self, name, institution_id, institution_name):
+        self.name = name
+        self.institution_id = institution_id
+        self.institution_name = institution_name
+
+
+def normalize_serial(serial):
+    """Database format of a serial (no leading zeros), or None when it is not numeric"""
+    text = str(serial).strip() if serial is not None else ''
+    if not text.isdigit():
+        return None
+    return text.lstrip('0') or '0'
+
+
+class DetectorRegistry:
+    """Serial-keyed detector/tower/institution lookups answered from memory"""
+
+    def __init__(self):
+        self._detectors = {}
+        self._towers = {}
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._pending = set()
+        self._towers_stale = False
+        self._reload = True
+        self._listener = None
+        self.hits = 0
+        self.fallbacks = 0
+        self.reloads = 0
+        self.rows_refreshed = 0
+
+    def __len__(self):
+        return len(self._detectors)
+
+    # Lookups
+
+    def details(self, serial):
+        """
+        Detector with its tower and institution, in the shape of
+        GET_DETECTOR_DETAILS_BY_SERIAL, or None for an unknown serial.
+        """
+        key = normalize_serial(serial)
+        if key is None:
+            return None
+        if not self._ensure_current():
+            return self._details_from_db(key)
+
+        self.hits += 1
+        with self._lock:
+            detector = self._detectors.get(key)
+            if detector is None:
+                return None
+            tower = self._towers.get(detector.tower_id)
+        return {
+            "serial": key,
+            "Wieza_ID": detector.tower_id,
+            "Nazwa": detector.name,
+            "Wieza_Nazwa": tower.name if tower else None,
+            "Instytucja_ID": tower.institution_id if tower else None,
+            "Instytucja_Nazwa": tower.institution_name if tower else None,
+        }
+
+    def tower_id(self, serial):
+        """Wieza_ID of a detector (None when unassigned or unknown)"""
+        found = self.details(serial)
+        return found["Wieza_ID"] if found else None
+
+    def exists(self, serial):
+        return self.details(serial) is not None
+
+    def is_assigned(self, serial):
+        return self.tower_id(serial) is not None
+
+    def stats(self):
+        return {
+            "detectors": len(self._detectors),
+            "towers": len(self._towers),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "reloads": self.reloads,
+            "rows_refreshed": self.rows_refreshed,
+            "listening": bool(self._listener and self._listener.connected),
+        }
+
+    # Change feed
+
+    def invalidate(self, serials):
+        """Mark serials stale, e.g. right after a local write, before the NOTIFY arrives"""
+        keys = {key for key in map(normalize_serial, serials) if key is not None}
+        with self._pending_lock:
+            self._pending.update(keys)
+
+    def on_detectors_changed(self, payload):
+        """Called on the listener thread with a JSON array of serials"""
+        try:
+            serials = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed detectors_changed payload: {payload[:200]}")
+            return
+        self.invalidate(serials)
+
+    def on_reference_changed(self, table):
+        if table in TOWER_TABLES:
+            with self._pending_lock:
+                self._towers_stale = True
+
+    def on_reconnect(self):
+        """Notifications sent while the connection was down are lost"""
+        with self._pending_lock:
+            self._reload = True
+
+    # Loading
+
+    def _ensure_current(self):
+        listener = self._ensure_listener()
+        if not listener.connected:
+            return False
+        if not (self._reload or self._pending or self._towers_stale):
+            return True
+
+        # Concurrent lookups wait here instead of reading a half-refreshed registry
+        with self._refresh_lock:
+            with self._pending_lock:
+                reload, pending, towers_stale = self._reload, self._pending, self._towers_stale
+                self._reload, self._pending, self._towers_stale = False, set(), False
+            if not (reload or pending or towers_stale):
+                return True
+
+            try:
+                if reload:
+                    self._load_all()
+                else:
+                    if pending:
+                        self._refresh_serials(pending)
+                    if towers_stale:
+                        self._load_towers()
+            except Exception:
+                # Try again on the next lookup
+                with self._pending_lock:
+                    self._reload = self._reload or reload
+                    self._pending |= pending
+                    self._towers_stale = self._towers_stale or towers_stale
+                raise
+        return True
+
+    def _load_all(self):
+        with db_cursor_readonly() as cursor:
+            cursor.execute(LOAD_DETECTOR_REGISTRY)
+            detectors = {
+                str(serial): DetectorEntry(tower_id, name)
+                for serial, tower_id, name in cursor.fetchall()
+            }
+            towers = self._fetch_towers(cursor)
+        with self._lock:
+            self._detectors = detectors
+            self._towers = towers
+        self.reloads += 1
+        logger.info(f"Detector registry loaded: {len(detectors)} detectors, {len(towers)} towers")
+
+    def _load_towers(self):
+        with db_cursor_readonly() as cursor:
+            towers = self._fetch_towers(cursor)
+        with self._lock:
+            self._towers = towers
+
+    @staticmethod
+    def _fetch_towers(cursor):
+        cursor.execute(LOAD_TOWER_REGISTRY)
+        # Institution names repeat across towers; intern them once
+        return {
+            tower_id: TowerEntry(name, institution_id,
+                                 sys.intern(institution_name) if institution_name else None)
+            for tower_id, name, institution_id, institution_name in cursor.fetchall()
+        }
+
+    def _refresh_serials(self, serials):
+        with db_cursor_readonly() as cursor:
+            cursor.execute(LOAD_DETECTOR_REGISTRY_SERIALS, (sorted(serials),))
+            rows = cursor.fetchall()
+        with self._lock:
+            for serial in serials:
+                self._detectors.pop(serial, None)
+            for serial, tower_id, name in rows:
+                self._detectors[str(serial)] = DetectorEntry(tower_id, name)
+        self.rows_refreshed += len(serials)
+
+    def _details_from_db(self, serial):
+        self.fallbacks += 1
+        with db_cursor_readonly() as cursor:
+            cursor.execute(GET_DETECTOR_DETAILS_BY_SERIAL, (serial,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        serial, tower_id, name, tower_name, institution_name, _, institution_id = row
+        return {
+            "serial": str(serial),
+            "Wieza_ID": tower_id,
+            "Nazwa": name,
+            "Wieza_Nazwa": tower_name,
+            "Instytucja_ID": institution_id,
+            "Instytucja_Nazwa": institution_name,
+        }
+
+    def _ensure_listener(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    subscribe(REFERENCE_CHANNEL, self.on_reference_changed)
+                    self._listener = subscribe(DETECTORS_CHANNEL, self.on_detectors_changed,
+                                               on_reconnect=self.on_reconnect)
+        return self._listener
+
+
+detector_registry = DetectorRegistry()
@@ -0,0 +1,30 @@
+import base64
+from datetime import date, time
+
+from django.test import SimpleTestCase
+
+from .history import encode_cursor, decode_cursor, NULL_DATA_KEY, NULL_GODZINA_KEY
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+class HistoryCursorTests(SimpleTestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor({'data': date(2024, 5, 17), 'godzina': time(13, 45, 2), 'id': 981})
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), ('2024-05-17', '13:45:02', 981))
+
+    def test_null_date_and_time_use_the_coalesced_sort_keys(self):
+        cursor = encode_cursor({'data': None, 'godzina': None, 'id': 3})
+        self.assertEqual(decode_cursor(cursor), (NULL_DATA_KEY, NULL_GODZINA_KEY, 3))
+
+    def test_malformed_cursors_are_rejected(self):
+        for cursor in ('', 'not base64!', raw_cursor('{}'), raw_cursor('[1, 2]'),
+                       raw_cursor('["2024-13-01", "10:00:00", 1]'),
+                       raw_cursor('["2024-05-17", "25:00", 1]'),
+                       raw_cursor('["2024-05-17", "10:00:00", "x"]')):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
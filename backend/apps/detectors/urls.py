@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('history/flags/', views.update_history_flags, name='update_history_flags'),
+    path('<str:serial>/', views.detector_details, name='detector_details'),
+    path('<str:serial>/history/', views.detector_history, name='detector_history'),
+    path('<str:serial>/history/export/', views.detector_history_export, name='detector_history_export'),
+]
@@ -0,0 +1,139 @@
+from datetime import date
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.validators import validate_serial_number, validate_string_length, sanitize_input
+from core.streaming import StreamLimitReached, streaming_csv_response
+from .flags import apply_flag_updates, FlagColumnError, MAX_BATCH_SIZE
+from .registry import detector_registry
+from .history import (
+    fetch_history_page, build_history_query, decode_cursor,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_history_filters(params):
+    """Validate date_from/date_to/typ query parameters"""
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        value = params.get(name)
+        if value:
+            try:
+                filters[name] = date.fromisoformat(value)
+            except ValueError:
+                return None, f"{name} must be a date in YYYY-MM-DD format"
+
+    typ = sanitize_input(params.get('typ'))
+    if typ:
+        valid, error = validate_string_length(typ, "typ", min_length=1, max_length=50)
+        if not valid:
+            return None, error
+        filters['typ'] = typ
+    return filters, None
+
+
+@api_view(['GET'])
+def detector_details(request, serial):
+    """Detector with its tower and institution, answered from the in-process registry"""
+    try:
+        valid, error = validate_serial_number(serial)
+        if not valid:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        details = detector_registry.details(serial)
+        if details is None:
+            return Response({"error": "Detector not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(details)
+
+    except Exception as e:
+        logger.error(f"Detector details error for {serial}: {e}")
+        return Response({"error": "Failed to load detector"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def detector_history(request, serial):
+    """One page of detector history, newest first, with keyset pagination"""
+    try:
+        valid, error = validate_serial_number(serial)
+        if not valid:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters, error = parse_history_filters(request.GET)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page_size = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "limit must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+        after = None
+        if request.GET.get('cursor'):
+            try:
+                after = decode_cursor(request.GET['cursor'])
+            except ValueError:
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, next_cursor = fetch_history_page(serial.strip(), page_size=page_size, after=after, **filters)
+        return Response({"items": rows, "next_cursor": next_cursor})
+
+    except Exception as e:
+        logger.error(f"Detector history error for {serial}: {e}")
+        return Response({"error": "Failed to load detector history"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def detector_history_export(request, serial):
+    """Full detector history as CSV, streamed from a server-side cursor"""
+    try:
+        valid, error = validate_serial_number(serial)
+        if not valid:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters, error = parse_history_filters(request.GET)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        serial = serial.strip()
+        sql, params = build_history_query(serial, **filters)
+        return streaming_csv_response(request, sql, params, filename=f"historia_{serial}.csv",
+                                      label=f"history export {serial}")
+
+    except StreamLimitReached as e:
+        response = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '5'
+        return response
+    except Exception as e:
+        logger.error(f"Detector history export error for {serial}: {e}")
+        return Response({"error": "Failed to export detector history"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def update_history_flags(request):
+    """Apply many checklist flag updates to hist_det in one transaction"""
+    try:
+        updates = request.data.get('updates') if isinstance(request.data, dict) else request.data
+        if not isinstance(updates, list) or not updates:
+            return Response({"error": "updates must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(updates) > MAX_BATCH_SIZE:
+            return Response({"error": f"At most {MAX_BATCH_SIZE} updates per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = apply_flag_updates(updates)
+        except FlagColumnError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "updated": sum(1 for r in results if r["status"] == "updated"),
+            "not_found": sum(1 for r in results if r["status"] == "not_found"),
+            "invalid": sum(1 for r in results if r["status"] == "invalid"),
+            "results": results
+        })
+
+    except Exception as e:
+        logger.error(f"Checklist batch update error: {e}")
+        return Response({"error": "Failed to update checklist flags"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,22 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.streaming import StreamLimitReached, streaming_json_response
+from core.queries import GET_ALL_HARDWARE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+def list_hardware(request):
+    """Hardware register (GET_ALL_HARDWARE) as a streamed JSON array"""
+    try:
+        return streaming_json_response(request, GET_ALL_HARDWARE, label='hardware')
+    except StreamLimitReached as e:
+        response = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '5'
+        return response
+    except Exception as e:
+        logger.error(f"List hardware error: {e}")
+        return Response({"error": "Failed to load hardware"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,313 @@
+"""
+Hierarchical marker clusters for the map.
+Towers and PAD offices are bucketed per zoom level into square cells of
+CLUSTER_CELL_PX screen pixels on the Web Mercator grid. A cell at zoom z
+is exactly four cells at z + 1, so the levels form a tree: a marker's cell
+at any zoom is its leaf cell shifted right by the zoom difference. Every
+cell keeps its members and running aggregates (counts, towers with
+detectors, Usluga/Serwis), which makes a move, insert or delete cost one
+update per zoom level. When PAD, Wieze or Detektory change, the rows are
+re-read and only the markers that differ are moved; a viewport then needs
+at most a few hundred cells, whatever the zoom. Coordinates are parsed as
+for the spatial index; markers without usable ones are left out.
+"""
+import math
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from core.connection import db_cursor_readonly
+from core.queries import LOAD_MAP_CLUSTER_TOWERS, LOAD_MAP, GET_TABLE_VERSIONS
+from .spatial import parse_position
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TABLES = ['PAD', 'Wieze', 'Detektory']
+MAX_CLUSTER_ZOOM = 16
+CLUSTER_CELL_PX = 64
+TILE_PX = 256
+# Cells per world axis at zoom z: 2 ** (z + CELL_SHIFT)
+CELL_SHIFT = int(math.log2(TILE_PX // CLUSTER_CELL_PX))
+LEAF_CELLS = 2 ** (MAX_CLUSTER_ZOOM + CELL_SHIFT)
+MAX_MERCATOR_LAT = 85.05112878
+COORDINATE_PRECISION = 6
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def mercator(x, y):
+    """Longitude/latitude to Web Mercator in [0, 1) (y grows southwards)"""
+    lat = math.radians(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, y)))
+    mx = (x + 180) / 360
+    my = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2
+    return min(max(mx, 0.0), 1 - 1e-12), min(max(my, 0.0), 1 - 1e-12)
+
+
+def leaf_cell(x, y):
+    mx, my = mercator(x, y)
+    return int(mx * LEAF_CELLS), int(my * LEAF_CELLS)
+
+
+def is_yes(value):
+    return value is not None and str(value).strip().upper() == 'TAK'
+
+
+class ClusterItem:
+    """One marker; ``key`` is ('tower' | 'office', ID)"""
+    __slots__ = ('key', 'x', 'y', 'leaf', 'has_detectors', 'usluga', 'serwis')
+
+    def __init__(self, key, x, y, has_detectors=False, usluga=False, serwis=False):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.leaf = leaf_cell(x, y)
+        self.has_detectors = has_detectors
+        self.usluga = usluga
+        self.serwis = serwis
+
+    def same_as(self, other):
+        return (self.x, self.y, self.has_detectors, self.usluga, self.serwis) == \
+            (other.x, other.y, other.has_detectors, other.usluga, other.serwis)
+
+
+class Cluster:
+    """Members and running aggregates of one cell at one zoom level"""
+    __slots__ = ('members', 'towers', 'offices', 'with_detectors', 'usluga', 'serwis', 'sum_x', 'sum_y')
+
+    def __init__(self):
+        self.members = {}
+        self.towers = 0
+        self.offices = 0
+        self.with_detectors = 0
+        self.usluga = 0
+        self.serwis = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+
+    def add(self, item, sign=1):
+        if item.key[0] == 'tower':
+            self.towers += sign
+            self.with_detectors += sign * item.has_detectors
+            self.usluga += sign * item.usluga
+            self.serwis += sign * item.serwis
+        else:
+            self.offices += sign
+        self.sum_x += sign * item.x
+        self.sum_y += sign * item.y
+        if sign > 0:
+            self.members[item.key] = item
+        else:
+            del self.members[item.key]
+
+    def expansion_zoom(self, zoom):
+        """First zoom at which the members no longer share one cell"""
+        first_x, first_y = next(iter(self.members.values())).leaf
+        diff = 0
+        for item in self.members.values():
+            diff |= (item.leaf[0] ^ first_x) | (item.leaf[1] ^ first_y)
+        if not diff:
+            return MAX_CLUSTER_ZOOM + 1
+        return max(zoom + 1, MAX_CLUSTER_ZOOM - diff.bit_length() + 1)
+
+
+def _marker_feature(item):
+    kind, item_id = item.key
+    properties = {'kind': kind, 'ID': item_id}
+    if kind == 'tower':
+        properties.update({
+            'Detektory': 'TAK' if item.has_detectors else 'NIE',
+            'Usluga': 'TAK' if item.usluga else 'NIE',
+            'Serwis': 'TAK' if item.serwis else 'NIE',
+        })
+    return {
+        'type': 'Feature',
+        'id': f"{kind}-{item_id}",
+        'geometry': {'type': 'Point', 'coordinates': [
+            round(item.x, COORDINATE_PRECISION), round(item.y, COORDINATE_PRECISION)
+        ]},
+        'properties': properties,
+    }
+
+
+def _cluster_feature(zoom, cell, cluster):
+    count = len(cluster.members)
+    return {
+        'type': 'Feature',
+        'id': f"cluster-{zoom}-{cell[0]}-{cell[1]}",
+        'geometry': {'type': 'Point', 'coordinates': [
+            round(cluster.sum_x / count, COORDINATE_PRECISION), round(cluster.sum_y / count, COORDINATE_PRECISION)
+        ]},
+        'properties': {
+            'kind': 'cluster',
+            'count': count,
+            'towers': cluster.towers,
+            'offices': cluster.offices,
+            'with_detectors': cluster.with_detectors,
+            'usluga': cluster.usluga,
+            'serwis': cluster.serwis,
+            'expansion_zoom': cluster.expansion_zoom(zoom),
+        },
+    }
+
+
+class ClusterIndex:
+    """Cluster tree over all markers, updated in place as markers change"""
+
+    def __init__(self):
+        self.version = None
+        self.items = {}
+        self.levels = [{} for _ in range(MAX_CLUSTER_ZOOM + 1)]
+        self.built_at = None
+        self.etag_base = ''
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _place(self, item, sign):
+        leaf_x, leaf_y = item.leaf
+        for zoom, level in enumerate(self.levels):
+            shift = MAX_CLUSTER_ZOOM - zoom
+            cell = (leaf_x >> shift, leaf_y >> shift)
+            cluster = level.get(cell)
+            if cluster is None:
+                cluster = level[cell] = Cluster()
+            cluster.add(item, sign)
+            if not cluster.members:
+                del level[cell]
+
+    def update(self, version, items):
+        """
+        Bring the tree in line with ``items`` ({key: ClusterItem}), touching
+        only markers that were added, removed, moved or changed status.
+
+        Returns:
+            int: Number of markers updated
+        """
+        with self._lock:
+            changed = 0
+            for key in [k for k in self.items if k not in items]:
+                self._place(self.items.pop(key), -1)
+                changed += 1
+            for key, item in items.items():
+                current = self.items.get(key)
+                if current is not None:
+                    if current.same_as(item):
+                        continue
+                    self._place(current, -1)
+                self._place(item, 1)
+                self.items[key] = item
+                changed += 1
+            self.version = version
+            self.built_at = datetime.now()
+            self.etag_base = hashlib.sha1(repr(version).encode()).hexdigest()[:16]
+        return changed
+
+    def _cells(self, level, zoom, bbox):
+        if bbox is None:
+            return list(level.items())
+        min_x, min_y, max_x, max_y = bbox
+        scale = 2 ** (zoom + CELL_SHIFT)
+        # Mercator y grows southwards: the north edge gives the smallest row
+        left, top = mercator(min_x, max_y)
+        right, bottom = mercator(max_x, min_y)
+        ix0, iy0, ix1, iy1 = int(left * scale), int(top * scale), int(right * scale), int(bottom * scale)
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > len(level):
+            return [(cell, cluster) for cell, cluster in level.items()
+                    if ix0 <= cell[0] <= ix1 and iy0 <= cell[1] <= iy1]
+        return [((ix, iy), level[(ix, iy)])
+                for ix in range(ix0, ix1 + 1) for iy in range(iy0, iy1 + 1) if (ix, iy) in level]
+
+    def feature_collection(self, zoom, bbox=None):
+        """
+        Clusters and single markers for one zoom level and viewport.
+
+        Args:
+            zoom: Map zoom level; above MAX_CLUSTER_ZOOM every marker is returned
+            bbox: Optional (min_x, min_y, max_x, max_y) viewport
+
+        Returns:
+            tuple: (ETag, UTF-8 encoded GeoJSON), both from the same update
+        """
+        level_zoom = min(zoom, MAX_CLUSTER_ZOOM)
+        features = []
+        with self._lock:
+            key = f"{self.etag_base}|{zoom}|{bbox}"
+            for cell, cluster in self._cells(self.levels[level_zoom], level_zoom, bbox):
+                if len(cluster.members) == 1 or zoom > MAX_CLUSTER_ZOOM:
+                    features.extend(_marker_feature(item) for item in cluster.members.values())
+                else:
+                    features.append(_cluster_feature(level_zoom, cell, cluster))
+
+        if bbox:
+            # Cells overlap the viewport edges; drop markers that lie outside it
+            min_x, min_y, max_x, max_y = bbox
+            features = [f for f in features if f['properties']['kind'] == 'cluster'
+                        or (min_x <= f['geometry']['coordinates'][0] <= max_x
+                            and min_y <= f['geometry']['coordinates'][1] <= max_y)]
+        etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+        body = json.dumps({'type': 'FeatureCollection', 'features': features},
+                          separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        return etag, body
+
+
+def _get_source_version(cursor):
+    cursor.execute(GET_TABLE_VERSIONS, (SOURCE_TABLES,))
+    versions = dict(cursor.fetchall())
+    return tuple(versions.get(table, 0) for table in SOURCE_TABLES)
+
+
+def _load_items(cursor):
+    items = {}
+    skipped = 0
+    cursor.execute(LOAD_MAP_CLUSTER_TOWERS)
+    for tower_id, x, y, usluga, serwis, has_detectors in cursor.fetchall():
+        point = parse_position(x, y)
+        if point is None:
+            skipped += 1
+            continue
+        items[('tower', tower_id)] = ClusterItem(('tower', tower_id), *point,
+                                                 bool(has_detectors), is_yes(usluga), is_yes(serwis))
+    cursor.execute(LOAD_MAP)
+    for office_id, _, _, x, y in cursor.fetchall():
+        if x is None or y is None:
+            continue
+        point = parse_position(x, y)
+        if point is None:
+            skipped += 1
+            continue
+        items[('office', office_id)] = ClusterItem(('office', office_id), *point)
+    if skipped:
+        logger.warning(f"Map clusters: {skipped} markers with unusable coordinates left out")
+    return items
+
+
+def get_cluster_index():
+    """
+    Return the cluster index, updating it in place if PAD, Wieze or
+    Detektory changed since the last update.
+
+    Returns:
+        ClusterIndex: Index matching the current table versions
+    """
+    global _index
+    with db_cursor_readonly() as cursor:
+        version = _get_source_version(cursor)
+        index = _index
+        if index is not None and index.version == version:
+            return index
+
+        with _index_lock:
+            if _index is not None and _index.version == version:
+                return _index
+            start_time = datetime.now()
+            items = _load_items(cursor)
+            index = _index or ClusterIndex()
+            changed = index.update(version, items)
+            _index = index
+
+    duration = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Map clusters {version} updated in {duration:.2f}s: {changed} of {len(index)} markers changed")
+    return index
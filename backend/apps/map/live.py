@@ -0,0 +1,94 @@
+"""
+In-process fan-out of live_view_updated_at changes to connected dashboards.
+All subscribers of a process share the single LISTEN connection from
+core.notifications; each dashboard only gets a small asyncio queue.
+"""
+import json
+import asyncio
+import logging
+import threading
+from core.notifications import subscribe
+
+logger = logging.getLogger(__name__)
+
+LIVE_VIEW_CHANNEL = 'live_view_changed'
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Marker telling a dashboard that deltas were lost and it should refetch
+RESYNC = object()
+
+
+class LiveViewSubscriber:
+    """Queue of pending deltas for one connected dashboard"""
+    __slots__ = ('loop', 'queue')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, message):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            # A slow client only needs to know it missed something
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+
+class LiveViewHub:
+    """Registry of subscribers fed by the process-wide LISTEN connection"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+        self.deltas_received = 0
+
+    def add(self, loop):
+        self._ensure_listener()
+        subscriber = LiveViewSubscriber(loop)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def remove(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, payload):
+        """Called on the listener thread with a JSON array of [serial, timestamp]"""
+        try:
+            deltas = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed live view payload: {payload[:200]}")
+            return
+        self.deltas_received += len(deltas)
+        self._broadcast(deltas)
+
+    def resync(self):
+        """Called after the LISTEN connection was re-established"""
+        self._broadcast(RESYNC)
+
+    def _broadcast(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                # Event loop already closed; the request is gone
+                self.remove(subscriber)
+
+    def _ensure_listener(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = subscribe(LIVE_VIEW_CHANNEL, self.publish, on_reconnect=self.resync)
+
+
+live_view_hub = LiveViewHub()
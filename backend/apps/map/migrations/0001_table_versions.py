@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# Version counters bumped by statement-level triggers whenever PAD, Wieze or
+# Boxes change. Caches built from those tables compare versions instead of
+# re-running the underlying aggregates.
+CREATE_TABLE_VERSIONS = """
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name text PRIMARY KEY,
+    version bigint NOT NULL DEFAULT 0,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO table_versions (table_name)
+VALUES ('PAD'), ('Wieze'), ('Boxes')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+    changed boolean := true;
+BEGIN
+    IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows) INTO changed;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (SELECT 1 FROM old_rows) INTO changed;
+    END IF;
+
+    IF changed THEN
+        INSERT INTO table_versions (table_name, version, changed_at)
+        VALUES (TG_TABLE_NAME, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_versions.version + 1, changed_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_TABLE_VERSIONS = """
+DROP FUNCTION IF EXISTS bump_table_version() CASCADE;
+DROP TABLE IF EXISTS table_versions;
+"""
+
+TRIGGERS_TEMPLATE = """
+CREATE TRIGGER {prefix}_version_ins AFTER INSERT ON "{table}"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER {prefix}_version_upd AFTER UPDATE ON "{table}"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER {prefix}_version_del AFTER DELETE ON "{table}"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER {prefix}_version_trunc AFTER TRUNCATE ON "{table}"
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+"""
+
+DROP_TRIGGERS_TEMPLATE = """
+DROP TRIGGER IF EXISTS {prefix}_version_ins ON "{table}";
+DROP TRIGGER IF EXISTS {prefix}_version_upd ON "{table}";
+DROP TRIGGER IF EXISTS {prefix}_version_del ON "{table}";
+DROP TRIGGER IF EXISTS {prefix}_version_trunc ON "{table}";
+"""
+
+VERSIONED_TABLES = [('pad', 'PAD'), ('wieze', 'Wieze'), ('boxes', 'Boxes')]
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLE_VERSIONS, DROP_TABLE_VERSIONS),
+    ] + [
+        migrations.RunSQL(
+            TRIGGERS_TEMPLATE.format(prefix=prefix, table=table),
+            DROP_TRIGGERS_TEMPLATE.format(prefix=prefix, table=table),
+        )
+        for prefix, table in VERSIONED_TABLES
+    ]
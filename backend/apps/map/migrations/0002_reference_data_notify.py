@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# The version triggers on PAD, Wieze and Boxes additionally NOTIFY
+# reference_data_changed with the table name, so caches in every worker
+# process can drop dependent entries as soon as the writing transaction
+# commits (see core.reference_cache).
+NOTIFYING_BUMP = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+    changed boolean := true;
+BEGIN
+    IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows) INTO changed;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (SELECT 1 FROM old_rows) INTO changed;
+    END IF;
+
+    IF changed THEN
+        INSERT INTO table_versions (table_name, version, changed_at)
+        VALUES (TG_TABLE_NAME, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_versions.version + 1, changed_at = now();
+        PERFORM pg_notify('reference_data_changed', TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SILENT_BUMP = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+    changed boolean := true;
+BEGIN
+    IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows) INTO changed;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (SELECT 1 FROM old_rows) INTO changed;
+    END IF;
+
+    IF changed THEN
+        INSERT INTO table_versions (table_name, version, changed_at)
+        VALUES (TG_TABLE_NAME, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_versions.version + 1, changed_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0001_table_versions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(NOTIFYING_BUMP, SILENT_BUMP),
+    ]
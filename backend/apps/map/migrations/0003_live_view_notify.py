@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Statement-level triggers on Detektory publish compact [serial, live_view_updated_at]
+# deltas on the live_view_changed channel, 100 rows per notification to stay
+# well below the 8000-byte payload limit. Only rows whose timestamp really
+# changed are sent; they are delivered when the sync transaction commits.
+CREATE_LIVE_VIEW_NOTIFY = """
+CREATE OR REPLACE FUNCTION notify_live_view_changes() RETURNS trigger AS $$
+DECLARE
+    payload text;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        FOR payload IN
+            SELECT json_agg(json_build_array(c.serial, c."live_view_updated_at"))::text
+            FROM (
+                SELECT n.serial, n."live_view_updated_at",
+                       (row_number() OVER () - 1) / 100 AS chunk
+                FROM new_rows n
+                WHERE n."live_view_updated_at" IS NOT NULL
+            ) c
+            GROUP BY c.chunk
+        LOOP
+            PERFORM pg_notify('live_view_changed', payload);
+        END LOOP;
+    ELSE
+        FOR payload IN
+            SELECT json_agg(json_build_array(c.serial, c."live_view_updated_at"))::text
+            FROM (
+                SELECT n.serial, n."live_view_updated_at",
+                       (row_number() OVER () - 1) / 100 AS chunk
+                FROM new_rows n
+                JOIN old_rows o ON o.serial = n.serial
+                WHERE n."live_view_updated_at" IS DISTINCT FROM o."live_view_updated_at"
+            ) c
+            GROUP BY c.chunk
+        LOOP
+            PERFORM pg_notify('live_view_changed', payload);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER detektory_live_view_ins AFTER INSERT ON "Detektory"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_live_view_changes();
+CREATE TRIGGER detektory_live_view_upd AFTER UPDATE ON "Detektory"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_live_view_changes();
+"""
+
+DROP_LIVE_VIEW_NOTIFY = """
+DROP TRIGGER IF EXISTS detektory_live_view_ins ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_live_view_upd ON "Detektory";
+DROP FUNCTION IF EXISTS notify_live_view_changes();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0002_reference_data_notify'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_LIVE_VIEW_NOTIFY, DROP_LIVE_VIEW_NOTIFY),
+    ]
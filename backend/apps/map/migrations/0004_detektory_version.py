@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# The map clusters count towers with detectors from Detektory, so Detektory
+# gets a table_versions counter as well. Unlike bump_table_version, updates
+# only count when a detector moves to another tower (Wieza_ID); the frequent
+# sync updates of live_view_updated_at leave the version alone.
+CREATE_DETEKTORY_VERSION = """
+INSERT INTO table_versions (table_name)
+VALUES ('Detektory')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_detektory_version() RETURNS trigger AS $$
+DECLARE
+    changed boolean := true;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT EXISTS (SELECT 1 FROM new_rows) INTO changed;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (SELECT 1 FROM old_rows) INTO changed;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT EXISTS (
+            SELECT 1 FROM new_rows n
+            JOIN old_rows o ON o.serial = n.serial
+            WHERE n."Wieza_ID" IS DISTINCT FROM o."Wieza_ID"
+        ) INTO changed;
+    END IF;
+
+    IF changed THEN
+        INSERT INTO table_versions (table_name, version, changed_at)
+        VALUES (TG_TABLE_NAME, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_versions.version + 1, changed_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER detektory_version_ins AFTER INSERT ON "Detektory"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_detektory_version();
+CREATE TRIGGER detektory_version_upd AFTER UPDATE ON "Detektory"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_detektory_version();
+CREATE TRIGGER detektory_version_del AFTER DELETE ON "Detektory"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_detektory_version();
+CREATE TRIGGER detektory_version_trunc AFTER TRUNCATE ON "Detektory"
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_detektory_version();
+"""
+
+DROP_DETEKTORY_VERSION = """
+DROP TRIGGER IF EXISTS detektory_version_ins ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_version_upd ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_version_del ON "Detektory";
+DROP TRIGGER IF EXISTS detektory_version_trunc ON "Detektory";
+DROP FUNCTION IF EXISTS bump_detektory_version();
+DELETE FROM table_versions WHERE table_name = 'Detektory';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0003_live_view_notify'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_DETEKTORY_VERSION, DROP_DETEKTORY_VERSION),
+    ]
@@ -0,0 +1,144 @@
+"""
+Precomputed GeoJSON snapshot of the map layers.
+Built from GET_TOWERS_WITH_INSTITUTIONS and LOAD_MAP and rebuilt only when
+the trigger-maintained versions of PAD, Wieze or Boxes change.
+"""
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from core.connection import db_cursor_readonly
+from core.queries import GET_TOWERS_WITH_INSTITUTIONS, LOAD_MAP, GET_TABLE_VERSIONS
+from .spatial import parse_position
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TABLES = ['PAD', 'Wieze', 'Boxes']
+COORDINATE_PRECISION = 6
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+class MapFeature:
+    """Pre-serialized GeoJSON feature with its coordinates kept for filtering"""
+    __slots__ = ('x', 'y', 'nadlesnictwo', 'json')
+
+    def __init__(self, x, y, nadlesnictwo, json_text):
+        self.x = x
+        self.y = y
+        self.nadlesnictwo = nadlesnictwo
+        self.json = json_text
+
+
+class MapSnapshot:
+    """Immutable set of map features for one version of the source tables"""
+
+    def __init__(self, version, features):
+        self.version = version
+        self.features = features
+        self.built_at = datetime.now()
+        self.etag_base = hashlib.sha1(repr(version).encode()).hexdigest()[:16]
+
+    def etag(self, bbox=None, nadlesnictwo=None):
+        """ETag for the filtered view of this snapshot"""
+        key = f"{self.etag_base}|{bbox}|{(nadlesnictwo or '').lower()}"
+        return '"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+
+    def feature_collection(self, bbox=None, nadlesnictwo=None):
+        """
+        Serialize matching features as a compact GeoJSON FeatureCollection.
+
+        Args:
+            bbox: Optional (min_x, min_y, max_x, max_y) viewport
+            nadlesnictwo: Optional Nadlesnictwo name (case-insensitive)
+
+        Returns:
+            bytes: UTF-8 encoded GeoJSON
+        """
+        features = self.features
+        if nadlesnictwo:
+            wanted = nadlesnictwo.lower()
+            features = [f for f in features if f.nadlesnictwo == wanted]
+        if bbox:
+            min_x, min_y, max_x, max_y = bbox
+            features = [f for f in features
+                        if min_x <= f.x <= max_x and min_y <= f.y <= max_y]
+
+        body = '{"type":"FeatureCollection","features":[' + ','.join(f.json for f in features) + ']}'
+        return body.encode('utf-8')
+
+
+def _rows_as_dicts(cursor):
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _make_feature(feature_id, kind, x, y, nadlesnictwo, properties):
+    """MapFeature for one row, or None when its coordinates are unusable"""
+    position = parse_position(x, y)
+    if position is None:
+        return None
+    x, y = (round(value, COORDINATE_PRECISION) for value in position)
+    properties = {k: v for k, v in properties.items() if v is not None}
+    properties['kind'] = kind
+    feature = {
+        'type': 'Feature',
+        'id': f"{kind}-{feature_id}",
+        'geometry': {'type': 'Point', 'coordinates': [x, y]},
+        'properties': properties,
+    }
+    json_text = json.dumps(feature, separators=(',', ':'), ensure_ascii=False, default=str)
+    return MapFeature(x, y, (nadlesnictwo or '').lower(), json_text)
+
+
+def _get_source_version(cursor):
+    cursor.execute(GET_TABLE_VERSIONS, (SOURCE_TABLES,))
+    versions = dict(cursor.fetchall())
+    return tuple(versions.get(table, 0) for table in SOURCE_TABLES)
+
+
+def _build_features(cursor):
+    features = []
+
+    cursor.execute(GET_TOWERS_WITH_INSTITUTIONS)
+    for tower in _rows_as_dicts(cursor):
+        x, y = tower.pop('Wspolrzedne_X'), tower.pop('Wspolrzedne_Y')
+        features.append(_make_feature(tower.pop('ID'), 'tower', x, y, tower.get('Nadlesnictwo'), tower))
+
+    cursor.execute(LOAD_MAP)
+    for office in _rows_as_dicts(cursor):
+        x, y = office.pop('Wspolrzedne_X'), office.pop('Wspolrzedne_Y')
+        if x is None or y is None:
+            continue
+        features.append(_make_feature(office.pop('ID'), 'office', x, y, office.get('Nadlesnictwo'), office))
+
+    return [feature for feature in features if feature is not None]
+
+
+def get_map_snapshot():
+    """
+    Return the current map snapshot, rebuilding it if PAD, Wieze or Boxes
+    changed since it was built.
+
+    Returns:
+        MapSnapshot: Snapshot matching the current table versions
+    """
+    global _snapshot
+    with db_cursor_readonly() as cursor:
+        version = _get_source_version(cursor)
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with _snapshot_lock:
+            if _snapshot is not None and _snapshot.version == version:
+                return _snapshot
+            start_time = datetime.now()
+            features = _build_features(cursor)
+            _snapshot = MapSnapshot(version, features)
+
+    duration = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Map snapshot {version} built in {duration:.2f}s: {len(features)} features")
+    return _snapshot
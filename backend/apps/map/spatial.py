@@ -0,0 +1,270 @@
+"""
+In-process spatial index over tower coordinates.
+Towers are bucketed into a grid of GRID_CELL_DEGREES cells, so nearest,
+radius and polygon queries only visit the cells around the search area and
+their cost follows the local tower density, not the fleet size. Like the
+map snapshot, the index is rebuilt only when the trigger-maintained
+versions of PAD or Wieze change. Distances are great-circle kilometres,
+bearings degrees clockwise from north.
+"""
+import math
+import heapq
+import logging
+import threading
+from datetime import datetime
+from core.connection import db_cursor_readonly
+from core.queries import LOAD_TOWER_POINTS, GET_TABLE_VERSIONS
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TABLES = ['PAD', 'Wieze']
+GRID_CELL_DEGREES = 0.1
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class TowerPoint:
+    """One tower in the index; ``azimuth`` is Azymut parsed to degrees, or None"""
+    __slots__ = ('id', 'name', 'institution_id', 'nadlesnictwo', 'x', 'y', 'azymut', 'azimuth')
+
+    def __init__(self, tower_id, name, institution_id, nadlesnictwo, x, y, azymut):
+        self.id = tower_id
+        self.name = name
+        self.institution_id = institution_id
+        self.nadlesnictwo = nadlesnictwo
+        self.x = x
+        self.y = y
+        self.azymut = azymut
+        self.azimuth = parse_azimuth(azymut)
+
+
+def parse_coordinate(value):
+    """Wspolrzedne_X/Y (text, decimal comma allowed) as a float, or None"""
+    try:
+        number = float(str(value).strip().replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def parse_position(x, y):
+    """Wspolrzedne_X/Y as a (longitude, latitude) pair, or None when unusable"""
+    x, y = parse_coordinate(x), parse_coordinate(y)
+    if x is None or y is None or not (-180 <= x <= 180 and -90 <= y <= 90):
+        return None
+    return x, y
+
+
+def load_points(rows):
+    """TowerPoints of LOAD_TOWER_POINTS rows; towers with unusable coordinates are left out"""
+    points = []
+    for tower_id, name, institution_id, nadlesnictwo, x, y, azymut in rows:
+        position = parse_position(x, y)
+        if position is None:
+            continue
+        points.append(TowerPoint(tower_id, name, institution_id, nadlesnictwo, *position, azymut))
+    return points
+
+
+def parse_azimuth(value):
+    """Azymut as degrees in [0, 360), or None when it is not a number"""
+    if value is None:
+        return None
+    try:
+        degrees = float(str(value).strip().rstrip('°').replace(',', '.'))
+    except ValueError:
+        return None
+    return degrees % 360 if math.isfinite(degrees) else None
+
+
+def haversine_km(x1, y1, x2, y2):
+    lon1, lat1, lon2, lat2 = map(math.radians, (x1, y1, x2, y2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bearing_deg(x1, y1, x2, y2):
+    """Initial bearing from (x1, y1) to (x2, y2)"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (x1, y1, x2, y2))
+    dlon = lon2 - lon1
+    y = math.sin(dlon) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+    return math.degrees(math.atan2(y, x)) % 360
+
+
+def angle_difference(a, b):
+    """Signed difference a - b in [-180, 180)"""
+    return (a - b + 180) % 360 - 180
+
+
+def point_in_polygon(x, y, polygon):
+    """Ray casting; ``polygon`` is a list of (x, y) vertices, closed or not"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _cell(x, y):
+    return math.floor(x / GRID_CELL_DEGREES), math.floor(y / GRID_CELL_DEGREES)
+
+
+class TowerIndex:
+    """Immutable grid index of the towers for one version of PAD and Wieze"""
+
+    def __init__(self, version, points):
+        self.version = version
+        self.points = points
+        self.built_at = datetime.now()
+        self.cells = {}
+        for point in points:
+            self.cells.setdefault(_cell(point.x, point.y), []).append(point)
+        if self.cells:
+            columns = [ix for ix, _ in self.cells]
+            rows = [iy for _, iy in self.cells]
+            self.extent = (min(columns), min(rows), max(columns), max(rows))
+        else:
+            self.extent = None
+
+    def __len__(self):
+        return len(self.points)
+
+    def _in_box(self, min_x, min_y, max_x, max_y):
+        """Towers of the cells overlapping a box (a superset of the towers inside it)"""
+        ix0, iy0 = _cell(min_x, min_y)
+        ix1, iy1 = _cell(max_x, max_y)
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > len(self.cells):
+            # Box larger than the occupied grid: walk the occupied cells instead
+            for (ix, iy), points in self.cells.items():
+                if ix0 <= ix <= ix1 and iy0 <= iy <= iy1:
+                    yield from points
+            return
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                yield from self.cells.get((ix, iy), ())
+
+    def _ring(self, cx, cy, ring):
+        if ring == 0:
+            yield from self.cells.get((cx, cy), ())
+            return
+        for ix in range(cx - ring, cx + ring + 1):
+            yield from self.cells.get((ix, cy - ring), ())
+            yield from self.cells.get((ix, cy + ring), ())
+        for iy in range(cy - ring + 1, cy + ring):
+            yield from self.cells.get((cx - ring, iy), ())
+            yield from self.cells.get((cx + ring, iy), ())
+
+    def nearest(self, x, y, k):
+        """The ``k`` towers closest to (x, y) as (distance_km, TowerPoint), nearest first"""
+        if not self.extent or k <= 0:
+            return []
+        cx, cy = _cell(x, y)
+        min_ix, min_iy, max_ix, max_iy = self.extent
+        last_ring = max(cx - min_ix, max_ix - cx, cy - min_iy, max_iy - cy)
+
+        found = []
+        ring = 0
+        while ring <= last_ring:
+            if 8 * ring > len(self.cells):
+                # Far from the towers: a full scan is cheaper than more rings
+                found = [(haversine_km(x, y, p.x, p.y), p.id, p) for p in self.points]
+                break
+            found.extend((haversine_km(x, y, p.x, p.y), p.id, p) for p in self._ring(cx, cy, ring))
+            if len(found) >= k:
+                # Towers beyond this ring are at least `ring` cell widths away
+                edge_lat = math.radians(min(89.0, abs(y) + (ring + 1) * GRID_CELL_DEGREES))
+                reach_km = ring * GRID_CELL_DEGREES * KM_PER_DEGREE * math.cos(edge_lat)
+                if heapq.nsmallest(k, found)[-1][0] <= reach_km:
+                    break
+            ring += 1
+        return [(distance, point) for distance, _, point in heapq.nsmallest(k, found)]
+
+    def within_radius(self, x, y, radius_km):
+        """Towers within ``radius_km`` of (x, y) as (distance_km, TowerPoint), nearest first"""
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(89.0, abs(y) + dlat))), 1e-6))
+        matches = []
+        for point in self._in_box(x - dlon, y - dlat, x + dlon, y + dlat):
+            distance = haversine_km(x, y, point.x, point.y)
+            if distance <= radius_km:
+                matches.append((distance, point.id, point))
+        matches.sort()
+        return [(distance, point) for distance, _, point in matches]
+
+    def within_polygon(self, polygon):
+        """Towers inside a polygon of (x, y) vertices"""
+        xs = [vx for vx, _ in polygon]
+        ys = [vy for _, vy in polygon]
+        return [
+            point for point in self._in_box(min(xs), min(ys), max(xs), max(ys))
+            if point_in_polygon(point.x, point.y, polygon)
+        ]
+
+
+def describe(point, x=None, y=None, distance_km=None):
+    """
+    Tower as a dict; with a reference point also the distance to it, the
+    bearing from the tower to it and that bearing relative to Azymut.
+    """
+    result = {
+        "ID": point.id,
+        "Nazwa": point.name,
+        "Instytucja_ID": point.institution_id,
+        "Nadlesnictwo": point.nadlesnictwo,
+        "Wspolrzedne_X": point.x,
+        "Wspolrzedne_Y": point.y,
+        "Azymut": point.azymut,
+    }
+    if x is not None and y is not None:
+        if distance_km is None:
+            distance_km = haversine_km(point.x, point.y, x, y)
+        bearing = bearing_deg(point.x, point.y, x, y)
+        result["distance_km"] = round(distance_km, 3)
+        result["bearing"] = round(bearing, 1)
+        result["bearing_from_azymut"] = (
+            round(angle_difference(bearing, point.azimuth), 1) if point.azimuth is not None else None
+        )
+    return result
+
+
+def _get_source_version(cursor):
+    cursor.execute(GET_TABLE_VERSIONS, (SOURCE_TABLES,))
+    versions = dict(cursor.fetchall())
+    return tuple(versions.get(table, 0) for table in SOURCE_TABLES)
+
+
+def get_tower_index():
+    """
+    Return the current tower index, rebuilding it if PAD or Wieze changed
+    since it was built.
+
+    Returns:
+        TowerIndex: Index matching the current table versions
+    """
+    global _index
+    with db_cursor_readonly() as cursor:
+        version = _get_source_version(cursor)
+        index = _index
+        if index is not None and index.version == version:
+            return index
+
+        with _index_lock:
+            if _index is not None and _index.version == version:
+                return _index
+            start_time = datetime.now()
+            cursor.execute(LOAD_TOWER_POINTS)
+            points = load_points(cursor.fetchall())
+            _index = TowerIndex(version, points)
+
+    duration = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Tower index {version} built in {duration:.2f}s: {len(points)} towers, {len(_index.cells)} cells")
+    return _index
@@ -0,0 +1,127 @@
+import json
+
+from django.test import SimpleTestCase
+
+from .spatial import TowerIndex, load_points, parse_position
+from .clusters import ClusterIndex, ClusterItem, MAX_CLUSTER_ZOOM
+
+
+def tower_rows():
+    return [
+        (1, 'Centrum', 10, 'A', '21.0000', '52.0000', '90'),
+        (2, 'Wschod', 10, 'A', '21,0500', '52.0000', None),
+        (3, 'Polnoc', 11, 'B', '21.0000', '52.1000', 'brak'),
+        (4, 'Daleko', 12, 'C', '23.0000', '50.0000', '45°'),
+        (5, 'Bez wspolrzednych', 12, 'C', None, '50.0000', None),
+        (6, 'Poza zakresem', 12, 'C', '200', '50.0000', None),
+    ]
+
+
+class TowerIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = TowerIndex((1, 1), load_points(tower_rows()))
+
+    def test_towers_with_unusable_coordinates_are_skipped(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertIsNone(parse_position('abc', '52'))
+        self.assertEqual(parse_position('21,5', ' 52 '), (21.5, 52.0))
+        azimuths = {p.id: p.azimuth for p in self.index.points}
+        self.assertEqual(azimuths, {1: 90.0, 2: None, 3: None, 4: 45.0})
+
+    def test_nearest_is_ordered_by_distance(self):
+        found = self.index.nearest(21.001, 52.0, 3)
+        self.assertEqual([p.id for _, p in found], [1, 2, 3])
+        self.assertEqual([d for d, _ in found], sorted(d for d, _ in found))
+        self.assertEqual([p.id for _, p in self.index.nearest(22.9, 50.0, 1)], [4])
+        self.assertEqual(len(self.index.nearest(21.0, 52.0, 10)), 4)
+        self.assertEqual(self.index.nearest(21.0, 52.0, 0), [])
+
+    def test_within_radius(self):
+        found = self.index.within_radius(21.0, 52.0, 5)
+        self.assertEqual([p.id for _, p in found], [1, 2])
+        self.assertAlmostEqual(found[1][0], 3.43, places=1)
+        self.assertEqual(self.index.within_radius(30.0, 40.0, 5), [])
+
+    def test_within_polygon(self):
+        square = [(20.9, 51.9), (21.1, 51.9), (21.1, 52.05), (20.9, 52.05)]
+        self.assertEqual(sorted(p.id for p in self.index.within_polygon(square)), [1, 2])
+        triangle = [(22, 49), (24, 49), (23, 51), (22, 49)]
+        self.assertEqual([p.id for p in self.index.within_polygon(triangle)], [4])
+
+    def test_empty_index(self):
+        index = TowerIndex(None, [])
+        self.assertEqual(index.nearest(21.0, 52.0, 3), [])
+        self.assertEqual(index.within_radius(21.0, 52.0, 5), [])
+
+
+class ClusterIndexTests(SimpleTestCase):
+
+    def items(self, *extra):
+        items = {
+            ('tower', 1): ClusterItem(('tower', 1), 21.0, 52.0, has_detectors=True, usluga=True),
+            ('tower', 2): ClusterItem(('tower', 2), 21.001, 52.001),
+            ('office', 1): ClusterItem(('office', 1), 19.0, 50.0),
+        }
+        items.update((item.key, item) for item in extra)
+        return items
+
+    def features(self, index, zoom, bbox=None):
+        return json.loads(index.feature_collection(zoom, bbox)[1])['features']
+
+    def test_update_only_touches_changed_markers(self):
+        index = ClusterIndex()
+        self.assertEqual(index.update(1, self.items()), 3)
+        self.assertEqual(index.update(2, self.items()), 0)
+        self.assertEqual(len(index), 3)
+
+        moved = ClusterItem(('tower', 2), 19.001, 50.001)
+        self.assertEqual(index.update(3, self.items(moved)), 1)
+        items = self.items(moved)
+        del items[('office', 1)]
+        self.assertEqual(index.update(4, items), 1)
+        self.assertEqual(len(index), 2)
+
+        top = index.levels[0]
+        self.assertEqual(len(top), 1)
+        cluster = next(iter(top.values()))
+        self.assertEqual((cluster.towers, cluster.offices, cluster.with_detectors), (2, 0, 1))
+
+    def test_feature_collection_clusters_at_low_zoom(self):
+        index = ClusterIndex()
+        index.update(1, self.items())
+        features = self.features(index, 0)
+        self.assertEqual(len(features), 1)
+        properties = features[0]['properties']
+        self.assertEqual((properties['kind'], properties['count']), ('cluster', 3))
+        self.assertEqual((properties['towers'], properties['offices'], properties['usluga']), (2, 1, 1))
+
+        kinds = sorted(f['properties']['kind'] for f in self.features(index, 8))
+        self.assertEqual(kinds, ['cluster', 'office'])
+        self.assertEqual(len(self.features(index, MAX_CLUSTER_ZOOM + 1)), 3)
+        self.assertEqual(len(self.features(index, 8, bbox=(18.5, 49.5, 19.5, 50.5))), 1)
+
+    def test_etag_follows_version(self):
+        index = ClusterIndex()
+        index.update(1, self.items())
+        etag, _ = index.feature_collection(5)
+        self.assertEqual(index.feature_collection(5)[0], etag)
+        index.update(2, self.items())
+        self.assertNotEqual(index.feature_collection(5)[0], etag)
+
+    def test_expansion_zoom(self):
+        index = ClusterIndex()
+        index.update(1, self.items())
+        (cell, cluster), = [(c, cl) for c, cl in index.levels[8].items() if len(cl.members) == 2]
+        zoom = cluster.expansion_zoom(8)
+        self.assertGreater(zoom, 8)
+        # At the expansion zoom the two towers are in separate cells
+        self.assertTrue(all(len(c.members) == 1 for c in index.levels[zoom].values()))
+        self.assertTrue(any(len(c.members) == 2 for c in index.levels[zoom - 1].values()))
+
+        twins = ClusterIndex()
+        twins.update(1, {
+            ('tower', 1): ClusterItem(('tower', 1), 21.0, 52.0),
+            ('tower', 2): ClusterItem(('tower', 2), 21.0, 52.0),
+        })
+        self.assertEqual(next(iter(twins.levels[3].values())).expansion_zoom(3), MAX_CLUSTER_ZOOM + 1)
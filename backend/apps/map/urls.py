@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('features/', views.map_features, name='map_features'),
+    path('clusters/', views.map_clusters, name='map_clusters'),
+    path('towers/nearest/', views.nearest_towers, name='nearest_towers'),
+    path('towers/within/', views.towers_within_radius, name='towers_within_radius'),
+    path('towers/polygon/', views.towers_in_polygon, name='towers_in_polygon'),
+    path('live/', views.live_view_stream, name='live_view_stream'),
+]
@@ -0,0 +1,254 @@
+import json
+import asyncio
+import jwt
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views.decorators.gzip import gzip_page
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.validators import validate_coordinates
+from apps.authentication.tokens import get_token_verifier
+from .snapshot import get_map_snapshot
+from .spatial import get_tower_index, describe
+from .clusters import get_cluster_index
+from .live import live_view_hub, RESYNC
+import logging
+
+logger = logging.getLogger(__name__)
+
+SSE_HEARTBEAT_SECONDS = 15
+MAX_ZOOM = 22
+MAX_NEAREST = 100
+MAX_RADIUS_KM = 200
+MAX_POLYGON_VERTICES = 1000
+
+
+def parse_bbox(value):
+    """Parse a 'min_x,min_y,max_x,max_y' viewport into floats"""
+    parts = value.split(',')
+    if len(parts) != 4:
+        return None, "bbox must have four comma-separated values: min_x,min_y,max_x,max_y"
+    try:
+        min_x, min_y, max_x, max_y = (float(p) for p in parts)
+    except ValueError:
+        return None, "bbox values must be valid numbers"
+
+    for x, y in ((min_x, min_y), (max_x, max_y)):
+        valid, error = validate_coordinates(x, y)
+        if not valid:
+            return None, error
+    if min_x > max_x or min_y > max_y:
+        return None, "bbox minimum must not exceed maximum"
+    return (min_x, min_y, max_x, max_y), None
+
+
+def etag_matches(request, etag):
+    """Weak comparison against If-None-Match (gzip_page weakens our ETag)"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
+
+
+@gzip_page
+@api_view(['GET'])
+def map_features(request):
+    """GeoJSON FeatureCollection of towers and PAD offices, filtered by bbox/Nadlesnictwo"""
+    try:
+        bbox = None
+        if request.GET.get('bbox'):
+            bbox, error = parse_bbox(request.GET['bbox'])
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        nadlesnictwo = request.GET.get('nadlesnictwo', '').strip() or None
+
+        snapshot = get_map_snapshot()
+        etag = snapshot.etag(bbox, nadlesnictwo)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                snapshot.feature_collection(bbox, nadlesnictwo),
+                content_type='application/geo+json'
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        logger.error(f"Map features error: {e}")
+        return Response({"error": "Failed to load map data"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@gzip_page
+@api_view(['GET'])
+def map_clusters(request):
+    """Tower/PAD clusters for one zoom level (?zoom=) and optional viewport (?bbox=) as GeoJSON"""
+    try:
+        try:
+            zoom = int(request.GET.get('zoom', ''))
+        except ValueError:
+            return Response({"error": "zoom must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= zoom <= MAX_ZOOM:
+            return Response({"error": f"zoom must be between 0 and {MAX_ZOOM}"}, status=status.HTTP_400_BAD_REQUEST)
+        bbox = None
+        if request.GET.get('bbox'):
+            bbox, error = parse_bbox(request.GET['bbox'])
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag, body = get_cluster_index().feature_collection(zoom, bbox)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/geo+json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        logger.error(f"Map clusters error: {e}")
+        return Response({"error": "Failed to load map clusters"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def parse_point(x, y, required=True):
+    """Parse an x/y (longitude/latitude) pair; (None, None) when optional and absent"""
+    if x is None and y is None and not required:
+        return None, None
+    if x is None or y is None:
+        return None, "x and y are required"
+    valid, error = validate_coordinates(x, y)
+    if not valid:
+        return None, error
+    return (float(x), float(y)), None
+
+
+def parse_polygon(value):
+    """Parse [[x, y], ...] into a list of float pairs"""
+    if not isinstance(value, list) or not 3 <= len(value) <= MAX_POLYGON_VERTICES:
+        return None, f"polygon must be a list of 3 to {MAX_POLYGON_VERTICES} [x, y] points"
+    vertices = []
+    for vertex in value:
+        if not isinstance(vertex, (list, tuple)) or len(vertex) != 2:
+            return None, "polygon points must be [x, y] pairs"
+        point, error = parse_point(*vertex)
+        if error:
+            return None, error
+        vertices.append(point)
+    return vertices, None
+
+
+@api_view(['GET'])
+def nearest_towers(request):
+    """The k towers closest to a point, with distance and bearing from each tower"""
+    try:
+        point, error = parse_point(request.GET.get('x'), request.GET.get('y'))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = int(request.GET.get('k', 5))
+        except ValueError:
+            return Response({"error": "k must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= k <= MAX_NEAREST:
+            return Response({"error": f"k must be between 1 and {MAX_NEAREST}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        x, y = point
+        towers = [describe(p, x, y, distance) for distance, p in get_tower_index().nearest(x, y, k)]
+        return Response({"count": len(towers), "towers": towers})
+
+    except Exception as e:
+        logger.error(f"Nearest towers error: {e}")
+        return Response({"error": "Failed to find nearest towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def towers_within_radius(request):
+    """Towers within radius_km of a point, nearest first"""
+    try:
+        point, error = parse_point(request.GET.get('x'), request.GET.get('y'))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            radius_km = float(request.GET.get('radius_km', 10))
+        except ValueError:
+            return Response({"error": "radius_km must be a valid number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            return Response({"error": f"radius_km must be greater than 0 and at most {MAX_RADIUS_KM}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        x, y = point
+        towers = [describe(p, x, y, distance) for distance, p in get_tower_index().within_radius(x, y, radius_km)]
+        return Response({"count": len(towers), "towers": towers})
+
+    except Exception as e:
+        logger.error(f"Towers within radius error: {e}")
+        return Response({"error": "Failed to find towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def towers_in_polygon(request):
+    """
+    Towers inside a polygon. Body: {"polygon": [[x, y], ...], "x": ..., "y": ...};
+    with the optional x/y the towers also get distance and bearing to that point.
+    """
+    try:
+        polygon, error = parse_polygon(request.data.get('polygon'))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        point, error = parse_point(request.data.get('x'), request.data.get('y'), required=False)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        x, y = point or (None, None)
+        towers = [describe(p, x, y) for p in get_tower_index().within_polygon(polygon)]
+        if point:
+            towers.sort(key=lambda t: t["distance_km"])
+        return Response({"count": len(towers), "towers": towers})
+
+    except Exception as e:
+        logger.error(f"Towers in polygon error: {e}")
+        return Response({"error": "Failed to find towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def live_view_events():
+    """Server-Sent Events generator for one dashboard connection"""
+    subscriber = live_view_hub.add(asyncio.get_running_loop())
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if message is RESYNC:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield f"event: live_view\ndata: {json.dumps(message, separators=(',', ':'))}\n\n"
+    finally:
+        live_view_hub.remove(subscriber)
+
+
+async def live_view_stream(request):
+    """
+    Push [serial, live_view_updated_at] deltas to the dashboard as SSE.
+    Needs an ASGI server (config.asgi); one LISTEN connection per process
+    feeds every open stream. This is a plain Django view, so the session
+    cookie is checked here the way JWTAuthentication checks it.
+    """
+    token = request.COOKIES.get('token')
+    if not token:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    try:
+        get_token_verifier().verify(token)
+    except jwt.ExpiredSignatureError:
+        return JsonResponse({"error": "Session expired"}, status=401)
+    except jwt.InvalidTokenError:
+        return JsonResponse({"error": "Invalid token"}, status=401)
+
+    response = StreamingHttpResponse(live_view_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,30 @@
+import hmac
+import logging
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from core.connection import get_pool_stats
+from core.instrumentation import render_prometheus
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics(request):
+    """Query latency histograms and pool counters of this process, for Prometheus"""
+    # Query labels carry SQL text: without a configured token nobody gets in
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        return HttpResponse(status=403)
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse(status=401)
+
+    try:
+        pool_stats = get_pool_stats()
+    except Exception as e:
+        logger.warning(f"Pool stats unavailable for /metrics: {e}")
+        pool_stats = None
+    return HttpResponse(render_prometheus(pool_stats), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,64 @@
+"""
+Sync job definitions for the scheduler.
+Defaults can be overridden per job with a SYNC_JOBS dict in settings.
+"""
+from dataclasses import dataclass, field
+from django.conf import settings
+
+
+@dataclass(frozen=True)
+class SyncJob:
+    """A periodically executed sync function, referenced by dotted path"""
+    name: str
+    target: str
+    interval: float
+    jitter: float = 0.0
+    timeout: float = 600.0
+    kwargs: dict = field(default_factory=dict)
+
+
+DEFAULT_JOBS = {
+    'detectors': {
+        'target': 'external.smoke_api.sync_detectors_and_live_view',
+        'kwargs': {'mode': 'merge'},
+        'interval': 300,
+        'jitter': 30,
+        'timeout': 240,
+    },
+    'boxes': {
+        'target': 'external.smoke_api.sync_boxes_to_db',
+        'kwargs': {'mode': 'merge'},
+        'interval': 900,
+        'jitter': 60,
+        'timeout': 300,
+    },
+    'hardware': {
+        'target': 'external.monday_api.sync_monday_hardware',
+        'interval': 3600,
+        'jitter': 300,
+        'timeout': 1800,
+    },
+}
+
+
+def get_jobs(names=None):
+    """
+    Build SyncJob objects from DEFAULT_JOBS merged with settings.SYNC_JOBS.
+
+    Args:
+        names: Optional iterable restricting the returned jobs
+
+    Returns:
+        list: SyncJob instances
+    """
+    overrides = getattr(settings, 'SYNC_JOBS', {})
+    jobs = []
+    for name in sorted(set(DEFAULT_JOBS) | set(overrides)):
+        if names is not None and name not in names:
+            continue
+        config = {**DEFAULT_JOBS.get(name, {}), **overrides.get(name, {})}
+        if config.get('enabled', True) is False:
+            continue
+        config.pop('enabled', None)
+        jobs.append(SyncJob(name=name, **config))
+    return jobs
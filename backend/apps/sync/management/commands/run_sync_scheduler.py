@@ -0,0 +1,41 @@
+import signal
+import threading
+from django.core.management.base import BaseCommand, CommandError
+from apps.sync.jobs import get_jobs
+from apps.sync.scheduler import SyncScheduler
+
+
+class Command(BaseCommand):
+    help = "Run the SmokeD and Monday sync jobs concurrently on their intervals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Run the selected jobs once, concurrently, and exit")
+        parser.add_argument('--jobs', nargs='+', metavar='JOB',
+                            help="Only run these jobs (default: all configured jobs)")
+
+    def handle(self, *args, **options):
+        jobs = get_jobs(options['jobs'])
+        if not jobs:
+            raise CommandError("No sync jobs selected")
+
+        stop_event = threading.Event()
+        scheduler = SyncScheduler(jobs, stop_event=stop_event)
+
+        if options['once']:
+            results = scheduler.run_once()
+            for result in results:
+                self.stdout.write(f"{result['job']}: {result['status']} ({result['duration']:.2f}s)")
+            if any(r['status'] in ('failed', 'timeout') for r in results):
+                raise CommandError("One or more sync jobs failed")
+            return
+
+        def request_stop(signum, frame):
+            self.stdout.write("Stopping scheduler after running jobs finish...")
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.stdout.write(f"Scheduling jobs: {', '.join(job.name for job in jobs)}")
+        scheduler.run_forever()
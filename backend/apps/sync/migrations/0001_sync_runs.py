@@ -0,0 +1,43 @@
+from django.db import migrations
+
+CREATE_SYNC_RUNS = """
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id bigserial PRIMARY KEY,
+    job text NOT NULL,
+    started_at timestamptz NOT NULL,
+    finished_at timestamptz NOT NULL DEFAULT now(),
+    status text NOT NULL CHECK (status IN ('ok', 'failed', 'timeout')),
+    error text,
+    duration_seconds double precision NOT NULL,
+    fetch_seconds double precision,
+    normalize_seconds double precision,
+    write_seconds double precision,
+    rows_fetched integer,
+    rows_inserted integer,
+    rows_updated integer,
+    rows_unchanged integer,
+    rows_vanished integer,
+    rows_rejected integer
+);
+
+-- Serves both the per-job window aggregate and the last run per job;
+-- INCLUDE lets the percentiles come from an index-only scan
+CREATE INDEX IF NOT EXISTS sync_runs_job_started_at_idx
+    ON sync_runs (job, started_at DESC)
+    INCLUDE (duration_seconds, status, rows_fetched);
+"""
+
+DROP_SYNC_RUNS = """
+DROP TABLE IF EXISTS sync_runs;
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(CREATE_SYNC_RUNS, DROP_SYNC_RUNS),
+    ]
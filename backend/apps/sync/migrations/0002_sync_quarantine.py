@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# Payload records rejected by the batch validators, kept for inspection
+CREATE_SYNC_QUARANTINE = """
+CREATE TABLE IF NOT EXISTS sync_quarantine (
+    id bigserial PRIMARY KEY,
+    job text NOT NULL,
+    started_at timestamptz NOT NULL,
+    row_index integer NOT NULL,
+    error text NOT NULL,
+    record jsonb
+);
+
+CREATE INDEX IF NOT EXISTS sync_quarantine_job_started_at_idx
+    ON sync_quarantine (job, started_at DESC);
+"""
+
+DROP_SYNC_QUARANTINE = """
+DROP TABLE IF EXISTS sync_quarantine;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_sync_runs'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SYNC_QUARANTINE, DROP_SYNC_QUARANTINE),
+    ]
@@ -0,0 +1,169 @@
+"""
+Concurrent, overlap-safe scheduler for the SmokeD and Monday sync jobs.
+
+Every job runs on its own worker thread, so a full refresh takes as long as
+the slowest job rather than the sum of all of them. Before starting, a job
+takes a Postgres advisory lock on a dedicated connection, so only one
+instance of it runs across the cluster. The sync itself runs in a child
+process, which lets a job that exceeds its timeout be cancelled for real:
+the process is terminated and Postgres rolls back its open transaction.
+Child processes start with empty caches, so the scheduler keeps the SmokeD
+token and hands it to every SmokeD job instead of each run logging in.
+"""
+import os
+import time
+import random
+import logging
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from core.connection import get_connection
+from core.sync_runs import record_sync_run
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key advisory lock; the second is hashtext(job name)
+ADVISORY_LOCK_NAMESPACE = 7201
+TERMINATE_GRACE_SECONDS = 10
+# Jobs whose target lives here get the scheduler's SmokeD token
+SMOKED_MODULE = 'external.smoke_api'
+
+
+def run_job_target(target, kwargs, smoked_token=None):
+    """Entry point of the child process: set up Django and call the sync function"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+    if smoked_token:
+        from external.smoke_api import smoked_token_provider
+        smoked_token_provider.seed(smoked_token)
+
+    module_name, func_name = target.rsplit('.', 1)
+    func = getattr(importlib.import_module(module_name), func_name)
+    func(**kwargs)
+
+
+class SyncScheduler:
+    """
+    Runs SyncJob definitions on a thread pool with per-job interval, jitter,
+    cluster-wide exclusion and timeout.
+    """
+
+    def __init__(self, jobs, stop_event=None):
+        self.jobs = {job.name: job for job in jobs}
+        self.stop_event = stop_event or threading.Event()
+        self._mp = multiprocessing.get_context('spawn')
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.jobs), 1), thread_name_prefix='sync-job')
+
+    def run_job(self, job):
+        """
+        Run one job if no other instance holds its advisory lock.
+
+        Returns:
+            dict: job, status (ok, failed, timeout, skipped), duration
+        """
+        start = time.monotonic()
+        lock_conn = get_connection()
+        try:
+            lock_conn.autocommit = True
+            with lock_conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", (ADVISORY_LOCK_NAMESPACE, job.name))
+                acquired = cursor.fetchone()[0]
+            if not acquired:
+                logger.info(f"Sync job {job.name} skipped: already running elsewhere")
+                return {"job": job.name, "status": "skipped", "duration": 0.0}
+
+            status = self._run_in_child(job)
+            duration = time.monotonic() - start
+            logger.info(f"Sync job {job.name} finished with status {status} in {duration:.2f}s")
+            return {"job": job.name, "status": status, "duration": round(duration, 3)}
+        finally:
+            # Closing the session releases the advisory lock
+            try:
+                lock_conn.close()
+            except Exception:
+                pass
+
+    def run_once(self, names=None):
+        """Run the selected jobs once, concurrently, and wait for all of them"""
+        jobs = [job for name, job in self.jobs.items() if names is None or name in names]
+        futures = [self._executor.submit(self.run_job, job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def run_forever(self):
+        """Run every job on its interval until stop_event is set"""
+        now = time.monotonic()
+        next_run = {name: now + random.uniform(0, job.jitter) for name, job in self.jobs.items()}
+        running = {}
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            for name, job in self.jobs.items():
+                if name not in running and now >= next_run[name]:
+                    running[name] = self._executor.submit(self.run_job, job)
+
+            if running:
+                done, _ = wait(list(running.values()), timeout=self._sleep_time(next_run, running),
+                               return_when=FIRST_COMPLETED)
+            else:
+                done = set()
+                self.stop_event.wait(self._sleep_time(next_run, running))
+
+            for name, future in list(running.items()):
+                if future in done:
+                    del running[name]
+                    job = self.jobs[name]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Sync job {name} could not be run: {e}")
+                    next_run[name] = time.monotonic() + job.interval + random.uniform(0, job.jitter)
+
+        # Let in-flight jobs finish or hit their own timeout
+        wait(list(running.values()))
+        self._executor.shutdown(wait=True)
+
+    def _sleep_time(self, next_run, running):
+        now = time.monotonic()
+        pending = [t - now for name, t in next_run.items() if name not in running]
+        return max(0.1, min(pending + [1.0]))
+
+    def _smoked_token(self, job):
+        """The scheduler's cached SmokeD token for SmokeD jobs; None lets the child log in itself"""
+        if not job.target.startswith(SMOKED_MODULE + '.'):
+            return None
+        try:
+            from external.smoke_api import smoked_token_provider
+            return smoked_token_provider.get_token()
+        except Exception as e:
+            logger.warning(f"Sync job {job.name}: could not get a SmokeD token for the job process: {e}")
+            return None
+
+    def _run_in_child(self, job):
+        process = self._mp.Process(
+            target=run_job_target,
+            args=(job.target, job.kwargs, self._smoked_token(job)),
+            name=f"sync-{job.name}",
+            daemon=True
+        )
+        started_at = datetime.now(timezone.utc)
+        start = time.monotonic()
+        process.start()
+        process.join(job.timeout)
+
+        if process.is_alive():
+            logger.error(f"Sync job {job.name} exceeded {job.timeout:.0f}s timeout, terminating")
+            process.terminate()
+            process.join(TERMINATE_GRACE_SECONDS)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            # The killed child never got to record its own run
+            record_sync_run(job.name, started_at, time.monotonic() - start, "timeout",
+                            error=f"Exceeded {job.timeout:.0f}s timeout")
+            return "timeout"
+
+        return "ok" if process.exitcode == 0 else "failed"
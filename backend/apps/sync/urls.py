@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('status/', views.sync_status, name='sync_status'),
+    path('quarantine/', views.sync_quarantine, name='sync_quarantine'),
+]
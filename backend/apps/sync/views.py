@@ -0,0 +1,53 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.sync_runs import (
+    get_sync_run_stats, get_quarantine, DEFAULT_WINDOW_HOURS, QUARANTINE_LIMIT, SYNC_RUN_RETENTION_DAYS
+)
+from external.smoke_api import get_sync_status
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_WINDOW_HOURS = 24 * SYNC_RUN_RETENTION_DAYS
+
+
+@api_view(['GET'])
+def sync_status(request):
+    """Last run and p50/p95/p99 durations per sync job, plus detector freshness"""
+    try:
+        try:
+            window_hours = int(request.GET.get('window_hours', DEFAULT_WINDOW_HOURS))
+        except ValueError:
+            return Response({"error": "window_hours must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= window_hours <= MAX_WINDOW_HOURS:
+            return Response({"error": f"window_hours must be between 1 and {MAX_WINDOW_HOURS}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "window_hours": window_hours,
+            "jobs": get_sync_run_stats(window_hours),
+            "detectors": get_sync_status(),
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Sync status error: {e}")
+        return Response({"error": "Failed to load sync status"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def sync_quarantine(request):
+    """Payload records the sync validators rejected or stored with blanked fields, newest run first"""
+    try:
+        job = request.GET.get('job', '').strip() or None
+        try:
+            limit = int(request.GET.get('limit', 100))
+        except ValueError:
+            return Response({"error": "limit must be a valid integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, QUARANTINE_LIMIT))
+
+        return Response({"items": get_quarantine(job=job, limit=limit)}, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Sync quarantine error: {e}")
+        return Response({"error": "Failed to load quarantined records"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
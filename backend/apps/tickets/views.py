@@ -0,0 +1,22 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.streaming import StreamLimitReached, streaming_json_response
+from core.queries import GET_ALL_TICKETS
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+def list_tickets(request):
+    """All tickets (GET_ALL_TICKETS) as a streamed JSON array"""
+    try:
+        return streaming_json_response(request, GET_ALL_TICKETS, label='tickets')
+    except StreamLimitReached as e:
+        response = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '5'
+        return response
+    except Exception as e:
+        logger.error(f"List tickets error: {e}")
+        return Response({"error": "Failed to load tickets"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
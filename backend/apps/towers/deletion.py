@@ -0,0 +1,88 @@
+"""
+Bulk cascade delete of institutions and towers.
+Each call removes the requested rows, their towers and detectors, and moves
+the detectors' hist_det rows to hist_det_archive with a single data-modifying
+CTE, so a whole clean-up is one statement in one transaction. The PAD and
+Wieze triggers notify the reference cache on commit; this process drops
+its own entries right away.
+"""
+import logging
+from core.connection import db_cursor
+from core.validators import validate_id
+from core.queries import BULK_DELETE_INSTITUTIONS, BULK_DELETE_TOWERS
+from core.reference_cache import invalidate_tables
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 10000
+
+INSTITUTION_COUNTS = ('towers', 'detectors', 'history_archived')
+TOWER_COUNTS = ('detectors', 'history_archived')
+
+
+def parse_ids(ids, field_name="ids"):
+    """Validate a list of positive integer IDs; returns (sorted unique ids, error)"""
+    if not isinstance(ids, list) or not ids:
+        return None, f"{field_name} must be a non-empty list"
+    if len(ids) > MAX_BATCH_SIZE:
+        return None, f"At most {MAX_BATCH_SIZE} {field_name} per request"
+
+    parsed = set()
+    for value in ids:
+        valid, error = validate_id(value, "id")
+        if not valid or isinstance(value, (bool, float)):
+            return None, f"Invalid id {value!r}: {error or 'id must be a valid integer'}"
+        parsed.add(int(value))
+    return sorted(parsed), None
+
+
+def _bulk_delete(sql, counts, ids, reason, dry_run, tables):
+    with db_cursor() as (cursor, conn):
+        cursor.execute(sql, {'ids': ids, 'reason': reason})
+        columns = [desc[0] for desc in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if dry_run:
+            conn.rollback()
+    if not dry_run:
+        invalidate_tables(*tables)
+
+    totals = {'requested': len(ids), 'deleted': sum(1 for r in results if r['deleted'])}
+    for name in counts:
+        totals[name] = sum(r[name] for r in results)
+    return {'dry_run': dry_run, 'totals': totals, 'results': results}
+
+
+def bulk_delete_institutions(ids, reason=None, dry_run=False):
+    """
+    Delete institutions with their towers and detectors in one statement.
+
+    Args:
+        ids: Validated institution IDs (see parse_ids)
+        reason: Stored with the archived history rows
+        dry_run: Run the statement and roll it back, reporting what would go
+
+    Returns:
+        dict: {"dry_run", "totals", "results"}; one result per ID with
+              "deleted", "towers", "detectors" and "history_archived"
+    """
+    outcome = _bulk_delete(BULK_DELETE_INSTITUTIONS, INSTITUTION_COUNTS, ids, reason, dry_run, ('PAD', 'Wieze'))
+    logger.info(f"Bulk institution delete{' (dry run)' if dry_run else ''}: {outcome['totals']}")
+    return outcome
+
+
+def bulk_delete_towers(ids, reason=None, dry_run=False):
+    """
+    Delete towers with their detectors in one statement.
+
+    Args:
+        ids: Validated tower IDs (see parse_ids)
+        reason: Stored with the archived history rows
+        dry_run: Run the statement and roll it back, reporting what would go
+
+    Returns:
+        dict: {"dry_run", "totals", "results"}; one result per ID with
+              "deleted", "detectors" and "history_archived"
+    """
+    outcome = _bulk_delete(BULK_DELETE_TOWERS, TOWER_COUNTS, ids, reason, dry_run, ('Wieze',))
+    logger.info(f"Bulk tower delete{' (dry run)' if dry_run else ''}: {outcome['totals']}")
+    return outcome
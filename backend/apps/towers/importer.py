@@ -0,0 +1,194 @@
+"""
+Bulk tower import from CSV or JSON.
+Records are streamed into a temporary stage table with COPY, cast and
+checked against PAD, Boxes and the existing towers with a few set-wise
+statements, and upserted into Wieze with one statement, all in a single
+transaction. Every rejected record is reported with its row number (1-based,
+header excluded), column and message.
+"""
+import io
+import csv
+import json
+import itertools
+import logging
+from core.bulk import copy_rows
+from core.connection import db_cursor
+from core.reference_cache import invalidate_tables
+from core.queries import (
+    CREATE_TOWER_IMPORT_STAGE, PREPARE_TOWER_IMPORT_STAGE,
+    VALIDATE_TOWER_IMPORT_STAGE, UPSERT_TOWER_IMPORT_STAGE
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_IMPORT_ROWS = 50000
+
+IMPORT_COLUMNS = (
+    "ID", "Nazwa", "Instytucja_ID", "Wspolrzedne_X", "Wspolrzedne_Y",
+    "Skrypt_od", "Skrypt_do", "Usluga", "Gwarancja", "Serwis", "Wersja_aplikacji",
+    "Instalator", "Instrukcja", "Azymut", "Trasa", "Poziom", "Uwagi", "box"
+)
+REQUIRED_COLUMNS = ("Nazwa",)
+COORDINATE_COLUMNS = ("Wspolrzedne_X", "Wspolrzedne_Y")
+
+MAX_VALUE_LENGTH = 1000
+
+
+class TowerImportError(ValueError):
+    """The file as a whole cannot be imported (bad format, columns or size)"""
+
+
+def check_columns(columns):
+    """Reject unknown columns and files without the required ones"""
+    unknown = [c for c in columns if c not in IMPORT_COLUMNS]
+    if unknown:
+        raise TowerImportError(f"Unknown columns: {', '.join(map(str, unknown))}")
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise TowerImportError(f"Missing columns: {', '.join(missing)}")
+
+
+def iter_csv_records(file):
+    """
+    Records of a CSV file (binary or text) with a header row.
+    The delimiter (comma, semicolon or tab) is taken from the header line.
+    """
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    header = file.readline()
+    if not header.strip():
+        raise TowerImportError("The file is empty")
+    delimiter = max(',;\t', key=header.count)
+    reader = csv.DictReader(itertools.chain([header], file), delimiter=delimiter)
+    reader.fieldnames = [name.strip() for name in reader.fieldnames]
+    check_columns(reader.fieldnames)
+    return _csv_records(reader)
+
+
+def _csv_records(reader):
+    for record in reader:
+        if None in record:
+            yield {'__error__': "Row has more values than the header"}
+        else:
+            yield record
+
+
+def iter_json_records(data):
+    """Records of a decoded JSON document: a list of objects or {"towers": [...]}"""
+    if isinstance(data, dict):
+        data = data.get('towers')
+    if not isinstance(data, list):
+        raise TowerImportError('JSON must be a list of towers or {"towers": [...]}')
+    if len(data) > MAX_IMPORT_ROWS:
+        raise TowerImportError(f"At most {MAX_IMPORT_ROWS} towers per import")
+    columns = set()
+    for record in data:
+        if isinstance(record, dict):
+            columns.update(record)
+    check_columns(sorted(columns) if columns else list(REQUIRED_COLUMNS))
+    return (
+        record if isinstance(record, dict) else {'__error__': "Each tower must be an object"}
+        for record in data
+    )
+
+
+def stage_row(row_number, record):
+    """COPY row for one record; returns (row, error) and stages an empty row on error"""
+    error = record.get('__error__')
+    values = []
+    for column in IMPORT_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, (dict, list)):
+            error = error or f"{column} must be a single value"
+            value = None
+        elif isinstance(value, bool):
+            value = 'TAK' if value else 'NIE'
+        elif value is not None:
+            value = str(value).strip() or None
+        if value is not None and column in COORDINATE_COLUMNS:
+            value = value.replace(',', '.')
+        if value is not None and len(value) > MAX_VALUE_LENGTH:
+            error = error or f"{column} is longer than {MAX_VALUE_LENGTH} characters"
+        values.append(value)
+    if error:
+        return (row_number,) + (None,) * len(IMPORT_COLUMNS), {"row": row_number, "column": None, "message": error}
+    return (row_number, *values), None
+
+
+def import_towers(records, dry_run=False, strict=False):
+    """
+    Upsert towers from an iterable of records (dicts keyed by Wieze columns).
+
+    Args:
+        records: Iterable of dicts, e.g. from iter_csv_records/iter_json_records
+        dry_run: Validate and report, then roll back
+        strict: Import nothing when any record is rejected
+
+    Returns:
+        dict: {"rows", "inserted", "updated", "unchanged", "rejected",
+               "dry_run", "errors": [{"row", "column", "message"}],
+               "results": [{"row", "ID", "status"}]}
+    """
+    format_errors = []
+    truncated = False
+
+    def rows():
+        nonlocal truncated
+        for row_number, record in enumerate(records, start=1):
+            if row_number > MAX_IMPORT_ROWS:
+                truncated = True
+                return
+            row, error = stage_row(row_number, record)
+            if error:
+                format_errors.append(error)
+            yield row
+
+    with db_cursor() as (cursor, conn):
+        cursor.execute(CREATE_TOWER_IMPORT_STAGE)
+        staged = copy_rows(cursor, 'tower_import_stage',
+                           ['row_number'] + [f'"{c}"' for c in IMPORT_COLUMNS], rows())
+        if truncated:
+            raise TowerImportError(f"At most {MAX_IMPORT_ROWS} towers per import")
+        cursor.execute(PREPARE_TOWER_IMPORT_STAGE)
+
+        cursor.execute(VALIDATE_TOWER_IMPORT_STAGE)
+        failed = {e["row"] for e in format_errors}
+        errors = format_errors + [
+            {"row": row_number, "column": column, "message": message}
+            for row_number, column, message in cursor.fetchall()
+            if row_number not in failed
+        ]
+        errors.sort(key=lambda e: e["row"])
+        rejected = sorted({e["row"] for e in errors})
+
+        results = []
+        if not (strict and rejected):
+            cursor.execute(UPSERT_TOWER_IMPORT_STAGE, {'rejected': rejected})
+            results = [{"row": r, "ID": tower_id, "status": s} for r, tower_id, s in cursor.fetchall()]
+        if dry_run or (strict and rejected):
+            conn.rollback()
+    if results and not dry_run:
+        invalidate_tables('Wieze')
+
+    summary = {
+        "rows": staged,
+        "inserted": sum(1 for r in results if r["status"] == "inserted"),
+        "updated": sum(1 for r in results if r["status"] == "updated"),
+        "unchanged": sum(1 for r in results if r["status"] == "unchanged"),
+        "rejected": len(rejected),
+        "dry_run": dry_run,
+    }
+    logger.info(f"Tower import{' (dry run)' if dry_run else ''}: {summary}")
+    return {**summary, "errors": errors, "results": results}
+
+
+def load_records(file, name=None, content_type=None):
+    """Pick the CSV or JSON reader from the file name or content type"""
+    name = (name or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.json') or 'json' in content_type:
+        try:
+            return iter_json_records(json.load(file))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise TowerImportError(f"Invalid JSON: {e}")
+    return iter_csv_records(file)
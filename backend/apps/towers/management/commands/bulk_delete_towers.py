@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.towers.deletion import parse_ids, bulk_delete_institutions, bulk_delete_towers
+
+
+class Command(BaseCommand):
+    help = "Delete towers (or institutions) with their detectors in one transaction, archiving detector history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', default=[], metavar='ID',
+                            help="IDs to delete")
+        parser.add_argument('--file',
+                            help="File with IDs to delete, separated by whitespace or commas")
+        parser.add_argument('--institutions', action='store_true',
+                            help="The IDs are institution IDs; their towers are deleted too")
+        parser.add_argument('--reason', default='bulk clean-up',
+                            help="Stored with the archived history rows")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would be deleted and roll back")
+
+    def handle(self, *args, **options):
+        raw_ids = list(options['ids'])
+        if options['file']:
+            with open(options['file'], 'r', encoding='utf-8') as file:
+                raw_ids += file.read().replace(',', ' ').split()
+
+        ids, error = parse_ids(raw_ids)
+        if error:
+            raise CommandError(error)
+
+        delete = bulk_delete_institutions if options['institutions'] else bulk_delete_towers
+        outcome = delete(ids, reason=options['reason'], dry_run=options['dry_run'])
+
+        missing = [r['id'] for r in outcome['results'] if not r['deleted']]
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Not found: {', '.join(map(str, missing))}"))
+
+        totals = ', '.join(f"{name}={value}" for name, value in outcome['totals'].items())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing deleted: {totals}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted: {totals}"))
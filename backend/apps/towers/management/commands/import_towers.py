@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.towers.importer import TowerImportError, import_towers, load_records
+
+
+class Command(BaseCommand):
+    help = "Insert or update towers from a CSV or JSON file in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (header row, , or ; separated) or JSON file")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Validate and report without saving")
+        parser.add_argument('--strict', action='store_true',
+                            help="Import nothing when any row is rejected")
+        parser.add_argument('--report',
+                            help="Write the full JSON report (errors and per-row results) to this file")
+        parser.add_argument('--show', type=int, default=20,
+                            help="Number of row errors to print")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                records = load_records(file, name=options['path'])
+                report = import_towers(records, dry_run=options['dry_run'], strict=options['strict'])
+        except (TowerImportError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors'][:options['show']]:
+            column = f" {error['column']}" if error['column'] else ""
+            self.stdout.write(f"row {error['row']}{column}: {error['message']}")
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+
+        summary = (f"{report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+                   f"{report['unchanged']} unchanged, {report['rejected']} rejected")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing saved. {summary}"))
+        elif report['rejected'] and options['strict']:
+            raise CommandError(f"Nothing imported. {summary}")
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
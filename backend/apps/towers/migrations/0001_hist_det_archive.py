@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# History of detectors removed by the bulk cascade deletes. Same columns as
+# hist_det (no defaults, so the id keeps its original value) plus when and
+# why the row was archived.
+CREATE_ARCHIVE = """
+CREATE TABLE IF NOT EXISTS hist_det_archive (
+    LIKE hist_det,
+    archived_at timestamptz NOT NULL DEFAULT now(),
+    archive_reason text
+);
+
+CREATE INDEX IF NOT EXISTS hist_det_archive_serial_idx
+    ON hist_det_archive (serial);
+"""
+
+DROP_ARCHIVE = """
+DROP TABLE IF EXISTS hist_det_archive;
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(CREATE_ARCHIVE, DROP_ARCHIVE),
+    ]
@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+
+from .importer import stage_row, IMPORT_COLUMNS, MAX_VALUE_LENGTH
+
+
+def column(row, name):
+    return row[1 + IMPORT_COLUMNS.index(name)]
+
+
+class StageRowTests(SimpleTestCase):
+
+    def test_values_are_normalized(self):
+        row, error = stage_row(2, {
+            'Nazwa': '  Wieza 1 ', 'Uwagi': '   ', 'Usluga': True, 'Serwis': False,
+            'Wspolrzedne_X': '21,0122', 'Wspolrzedne_Y': 52.2297, 'ID': 15,
+        })
+        self.assertIsNone(error)
+        self.assertEqual(row[0], 2)
+        self.assertEqual(len(row), 1 + len(IMPORT_COLUMNS))
+        self.assertEqual(column(row, 'Nazwa'), 'Wieza 1')
+        self.assertIsNone(column(row, 'Uwagi'))
+        self.assertEqual((column(row, 'Usluga'), column(row, 'Serwis')), ('TAK', 'NIE'))
+        self.assertEqual((column(row, 'Wspolrzedne_X'), column(row, 'Wspolrzedne_Y')), ('21.0122', '52.2297'))
+        self.assertEqual(column(row, 'ID'), '15')
+        self.assertIsNone(column(row, 'Trasa'))
+
+    def test_invalid_records_stage_an_empty_row(self):
+        cases = [
+            ({'Nazwa': {'a': 1}}, "Nazwa must be a single value"),
+            ({'Nazwa': 'x', 'Uwagi': ['a']}, "Uwagi must be a single value"),
+            ({'Nazwa': 'x' * (MAX_VALUE_LENGTH + 1)}, f"Nazwa is longer than {MAX_VALUE_LENGTH} characters"),
+            ({'__error__': "Row has more values than the header", 'Nazwa': ['x']},
+             "Row has more values than the header"),
+        ]
+        for record, message in cases:
+            with self.subTest(message=message):
+                row, error = stage_row(7, record)
+                self.assertEqual(row, (7,) + (None,) * len(IMPORT_COLUMNS))
+                self.assertEqual(error, {"row": 7, "column": None, "message": message})
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.list_towers, name='list_towers'),
+    path('<int:tower_id>/', views.tower_detail, name='tower_detail'),
+    path('institutions/', views.list_institutions, name='list_institutions'),
+    path('import/', views.import_towers_view, name='import_towers'),
+    path('bulk-delete/', views.bulk_delete_towers_view, name='bulk_delete_towers'),
+    path('institutions/bulk-delete/', views.bulk_delete_institutions_view, name='bulk_delete_institutions'),
+]
@@ -0,0 +1,131 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from core.validators import validate_string_length, sanitize_input
+from core.reference_cache import get_all_institutions, get_all_towers, get_tower_details
+from .deletion import parse_ids, bulk_delete_institutions, bulk_delete_towers
+from .importer import TowerImportError, import_towers, iter_json_records, load_records
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def parse_bulk_delete_request(data):
+    """Validate {"ids": [...], "reason": str, "dry_run": bool}; returns (ids, reason, dry_run, error)"""
+    if not isinstance(data, dict):
+        return None, None, False, "Request body must be an object"
+
+    ids, error = parse_ids(data.get('ids'))
+    if error:
+        return None, None, False, error
+
+    reason = sanitize_input(data.get('reason'))
+    if reason:
+        valid, error = validate_string_length(reason, "reason", min_length=1, max_length=255)
+        if not valid:
+            return None, None, False, error
+
+    dry_run = data.get('dry_run', False)
+    if not isinstance(dry_run, bool):
+        return None, None, False, "dry_run must be a boolean"
+    return ids, reason or None, dry_run, None
+
+
+@api_view(['GET'])
+def list_towers(request):
+    """All towers (GET_ALL_TOWERS), served from the reference cache"""
+    try:
+        return Response(get_all_towers())
+
+    except Exception as e:
+        logger.error(f"List towers error: {e}")
+        return Response({"error": "Failed to load towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def tower_detail(request, tower_id):
+    """One tower with its institution name and box, served from the reference cache"""
+    try:
+        tower = get_tower_details(tower_id)
+        if tower is None:
+            return Response({"error": "Tower not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(tower)
+
+    except Exception as e:
+        logger.error(f"Tower detail error: {e}")
+        return Response({"error": "Failed to load tower"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def list_institutions(request):
+    """All institutions (GET_ALL_INSTITUTIONS), served from the reference cache"""
+    try:
+        return Response(get_all_institutions())
+
+    except Exception as e:
+        logger.error(f"List institutions error: {e}")
+        return Response({"error": "Failed to load institutions"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def bulk_delete_towers_view(request):
+    """Delete many towers with their detectors; detector history is archived"""
+    try:
+        ids, reason, dry_run, error = parse_bulk_delete_request(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Bulk tower delete of {len(ids)} towers requested by {request.user.username}")
+        return Response(bulk_delete_towers(ids, reason=reason, dry_run=dry_run))
+
+    except Exception as e:
+        logger.error(f"Bulk tower delete error: {e}")
+        return Response({"error": "Failed to delete towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def bulk_delete_institutions_view(request):
+    """Delete many institutions with their towers and detectors; detector history is archived"""
+    try:
+        ids, reason, dry_run, error = parse_bulk_delete_request(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Bulk institution delete of {len(ids)} institutions requested by {request.user.username}")
+        return Response(bulk_delete_institutions(ids, reason=reason, dry_run=dry_run))
+
+    except Exception as e:
+        logger.error(f"Bulk institution delete error: {e}")
+        return Response({"error": "Failed to delete institutions"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def import_towers_view(request):
+    """
+    Upsert many towers from an uploaded CSV/JSON file ("file" form field) or
+    a JSON body; ?dry_run=1 validates only, ?strict=1 imports nothing when
+    any row is rejected.
+    """
+    try:
+        dry_run = request.GET.get('dry_run', '').lower() in TRUE_VALUES
+        strict = request.GET.get('strict', '').lower() in TRUE_VALUES
+
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                records = load_records(upload.file, name=upload.name, content_type=upload.content_type)
+            else:
+                records = iter_json_records(request.data)
+            report = import_towers(records, dry_run=dry_run, strict=strict)
+        except (TowerImportError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"Tower import{' (dry run)' if dry_run else ''} by {request.user.username}: "
+                    f"{report['inserted']} inserted, {report['updated']} updated, {report['rejected']} rejected")
+
+        return Response(report)
+
+    except Exception as e:
+        logger.error(f"Tower import error: {e}")
+        return Response({"error": "Failed to import towers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the backend.
+Run modules from the backend directory, e.g. ``python -m benchmarks.auth_overhead``.
+"""
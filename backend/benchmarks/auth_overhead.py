@@ -0,0 +1,65 @@
+"""
+Microbenchmark of per-request authentication overhead.
+
+Compares the previous double jwt.decode path of verify_token with the
+single-decode verifier, both cold (cache cleared) and warm (cached claims),
+and times JWTAuthentication.authenticate end to end.
+
+Usage: python -m benchmarks.auth_overhead [--iterations N]
+"""
+import os
+import argparse
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import jwt
+from django.conf import settings
+from django.test import RequestFactory
+from apps.authentication.jwt_auth import JWTAuthentication, create_jwt_token
+from apps.authentication.tokens import TokenVerifier
+
+
+def legacy_double_decode(token):
+    jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+
+
+def per_call_us(func, iterations):
+    return timeit.timeit(func, number=iterations) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_jwt_token('benchmark')
+    verifier = TokenVerifier(settings.SECRET_KEY)
+
+    def cold():
+        verifier.clear()
+        verifier.verify(token)
+
+    request = RequestFactory().get('/api/auth/verify/')
+    request.COOKIES['token'] = token
+    authentication = JWTAuthentication()
+
+    results = {
+        'legacy_double_decode': per_call_us(lambda: legacy_double_decode(token), args.iterations),
+        'verifier_cold': per_call_us(cold, args.iterations),
+        'verifier_cached': per_call_us(lambda: verifier.verify(token), args.iterations),
+        'authenticate_cached': per_call_us(lambda: authentication.authenticate(request), args.iterations),
+    }
+
+    print(f"{'path':<24}{'us/request':>12}")
+    for name, value in results.items():
+        print(f"{name:<24}{value:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Seeded synthetic data for the benchmark database.
+
+BASE_COUNTS approximates today's production size; ``scale`` multiplies it
+(1, 10 and 100 are the presets used by the suite). The same seed and scale
+always produce the same rows, so runs on different machines or commits are
+comparable. Rows are streamed into the tables with COPY.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from core.bulk import copy_rows
+
+SCALES = (1, 10, 100)
+
+# Rows per table at scale 1
+BASE_COUNTS = {
+    'PAD': 430,
+    'Wieze': 900,
+    'Detektory': 2500,
+    'hist_det': 40000,
+    'Pracownicy': 25,
+    'Zgloszenia': 5000,
+    'Umowy': 300,
+    'Rejestr_Kamer': 2500,
+}
+
+# Reference-style tables that do not grow with the device fleet
+FIXED_TABLES = {'Pracownicy'}
+
+# Rough bounding box of Poland, (lon, lat)
+MIN_X, MAX_X = 14.1, 24.1
+MIN_Y, MAX_Y = 49.0, 54.8
+
+HIST_DET_TYPES = ('dodanie', 'zmiana', 'serwis', 'usuniecie')
+HIST_DET_FLAGS = (
+    'slack', 'nazwa', 'pokrycie', 'parametry', 'azymut', 'horyzont', 'boxy', 'boxystare',
+    'desktop', 'winbox', 'monday', 'usluga', 'upublicznienie', 'sponsor', 'priv', 'skrypt'
+)
+TICKET_STATUSES = ('nowe', 'w toku', 'zamkniete')
+TICKET_PRIORITIES = ('niski', 'sredni', 'wysoki')
+HARDWARE_STATUSES = ('zainstalowana', 'magazyn', 'serwis')
+SERIAL_BASE = 100000
+BOX_SERIAL_BASE = 500000
+START_DATE = date(2020, 1, 1)
+
+
+@dataclass
+class Dataset:
+    """Keys of the generated rows, used by query cases and API fixtures"""
+    scale: float
+    seed: int
+    counts: dict = field(default_factory=dict)
+    institution_ids: list = field(default_factory=list)
+    institution_names: list = field(default_factory=list)
+    tower_ids: list = field(default_factory=list)
+    box_serials: list = field(default_factory=list)
+    detector_serials: list = field(default_factory=list)
+    hist_det_ids: list = field(default_factory=list)
+    hardware_serials: list = field(default_factory=list)
+
+
+def scaled_counts(scale):
+    return {
+        table: count if table in FIXED_TABLES else max(1, int(count * scale))
+        for table, count in BASE_COUNTS.items()
+    }
+
+
+def _ip(rng, prefix):
+    return f"{prefix}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def _mac(rng):
+    return ':'.join(f"{rng.randint(0, 255):02x}" for _ in range(6))
+
+
+def _day(rng, span_days=2000):
+    return START_DATE + timedelta(days=rng.randrange(span_days))
+
+
+def institution_rows(rng, count):
+    for i in range(1, count + 1):
+        yield (
+            i, f"Nadlesnictwo {i:04d}", f"ul. Lesna {i}, 00-{i % 1000:03d}",
+            rng.uniform(MIN_X, MAX_X), rng.uniform(MIN_Y, MAX_Y),
+            f"RDLP {1 + i % 17}", f"R{i}", f"L{i}", f"{rng.randint(100000000, 999999999)}",
+            f"+48 {rng.randint(500000000, 899999999)}"
+        )
+
+
+def box_rows(rng, serials):
+    for serial in serials:
+        yield serial, _ip(rng, '10.8'), _ip(rng, '192.168'), _mac(rng)
+
+
+def tower_rows(rng, count, institution_count, box_serials):
+    for i in range(1, count + 1):
+        box = box_serials[i - 1] if i <= len(box_serials) and rng.random() < 0.9 else None
+        yield (
+            i, f"Wieza {i:05d}", rng.randint(1, institution_count),
+            rng.uniform(MIN_X, MAX_X), rng.uniform(MIN_Y, MAX_Y),
+            '06:00', '21:00', rng.choice(('TAK', 'NIE')), rng.choice(('2025', '2026', '2027')),
+            rng.choice(('TAK', 'NIE')), f"3.{rng.randint(0, 9)}.{rng.randint(0, 20)}",
+            f"Instalator {rng.randint(1, 12)}", None, str(rng.randint(0, 359)),
+            None, str(rng.randint(20, 60)), None, box
+        )
+
+
+def detector_rows(rng, serials, tower_count):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for serial in serials:
+        tower_id = rng.randint(1, tower_count) if rng.random() < 0.95 else None
+        name = f"Wieza {tower_id:05d}_{serial}" if tower_id else None
+        live_view = now - timedelta(seconds=rng.randrange(86400 * 30)) if rng.random() < 0.9 else None
+        yield serial, tower_id, name, live_view
+
+
+def hist_det_rows(rng, count, serials, tower_count):
+    for i in range(1, count + 1):
+        flags = tuple(rng.random() < 0.7 for _ in HIST_DET_FLAGS)
+        slack, nazwa, *rest = flags
+        yield (
+            i, rng.choice(serials), rng.choice(HIST_DET_TYPES), rng.randint(1, tower_count),
+            _day(rng), time(rng.randrange(24), rng.randrange(60), rng.randrange(60)),
+            slack, nazwa, None, *rest[:5], None, *rest[5:]
+        )
+
+
+HIST_DET_COLUMNS = (
+    'id', 'serial', 'typ', 'id_wiezy', 'data', 'godzina', 'slack', 'nazwa', 'nazwastara',
+    'pokrycie', 'parametry', 'azymut', 'horyzont', 'boxy', 'dziennik', 'boxystare', 'desktop',
+    'winbox', 'monday', 'usluga', 'upublicznienie', 'sponsor', 'priv', 'skrypt'
+)
+
+
+def ticket_rows(rng, count, tower_count, employee_count):
+    for i in range(1, count + 1):
+        yield (
+            i, f"Zgloszenie {i}",
+            datetime(2021, 1, 1) + timedelta(minutes=rng.randrange(60 * 24 * 1800)),
+            rng.randint(1, tower_count), rng.randint(1, employee_count), rng.randint(1, employee_count),
+            rng.choice(TICKET_STATUSES), rng.choice(TICKET_PRIORITIES),
+            rng.choice(('kamera', 'box', 'siec', 'inne')), None
+        )
+
+
+def contract_rows(rng, count, institution_names):
+    for i in range(1, count + 1):
+        start = _day(rng)
+        yield (
+            i, rng.choice(institution_names), rng.choice(('serwis', 'licencja', 'dzierzawa')),
+            rng.choice(('bezposrednio', 'partner')), start, start + timedelta(days=365 * rng.randint(1, 4)),
+            None, None
+        )
+
+
+def hardware_record(rng, serial, tower_count):
+    """One Rejestr_Kamer record, in the shape map_item_to_record() returns"""
+    return {
+        'serial': serial,
+        'nadlesnictwo': f"Nadlesnictwo {rng.randint(1, 430):04d}",
+        'wieza': f"Wieza {rng.randint(1, tower_count):05d}",
+        'status': rng.choice(HARDWARE_STATUSES),
+        'instalator': f"Instalator {rng.randint(1, 12)}",
+        'czas_start': str(_day(rng)),
+        'czas_end': '',
+        'data_produkcji': str(_day(rng)),
+        'obudowa': rng.choice(('A1', 'A2', 'B1')),
+        'enkoder_katow': rng.choice(('EK1', 'EK2')),
+        'enkoder_obrazu': rng.choice(('EO1', 'EO2')),
+        'driver_silnika': rng.choice(('D1', 'D2')),
+        'procesor': rng.choice(('P1', 'P2')),
+        'modul': rng.choice(('M1', 'M2')),
+        'gniazdo_glowicy': None,
+        'data_firmware': str(_day(rng)),
+        'wylacznik_glowicy': rng.choice(('TAK', 'NIE')),
+        'adres': f"ul. Lesna {rng.randint(1, 200)}",
+        'ip_enkodera': _ip(rng, '10.20'),
+        'kanal_ch': str(rng.randint(1, 16)),
+        'ip_moxy': _ip(rng, '10.30'),
+        'uwagi': '',
+    }
+
+
+def build_dataset(scale=1, seed=42):
+    """
+    Keys of the data set for a scale; they do not depend on the random
+    stream, so a database loaded earlier can be benchmarked again.
+    """
+    counts = scaled_counts(scale)
+    return Dataset(
+        scale=scale,
+        seed=seed,
+        counts=counts,
+        institution_ids=list(range(1, counts['PAD'] + 1)),
+        institution_names=[f"Nadlesnictwo {i:04d}" for i in range(1, counts['PAD'] + 1)],
+        tower_ids=list(range(1, counts['Wieze'] + 1)),
+        box_serials=[BOX_SERIAL_BASE + i for i in range(counts['Wieze'])],
+        detector_serials=[str(SERIAL_BASE + i) for i in range(counts['Detektory'])],
+        hist_det_ids=list(range(1, counts['hist_det'] + 1)),
+        hardware_serials=[SERIAL_BASE + i for i in range(counts['Rejestr_Kamer'])],
+    )
+
+
+def generate(cursor, scale=1, seed=42):
+    """
+    Load the synthetic data set into empty tables created from schema.sql.
+
+    Returns:
+        Dataset: Keys of the generated rows
+    """
+    # Imported here so the generator itself does not need Django settings
+    from external.monday_api import HARDWARE_COLUMNS, hardware_row
+
+    rng = random.Random(seed)
+    dataset = build_dataset(scale, seed)
+    counts = dataset.counts
+
+    copy_rows(cursor, '"PAD"', ('"ID"', '"Nazwa"', '"Adres"', '"Wspolrzedne_X"', '"Wspolrzedne_Y"',
+                                '"RDLP"', '"R_PAD"', '"L_PAD"', '"Teamviewer"', '"Nr_kontaktowy"'),
+              institution_rows(rng, counts['PAD']))
+    copy_rows(cursor, '"Boxes"', ('"serial"', '"openvpn_ip"', '"local_ip"', '"mac_address"'),
+              box_rows(rng, dataset.box_serials))
+    copy_rows(cursor, '"Wieze"', (
+        '"ID"', '"Nazwa"', '"Instytucja_ID"', '"Wspolrzedne_X"', '"Wspolrzedne_Y"', '"Skrypt_od"',
+        '"Skrypt_do"', '"Usluga"', '"Gwarancja"', '"Serwis"', '"Wersja_aplikacji"', '"Instalator"',
+        '"Instrukcja"', '"Azymut"', '"Trasa"', '"Poziom"', '"Uwagi"', '"box"'
+    ), tower_rows(rng, counts['Wieze'], counts['PAD'], dataset.box_serials))
+    copy_rows(cursor, '"Detektory"', ('"serial"', '"Wieza_ID"', '"name"', '"live_view_updated_at"'),
+              detector_rows(rng, dataset.detector_serials, counts['Wieze']))
+    copy_rows(cursor, 'hist_det', HIST_DET_COLUMNS,
+              hist_det_rows(rng, counts['hist_det'], dataset.detector_serials, counts['Wieze']))
+    copy_rows(cursor, '"Pracownicy"', ('id', 'nazwa'),
+              ((i, f"Pracownik {i}") for i in range(1, counts['Pracownicy'] + 1)))
+    copy_rows(cursor, '"Zgloszenia"', (
+        'id', 'tytul', 'data_godzina', 'id_wiezy', 'autor', 'oznaczeni', 'status', 'priorytet',
+        'kategoria', 'komentarze'
+    ), ticket_rows(rng, counts['Zgloszenia'], counts['Wieze'], counts['Pracownicy']))
+    copy_rows(cursor, '"Umowy"', (
+        'id', 'instytucja', 'typ', 'skad_sprzedane', 'data_rozpoczecia', 'data_zakonczenia',
+        'zalacznik_umowy', 'uwagi'
+    ), contract_rows(rng, counts['Umowy'], dataset.institution_names))
+    copy_rows(cursor, '"Rejestr_Kamer"', HARDWARE_COLUMNS, (
+        hardware_row(hardware_record(rng, serial, counts['Wieze'])) for serial in dataset.hardware_serials
+    ))
+
+    # Explicit ids were copied, so move the sequences past them
+    for table, column in (('"PAD"', 'ID'), ('"Wieze"', 'ID'), ('hist_det', 'id'), ('"Pracownicy"', 'id'),
+                          ('"Zgloszenia"', 'id'), ('"Umowy"', 'id'), ('"Rejestr_Kamer"', 'id')):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+            f"(SELECT COALESCE(MAX(\"{column}\"), 0) + 1 FROM {table}), false)"
+        )
+    return dataset
@@ -0,0 +1,243 @@
+"""
+Local stand-in for the SmokeD and Monday.com APIs.
+
+Serves ``/login``, ``/camera/list`` and ``/box/list`` under any prefix, and
+answers Monday.com GraphQL POSTs with the items_page / next_items_page
+shapes MondayClient pages through. Device count, page size, latency, 429
+and 5xx rates and token lifetime are configurable, so sync throughput and
+the retry paths of create_session() and MondayClient can be exercised at
+10k-100k devices without touching the real services.
+
+Serve only (point the app at it with SMOKED_API_URL / MONDAY_API_URL):
+    python -m benchmarks.fake_api --devices 100000 --port 8765
+
+Serve and time the syncs against it (writes to the configured database):
+    python -m benchmarks.fake_api --devices 50000 --rate-5xx 0.02 --measure
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import jwt
+from .datagen import SERIAL_BASE, BOX_SERIAL_BASE
+from .fixtures import camera_records, box_records, monday_items, monday_page, monday_offset, FIXTURE_TOKEN_SECRET
+
+SERVER_ERRORS = (500, 502, 503, 504)
+
+
+@dataclass
+class FakeAPIConfig:
+    devices: int = 10000
+    boxes: int | None = None
+    page_size: int = 500
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: float = 1.0
+    token_ttl: float = 3600.0
+    seed: int = 42
+
+
+class FakeAPIState:
+    """Pre-rendered payloads and request counters shared by handler threads"""
+
+    def __init__(self, config):
+        self.config = config
+        rng = random.Random(config.seed)
+        box_count = config.boxes if config.boxes is not None else config.devices
+        self.cameras_body = json.dumps(
+            {'data': camera_records(rng, range(SERIAL_BASE, SERIAL_BASE + config.devices))}
+        ).encode('utf-8')
+        self.boxes_body = json.dumps(
+            {'data': box_records(rng, range(BOX_SERIAL_BASE, BOX_SERIAL_BASE + box_count))}
+        ).encode('utf-8')
+        self.items = monday_items(rng, range(SERIAL_BASE, SERIAL_BASE + config.devices),
+                                  max(1, config.devices // 3))
+        self._fault_rng = random.Random(config.seed + 1)
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def draw_fault(self):
+        """Status code of an injected failure, or None"""
+        with self._lock:
+            roll = self._fault_rng.random()
+            if roll < self.config.rate_429:
+                return 429
+            if roll < self.config.rate_429 + self.config.rate_5xx:
+                return self._fault_rng.choice(SERVER_ERRORS)
+        return None
+
+    def issue_token(self):
+        now = time.time()
+        return jwt.encode({'sub': 'fake-api', 'iat': int(now), 'exp': now + self.config.token_ttl},
+                          FIXTURE_TOKEN_SECRET, algorithm='HS256')
+
+    def token_valid(self, header):
+        token = header.removeprefix('Bearer ').strip()
+        try:
+            jwt.decode(token, FIXTURE_TOKEN_SECRET, algorithms=['HS256'])
+            return True
+        except jwt.InvalidTokenError:
+            return False
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeSmokeDMonday/1.0'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if not (path.endswith('/camera/list') or path.endswith('/box/list')):
+            return self._send(404, {'error': 'not found'})
+        if self._inject():
+            return
+        if not self.state.token_valid(self.headers.get('Authorization', '')):
+            self.state.count('401')
+            return self._send(401, {'error': 'token expired or invalid'})
+        self.state.count(path.rsplit('/', 2)[-2])
+        body = self.state.cameras_body if path.endswith('/camera/list') else self.state.boxes_body
+        self._send_bytes(200, body)
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self._inject():
+            return
+
+        if path.endswith('/login'):
+            self.state.count('login')
+            return self._send(200, {'token': self.state.issue_token()})
+
+        # Anything else is treated as the Monday.com GraphQL endpoint
+        self.state.count('monday')
+        offset, first_page = monday_offset(body)
+        self._send(200, monday_page(self.state.items, offset, self.state.config.page_size, first_page))
+
+    def _inject(self):
+        """Apply latency and maybe answer with an injected failure"""
+        config = self.state.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+        status = self.state.draw_fault()
+        if status is None:
+            return False
+        self.state.count(str(status))
+        headers = {'Retry-After': f"{config.retry_after:g}"} if status == 429 else {}
+        self._send(status, {'error': 'injected failure', 'status': status}, headers)
+        return True
+
+    def _send(self, status, payload, headers=None):
+        self._send_bytes(status, json.dumps(payload).encode('utf-8'), headers)
+
+    def _send_bytes(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Start the fake API on a background thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), FakeAPIHandler)
+    server.daemon_threads = True
+    server.state = FakeAPIState(config)
+    threading.Thread(target=server.serve_forever, name='fake-api', daemon=True).start()
+    return server
+
+
+def measure():
+    """Time the syncs against the fake API; the app settings must already point at it"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+    from external import smoke_api, monday_api
+    from .fixtures import use_hardware_query_fallback
+
+    use_hardware_query_fallback()
+    runs = (
+        ('sync_detectors_and_live_view', lambda: smoke_api.sync_detectors_and_live_view(mode='merge')),
+        ('sync_boxes_to_db', lambda: smoke_api.sync_boxes_to_db(mode='merge')),
+        ('get_monday_hardware', monday_api.get_monday_hardware),
+    )
+    results = {}
+    for name, run in runs:
+        start = time.perf_counter()
+        try:
+            outcome = run()
+            summary = len(outcome) if isinstance(outcome, list) else outcome
+            results[name] = {'seconds': round(time.perf_counter() - start, 3), 'result': summary}
+        except Exception as e:
+            results[name] = {'seconds': round(time.perf_counter() - start, 3), 'error': f"{type(e).__name__}: {e}"}
+    results['smoked_logins'] = smoke_api.smoked_token_provider.logins
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--devices', type=int, default=FakeAPIConfig.devices, help='cameras and Monday items')
+    parser.add_argument('--boxes', type=int, help='boxes (default: same as --devices)')
+    parser.add_argument('--page-size', type=int, default=FakeAPIConfig.page_size, help='Monday items per page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra latency, up to this many seconds')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='share of requests answered with 5xx')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After sent with 429')
+    parser.add_argument('--token-ttl', type=float, default=3600.0, help='lifetime of issued tokens, seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--measure', action='store_true', help='run the syncs against the server and exit')
+    args = parser.parse_args()
+
+    config = FakeAPIConfig(
+        devices=args.devices, boxes=args.boxes, page_size=args.page_size, latency=args.latency,
+        jitter=args.jitter, rate_429=args.rate_429, rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after, token_ttl=args.token_ttl, seed=args.seed,
+    )
+    server = start_server(config, args.host, args.port)
+    host, port = server.server_address[:2]
+    base_url = f"http://{host}:{port}"
+    print(f"Fake SmokeD/Monday API on {base_url} ({config.devices} devices)")
+    print(f"  SMOKED_API_URL={base_url}/api/v3 MONDAY_API_URL={base_url}/v2")
+
+    if args.measure:
+        # Must be set before Django settings and monday_api are imported
+        os.environ['SMOKED_API_URL'] = f"{base_url}/api/v3"
+        os.environ['MONDAY_API_URL'] = f"{base_url}/v2"
+        results = measure()
+        results['server_requests'] = dict(server.state.counters)
+        print(json.dumps(results, indent=2, default=str))
+        server.shutdown()
+        sys.exit(0 if not any('error' in r for r in results.values() if isinstance(r, dict)) else 1)
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
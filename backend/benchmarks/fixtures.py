@@ -0,0 +1,226 @@
+"""
+Recorded SmokeD and Monday.com responses for the sync benchmarks.
+
+Payloads are derived from the same seed and scale as the database, with a
+fraction of devices changed or new, so the merge syncs have real work to
+do. They are recorded to JSON once and replayed through a requests
+transport adapter mounted on the sessions the sync code already uses, so
+no network is involved and every run sees identical responses.
+"""
+import os
+import json
+import time
+import random
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+import jwt
+import requests
+from requests.adapters import BaseAdapter
+from .datagen import BOX_SERIAL_BASE, SERIAL_BASE, hardware_record, _ip, _mac
+
+# Share of devices whose API record differs from the database, and new devices
+CHANGED_FRACTION = 0.1
+NEW_FRACTION = 0.01
+MONDAY_PAGE_SIZE = 500
+FIXTURE_TOKEN_SECRET = 'benchmark-fixtures'
+FIXTURE_NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+HARDWARE_QUERY_FALLBACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hardware.graphql')
+
+# map_item_to_record() column ids, in HARDWARE_COLUMNS naming
+MONDAY_COLUMN_IDS = {
+    'nadlesnictwo': 'tekst__1',
+    'wieza': 'tekst7__1',
+    'status': 'status9',
+    'instalator': 'status_1__1',
+    'data_produkcji': 'data',
+    'obudowa': 'label8__1',
+    'enkoder_katow': 'label3__1',
+    'enkoder_obrazu': 'label0__1',
+    'driver_silnika': 'label6__1',
+    'procesor': 'label5__1',
+    'modul': 'label7__1',
+    'data_firmware': 'data6__1',
+    'wylacznik_glowicy': 'sprawd___1',
+    'adres': 'tekst_mknaq1qa',
+    'ip_enkodera': 'tekst_mknat611',
+    'kanal_ch': 'tekst_mknawgmc',
+    'ip_moxy': 'tekst_mknaz218',
+    'uwagi': 'tekst8__1',
+}
+
+
+def _changed_then_new(rng, existing, new_start):
+    """Existing keys plus NEW_FRACTION new ones; returns (keys, changed set)"""
+    changed = {key for key in existing if rng.random() < CHANGED_FRACTION}
+    new = [new_start + i for i in range(max(1, int(len(existing) * NEW_FRACTION)))]
+    return list(existing) + new, changed
+
+
+def camera_records(rng, serials, now=FIXTURE_NOW):
+    """SmokeD /camera/list items; serials are zero-padded like the real API"""
+    return [
+        {'serial': f"{serial:08d}", 'live_view_updated_at': (now + timedelta(seconds=rng.randrange(3600))).isoformat()}
+        for serial in serials
+    ]
+
+
+def box_records(rng, serials, changed=None):
+    """SmokeD /box/list items; boxes in ``changed`` get a new VPN address"""
+    return [
+        {
+            'serial': f"{serial:08d}",
+            'openvpn_ip': _ip(rng, '10.9') if changed is None or serial in changed else None,
+            'local_ip': _ip(rng, '192.168'),
+            'mac_address': _mac(rng),
+        }
+        for serial in serials
+    ]
+
+
+def monday_items(rng, serials, tower_count):
+    """Monday.com hardware board items in the shape map_item_to_record() reads"""
+    items = []
+    for serial in serials:
+        record = hardware_record(rng, serial, tower_count)
+        items.append({
+            'id': str(9000000000 + serial),
+            'name': f"{serial:08d}",
+            'column_values': [
+                {'id': column_id, 'text': record.get(column) or '', 'value': None}
+                for column, column_id in MONDAY_COLUMN_IDS.items()
+            ],
+        })
+    return items
+
+
+def build_fixtures(dataset, seed=None):
+    """
+    Build SmokeD camera/box lists and Monday hardware items for a dataset.
+
+    Returns:
+        dict: cameras, boxes, monday_items
+    """
+    rng = random.Random(dataset.seed if seed is None else seed)
+
+    existing = [int(s) for s in dataset.detector_serials]
+    serials, _ = _changed_then_new(rng, existing, SERIAL_BASE + len(existing))
+    box_serials, changed_boxes = _changed_then_new(rng, dataset.box_serials, BOX_SERIAL_BASE + len(dataset.box_serials))
+    hardware_serials, _ = _changed_then_new(
+        rng, dataset.hardware_serials, SERIAL_BASE + len(dataset.hardware_serials)
+    )
+    return {
+        'cameras': camera_records(rng, serials),
+        'boxes': box_records(rng, box_serials, changed_boxes),
+        'monday_items': monday_items(rng, hardware_serials, dataset.counts['Wieze']),
+    }
+
+
+def record_fixtures(path, fixtures):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(fixtures, file)
+
+
+def load_fixtures(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def smoked_token(ttl, secret=FIXTURE_TOKEN_SECRET):
+    """A SmokeD-style JWT; SmokedTokenProvider only reads its exp"""
+    now = int(time.time())
+    return jwt.encode({'sub': 'benchmark', 'iat': now, 'exp': now + int(ttl)}, secret, algorithm='HS256')
+
+
+def monday_page(items, offset, page_size, first_page):
+    """
+    One Monday.com GraphQL response with ``page_size`` items from ``offset``.
+    The first page has the boards/groups/items_page shape of the .graphql
+    files, later ones the next_items_page shape of NEXT_ITEMS_PAGE_QUERY.
+    """
+    end = offset + page_size
+    page = {
+        'cursor': f"page-{end}" if end < len(items) else None,
+        'items': items[offset:end],
+    }
+    data = {'complexity': {'query': 1000, 'after': 9000000, 'reset_in_x_seconds': 60}}
+    if first_page:
+        data['boards'] = [{'groups': [{'items_page': page}]}]
+    else:
+        data['next_items_page'] = page
+    return {'data': data}
+
+
+def monday_offset(body):
+    """Item offset requested by a Monday.com GraphQL request body"""
+    cursor = (body.get('variables') or {}).get('cursor')
+    if not cursor:
+        return 0, True
+    return int(cursor.split('-', 1)[1]), False
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport that answers SmokeD and Monday.com calls from fixtures"""
+
+    def __init__(self, fixtures, login_url, detectors_url, boxes_url, monday_url,
+                 page_size=MONDAY_PAGE_SIZE, token_ttl=3600):
+        super().__init__()
+        self.fixtures = fixtures
+        self.page_size = page_size
+        self.token_ttl = token_ttl
+        self.routes = {
+            urlsplit(login_url).path: self._login,
+            urlsplit(detectors_url).path: lambda request: {'data': self.fixtures['cameras']},
+            urlsplit(boxes_url).path: lambda request: {'data': self.fixtures['boxes']},
+            urlsplit(monday_url).path: self._monday,
+        }
+        self.requests_served = 0
+
+    def send(self, request, **kwargs):
+        handler = self.routes.get(urlsplit(request.url).path)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers['Content-Type'] = 'application/json'
+        if handler is None:
+            response.status_code = 404
+            response._content = b'{"error": "no fixture for this URL"}'
+        else:
+            response.status_code = 200
+            response._content = json.dumps(handler(request)).encode('utf-8')
+        self.requests_served += 1
+        return response
+
+    def close(self):
+        pass
+
+    def _login(self, request):
+        return {'token': smoked_token(self.token_ttl)}
+
+    def _monday(self, request):
+        offset, first_page = monday_offset(json.loads(request.body or b'{}'))
+        return monday_page(self.fixtures['monday_items'], offset, self.page_size, first_page)
+
+
+def install_fixture_adapter(fixtures):
+    """
+    Mount a FixtureAdapter on the SmokeD and Monday.com sessions for the
+    configured API URLs and drop any cached SmokeD token.
+    """
+    from django.conf import settings
+    from external import smoke_api, monday_api
+
+    adapter = FixtureAdapter(fixtures, settings.LOGIN_URL, settings.DETECTORS_URL,
+                             settings.BOXES_URL, monday_api.MONDAY_API_URL)
+    for url in (settings.LOGIN_URL, settings.DETECTORS_URL, settings.BOXES_URL):
+        smoke_api.api_session.mount(url, adapter)
+    monday_api.monday_session.mount(monday_api.MONDAY_API_URL, adapter)
+    smoke_api.smoked_token_provider.invalidate()
+    return adapter
+
+
+def use_hardware_query_fallback():
+    """Point the Monday hardware sync at benchmarks/hardware.graphql when the app's query file is absent"""
+    from external import monday_api
+
+    if not os.path.exists(monday_api.HARDWARE_QUERY_PATH):
+        monday_api.HARDWARE_QUERY_PATH = HARDWARE_QUERY_FALLBACK
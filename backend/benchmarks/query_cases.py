@@ -0,0 +1,262 @@
+"""
+One benchmark case per SQL constant in core/queries.py.
+
+A case is a function ``case(cursor, dataset, rng)`` that executes the
+statement (and fetches its rows) with parameters drawn from the synthetic
+data set. The runner wraps every call in a transaction that is rolled back,
+so write statements can be timed without changing the data. Constants that
+are only fragments of another statement are listed in COVERED_BY instead.
+"""
+from datetime import date, datetime, timezone
+from psycopg2.extras import Json, execute_values
+from core import queries
+from core.bulk import copy_rows
+from apps.detectors.history import build_history_query
+from apps.towers.importer import IMPORT_COLUMNS, stage_row
+from external.monday_api import HARDWARE_COLUMNS, hardware_row
+from .datagen import hardware_record
+
+QUERY_CASES = {}
+
+# Fragments and templates -> the case that exercises them
+COVERED_BY = {
+    'UPDATE_DETECTOR_FLAG_BATCH_TEMPLATE': 'UPDATE_DETECTOR_FLAG_BATCH_QUERIES',
+    'DETECTOR_HISTORY_FILTERS': 'GET_DETECTOR_HISTORY_KEYSET',
+    'HISTORY_PAGE_LIMIT': 'GET_DETECTOR_HISTORY_KEYSET',
+    'CREATE_DETECTORS_STAGE': 'MERGE_DETECTORS_STAGE',
+    'CREATE_BOXES_STAGE': 'MERGE_BOXES_STAGE',
+    'CREATE_HARDWARE_STAGE': 'MERGE_HARDWARE_STAGE',
+    'CREATE_TOWER_IMPORT_STAGE': 'UPSERT_TOWER_IMPORT_STAGE',
+    'PREPARE_TOWER_IMPORT_STAGE': 'UPSERT_TOWER_IMPORT_STAGE',
+    'VALIDATE_TOWER_IMPORT_STAGE': 'UPSERT_TOWER_IMPORT_STAGE',
+}
+
+TOWER_VALUES = (
+    'Wieza benchmark', 1, 19.0, 52.0, '06:00', '21:00', 'TAK', '2026', 'TAK', '3.1.0',
+    'Instalator 1', None, '90', None, '40', None, None
+)
+
+
+def case(name):
+    def register(func):
+        QUERY_CASES[name] = func
+        return func
+    return register
+
+
+def statement(name, params=lambda ds, rng: None):
+    """Register a case that executes core.queries.<name> once"""
+    sql = getattr(queries, name)
+
+    def run(cursor, ds, rng):
+        cursor.execute(sql, params(ds, rng))
+        if cursor.description is not None:
+            cursor.fetchall()
+    QUERY_CASES[name] = run
+
+
+def serial(ds, rng):
+    return rng.choice(ds.detector_serials)
+
+
+def tower(ds, rng):
+    return rng.choice(ds.tower_ids)
+
+
+def institution(ds, rng):
+    return rng.choice(ds.institution_ids)
+
+
+def history_id(ds, rng):
+    return rng.choice(ds.hist_det_ids)
+
+
+# Institutions
+statement('GET_ALL_INSTITUTIONS')
+statement('INSERT_INSTITUTION', lambda ds, rng: (
+    'Nadlesnictwo benchmark', 'ul. Testowa 1', 19.0, 52.0, 'RDLP 1', 'R', 'L', '123', '+48 500000000'))
+statement('UPDATE_INSTITUTION', lambda ds, rng: ('Nadlesnictwo zmienione', institution(ds, rng)))
+statement('DELETE_INSTITUTION', lambda ds, rng: (institution(ds, rng),))
+statement('DELETE_TOWERS_BY_INSTITUTION', lambda ds, rng: (institution(ds, rng),))
+statement('DELETE_DETECTORS_BY_INSTITUTION', lambda ds, rng: (institution(ds, rng),))
+statement('GET_INSTITUTION_BY_ID', lambda ds, rng: (institution(ds, rng),))
+statement('BULK_DELETE_INSTITUTIONS', lambda ds, rng: {
+    'ids': rng.sample(ds.institution_ids, 10), 'reason': 'benchmark'})
+statement('LOAD_MAP')
+
+
+@case('UPDATE_INSTITUTION_BASE')
+def update_institution_base(cursor, ds, rng):
+    cursor.execute(queries.UPDATE_INSTITUTION_BASE.format(fields='"Nazwa" = %s, "Adres" = %s'),
+                   ('Nadlesnictwo zmienione', 'ul. Nowa 2', institution(ds, rng)))
+    cursor.fetchall()
+
+
+# Towers
+statement('GET_ALL_TOWERS')
+statement('INSERT_TOWER', lambda ds, rng: TOWER_VALUES)
+statement('UPDATE_TOWER', lambda ds, rng: TOWER_VALUES + (tower(ds, rng),))
+statement('DELETE_TOWER', lambda ds, rng: (tower(ds, rng),))
+statement('DELETE_DETECTORS_BY_TOWER', lambda ds, rng: (tower(ds, rng),))
+statement('GET_TOWERS_WITH_INSTITUTIONS')
+statement('GET_TOWER_NAME_BY_ID', lambda ds, rng: (tower(ds, rng),))
+statement('GET_TOWER_INSTITUTION_ID', lambda ds, rng: (tower(ds, rng),))
+statement('GET_TOWER_DETAILS_BY_ID', lambda ds, rng: (tower(ds, rng),))
+statement('BULK_DELETE_TOWERS', lambda ds, rng: {
+    'ids': rng.sample(ds.tower_ids, 50), 'reason': 'benchmark'})
+statement('GET_TABLE_VERSIONS', lambda ds, rng: (['PAD', 'Wieze', 'Boxes'],))
+
+# Detectors
+statement('GET_ALL_DETECTORS')
+statement('INSERT_DETECTOR', lambda ds, rng: ('99999999', tower(ds, rng), '99999999', tower(ds, rng)))
+statement('UPDATE_DETECTOR_NAME', lambda ds, rng: ('Detektor benchmark', serial(ds, rng)))
+statement('DELETE_DETECTOR', lambda ds, rng: (serial(ds, rng),))
+statement('DELETE_DETECTOR_BY_SERIAL', lambda ds, rng: (serial(ds, rng),))
+statement('GET_DETECTOR_TOWER_ID', lambda ds, rng: (serial(ds, rng),))
+statement('UPDATE_ALL_DETECTOR_NAMES')
+statement('GET_DETECTOR_BY_SERIAL', lambda ds, rng: (serial(ds, rng),))
+statement('UPDATE_DETECTOR_ASSIGNMENT', lambda ds, rng: (tower(ds, rng), 'Detektor benchmark', serial(ds, rng)))
+statement('UPDATE_DETECTOR_UNASSIGN', lambda ds, rng: (serial(ds, rng),))
+statement('GET_DETECTOR_WIEZA_ID', lambda ds, rng: (serial(ds, rng),))
+statement('UPDATE_DETECTOR_WIEZA_ID_NULL', lambda ds, rng: (serial(ds, rng),))
+statement('GET_DETECTOR_DETAILS_BY_SERIAL', lambda ds, rng: (serial(ds, rng),))
+statement('GET_DETECTOR_SYNC_STATUS')
+statement('LOAD_DETECTOR_REGISTRY')
+statement('LOAD_DETECTOR_REGISTRY_SERIALS', lambda ds, rng: ([serial(ds, rng) for _ in range(200)],))
+statement('LOAD_TOWER_REGISTRY')
+statement('LOAD_TOWER_POINTS')
+statement('LOAD_MAP_CLUSTER_TOWERS')
+
+# Detector history
+statement('INSERT_DETECTOR_HISTORY', lambda ds, rng: (serial(ds, rng), 'zmiana', tower(ds, rng)))
+statement('GET_DETECTOR_HISTORY', lambda ds, rng: (serial(ds, rng),))
+statement('GET_NEW_DETECTORS')
+statement('GET_HIST_DET_COLUMN_TYPES')
+statement('REBUILD_HIST_DET_LATEST')
+statement('CHECK_HIST_DET_LATEST')
+statement('COUNT_HIST_DET_LATEST')
+
+
+@case('GET_DETECTOR_HISTORY_KEYSET')
+def detector_history_keyset(cursor, ds, rng):
+    sql, params = build_history_query(serial(ds, rng), date_from=date(2021, 1, 1), limit=51)
+    cursor.execute(sql, params)
+    cursor.fetchall()
+
+
+@case('UPDATE_DETECTOR_FLAG_QUERIES')
+def update_detector_flags(cursor, ds, rng):
+    for flag, sql in queries.UPDATE_DETECTOR_FLAG_QUERIES.items():
+        cursor.execute(sql, (rng.random() < 0.5, history_id(ds, rng)))
+
+
+@case('UPDATE_DETECTOR_FLAG_BATCH_QUERIES')
+def update_detector_flags_batch(cursor, ds, rng):
+    template = queries.UPDATE_DETECTOR_FLAG_BATCH_TEMPLATE.format(id_type='integer', value_type='boolean')
+    rows = [(history_id(ds, rng), rng.random() < 0.5) for _ in range(500)]
+    execute_values(cursor, queries.UPDATE_DETECTOR_FLAG_BATCH_QUERIES['slack'], rows,
+                   template=template, page_size=len(rows), fetch=True)
+
+
+# Tickets, contracts, hardware
+statement('GET_ALL_TICKETS')
+statement('GET_ALL_CONTRACTS')
+statement('GET_ALL_HARDWARE')
+statement('INSERT_HARDWARE', lambda ds, rng: dict(zip(
+    HARDWARE_COLUMNS, hardware_row(hardware_record(rng, rng.choice(ds.hardware_serials), ds.counts['Wieze']))
+)))
+
+
+# Sync merges: stage with COPY, then merge
+@case('MERGE_DETECTORS_STAGE')
+def merge_detectors_stage(cursor, ds, rng):
+    now = datetime.now(timezone.utc)
+    cursor.execute(queries.CREATE_DETECTORS_STAGE)
+    copy_rows(cursor, 'detectors_stage', ('serial', '"live_view_updated_at"'),
+              ((s, now) for s in ds.detector_serials))
+    cursor.execute(queries.MERGE_DETECTORS_STAGE)
+    cursor.fetchall()
+
+
+@case('MERGE_BOXES_STAGE')
+def merge_boxes_stage(cursor, ds, rng):
+    cursor.execute(queries.CREATE_BOXES_STAGE)
+    copy_rows(cursor, 'boxes_stage', ('"serial"', '"openvpn_ip"', '"local_ip"', '"mac_address"'),
+              ((s, '10.9.0.1', '192.168.0.1', '00:00:00:00:00:01') for s in ds.box_serials))
+    cursor.execute(queries.MERGE_BOXES_STAGE)
+    cursor.fetchall()
+
+
+@case('UPSERT_DETECTORS_VALUES')
+def upsert_detectors_values(cursor, ds, rng):
+    now = datetime.now(timezone.utc)
+    rows = [(s, now, None) for s in rng.sample(ds.detector_serials, min(1000, len(ds.detector_serials)))]
+    execute_values(cursor, queries.UPSERT_DETECTORS_VALUES, rows, page_size=len(rows), fetch=True)
+
+
+@case('UPSERT_BOXES_VALUES')
+def upsert_boxes_values(cursor, ds, rng):
+    rows = [(s, '10.9.0.1', '192.168.0.1', '00:00:00:00:00:01')
+            for s in rng.sample(ds.box_serials, min(1000, len(ds.box_serials)))]
+    execute_values(cursor, queries.UPSERT_BOXES_VALUES, rows, page_size=len(rows), fetch=True)
+
+
+@case('MERGE_HARDWARE_STAGE')
+def merge_hardware_stage(cursor, ds, rng):
+    cursor.execute(queries.CREATE_HARDWARE_STAGE)
+    copy_rows(cursor, 'hardware_stage', HARDWARE_COLUMNS, (
+        hardware_row(hardware_record(rng, s, ds.counts['Wieze'])) for s in ds.hardware_serials
+    ))
+    cursor.execute(queries.MERGE_HARDWARE_STAGE)
+
+
+# Tower import: 500 updates by ID and 500 new towers, staged, validated, upserted
+@case('UPSERT_TOWER_IMPORT_STAGE')
+def upsert_tower_import_stage(cursor, ds, rng):
+    records = [{'ID': tower_id, 'Nazwa': f"Wieza {tower_id}", 'Wspolrzedne_X': 19.5, 'Wspolrzedne_Y': 52.5}
+               for tower_id in rng.sample(ds.tower_ids, 500)]
+    records += [{'Nazwa': f"Wieza import {i}", 'Instytucja_ID': institution(ds, rng),
+                 'Wspolrzedne_X': 19.0 + rng.random(), 'Wspolrzedne_Y': 52.0 + rng.random()}
+                for i in range(500)]
+    cursor.execute(queries.CREATE_TOWER_IMPORT_STAGE)
+    copy_rows(cursor, 'tower_import_stage', ['row_number'] + [f'"{c}"' for c in IMPORT_COLUMNS],
+              (stage_row(i, record)[0] for i, record in enumerate(records, start=1)))
+    cursor.execute(queries.PREPARE_TOWER_IMPORT_STAGE)
+    cursor.execute(queries.VALIDATE_TOWER_IMPORT_STAGE)
+    rejected = sorted({row[0] for row in cursor.fetchall()})
+    cursor.execute(queries.UPSERT_TOWER_IMPORT_STAGE, {'rejected': rejected})
+    cursor.fetchall()
+
+
+# Sync telemetry
+statement('INSERT_SYNC_RUN', lambda ds, rng: {
+    'job': 'benchmark', 'started_at': datetime.now(timezone.utc), 'duration_seconds': 1.0,
+    'fetch_seconds': 0.5, 'normalize_seconds': 0.1, 'write_seconds': 0.4, 'rows_fetched': 100,
+    'rows_inserted': 1, 'rows_updated': 10, 'rows_unchanged': 89, 'rows_vanished': 0,
+    'rows_rejected': 0, 'status': 'ok', 'error': None,
+})
+statement('GET_SYNC_RUN_STATS', lambda ds, rng: {'window_hours': 24})
+statement('PRUNE_SYNC_RUNS', lambda ds, rng: {'job': 'benchmark', 'retention_days': 90})
+statement('PRUNE_SYNC_QUARANTINE', lambda ds, rng: {'job': 'benchmark', 'retention_days': 30})
+statement('GET_SYNC_QUARANTINE', lambda ds, rng: {'job': None, 'limit': 100})
+
+
+@case('INSERT_SYNC_QUARANTINE')
+def insert_sync_quarantine(cursor, ds, rng):
+    started_at = datetime.now(timezone.utc)
+    rows = [('benchmark', started_at, i, 'serial can only contain digits', Json({'serial': f"x{i}"}))
+            for i in range(500)]
+    execute_values(cursor, queries.INSERT_SYNC_QUARANTINE, rows, page_size=len(rows))
+
+
+def query_constants():
+    """Names of the SQL constants defined in core.queries"""
+    return sorted(
+        name for name, value in vars(queries).items()
+        if name.isupper() and isinstance(value, (str, dict))
+    )
+
+
+def uncovered_constants():
+    """Constants with neither a case nor a COVERED_BY entry"""
+    return [name for name in query_constants() if name not in QUERY_CASES and name not in COVERED_BY]
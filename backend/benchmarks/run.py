@@ -0,0 +1,260 @@
+"""
+Reproducible database and sync benchmark suite.
+
+Rebuilds a throwaway Postgres database from schema.sql and the app
+migrations, loads seeded synthetic data at the requested scale, times every
+SQL constant in core/queries.py and the SmokeD/Monday syncs (served from
+recorded fixtures), and writes the results as JSON. With --baseline the run
+fails when a timing regresses beyond the tolerance, a case starts failing,
+or a query constant has no benchmark case.
+
+The database configured for the application is DROPPED and recreated; the
+suite refuses to run unless its name ends with ``_bench``.
+
+Usage:
+    python -m benchmarks.run --scale 10 --output results.json
+    python -m benchmarks.run --scale 10 --baseline results.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.core.management import call_command
+from core.connection import get_connection, close_pool
+from .datagen import SCALES, build_dataset, generate
+from .fixtures import (
+    build_fixtures, record_fixtures, load_fixtures, install_fixture_adapter, use_hardware_query_fallback
+)
+from .query_cases import QUERY_CASES, uncovered_constants
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(BENCHMARK_DIR, 'schema.sql')
+FIXTURE_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+DATABASE_SUFFIX = '_bench'
+
+
+def summarize(samples):
+    """Milliseconds summary of a list of durations in seconds"""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        'iterations': len(ms),
+        'min_ms': round(ms[0], 3),
+        'p50_ms': round(statistics.median(ms), 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+    }
+
+
+def check_database(conn, allow_any):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT current_database(), version()")
+        name, version = cursor.fetchone()
+    if not allow_any and not name.endswith(DATABASE_SUFFIX):
+        raise SystemExit(f"Refusing to rebuild database {name!r}: its name must end with {DATABASE_SUFFIX!r}")
+    return name, version
+
+
+def rebuild_database(conn, scale, seed):
+    """Recreate the public schema, load the data set and apply migrations"""
+    with conn.cursor() as cursor:
+        cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as file:
+            cursor.execute(file.read())
+        start = time.perf_counter()
+        dataset = generate(cursor, scale, seed)
+    conn.commit()
+    load_seconds = time.perf_counter() - start
+
+    call_command('migrate', interactive=False, verbosity=0)
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE")
+    conn.autocommit = False
+    return dataset, load_seconds
+
+
+def time_queries(conn, dataset, iterations, seed, only=None):
+    results = {}
+    for name, run in sorted(QUERY_CASES.items()):
+        if only and name not in only:
+            continue
+        rng = random.Random(f"{seed}:{name}")
+        samples = []
+        try:
+            # One warm-up execution, then the timed ones; all rolled back
+            for i in range(iterations + 1):
+                with conn.cursor() as cursor:
+                    start = time.perf_counter()
+                    run(cursor, dataset, rng)
+                    elapsed = time.perf_counter() - start
+                conn.rollback()
+                if i:
+                    samples.append(elapsed)
+            results[name] = summarize(samples)
+        except Exception as e:
+            conn.rollback()
+            results[name] = {'error': f"{type(e).__name__}: {e}".strip()}
+        print(f"  {name:<40} {results[name].get('p50_ms', 'ERROR')}")
+    return results
+
+
+def time_syncs(fixtures, iterations):
+    """Time each sync against the fixture adapter; these runs commit"""
+    from external import smoke_api, monday_api
+
+    use_hardware_query_fallback()
+    install_fixture_adapter(fixtures)
+
+    syncs = {
+        'sync_detectors_and_live_view[upsert]': lambda: smoke_api.sync_detectors_and_live_view(mode='upsert'),
+        'sync_detectors_and_live_view[merge]': lambda: smoke_api.sync_detectors_and_live_view(mode='merge'),
+        'sync_boxes_to_db[upsert]': lambda: smoke_api.sync_boxes_to_db(mode='upsert'),
+        'sync_boxes_to_db[merge]': lambda: smoke_api.sync_boxes_to_db(mode='merge'),
+        'sync_monday_hardware': monday_api.sync_monday_hardware,
+    }
+    results = {}
+    for name, sync in syncs.items():
+        samples = []
+        try:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                sync()
+                samples.append(time.perf_counter() - start)
+            results[name] = summarize(samples)
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {e}".strip()}
+        print(f"  {name:<40} {results[name].get('p50_ms', 'ERROR')}")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=BENCHMARK_DIR, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Regressions of ``results`` against ``baseline``.
+
+    A p50 regresses when it is more than ``tolerance`` (relative) and more
+    than ``min_delta_ms`` (absolute) slower than in the baseline.
+    """
+    problems = []
+    for section in ('queries', 'syncs'):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            if 'error' in current and 'error' not in previous:
+                problems.append(f"{section}/{name} now fails: {current['error']}")
+                continue
+            if 'p50_ms' not in current or 'p50_ms' not in previous:
+                continue
+            delta = current['p50_ms'] - previous['p50_ms']
+            if delta > min_delta_ms and current['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+                problems.append(
+                    f"{section}/{name} p50 {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms (+{delta:.3f} ms)"
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1, help=f"data set multiplier (presets: {SCALES})")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=20, help='timed executions per query')
+    parser.add_argument('--sync-iterations', type=int, default=3, help='timed runs per sync')
+    parser.add_argument('--query', action='append', help='benchmark only this query constant (repeatable)')
+    parser.add_argument('--skip-setup', action='store_true', help='reuse the data loaded by a previous run')
+    parser.add_argument('--skip-syncs', action='store_true')
+    parser.add_argument('--output', help='results JSON path')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative p50 slowdown')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='ignore slowdowns below this')
+    parser.add_argument('--allow-any-database', action='store_true',
+                        help=f"do not require the database name to end with {DATABASE_SUFFIX}")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    database, server_version = check_database(conn, args.allow_any_database)
+
+    if args.skip_setup:
+        dataset, load_seconds = build_dataset(args.scale, args.seed), None
+    else:
+        print(f"Loading scale {args.scale:g} data set into {database} ...")
+        dataset, load_seconds = rebuild_database(conn, args.scale, args.seed)
+
+    print("Timing queries ...")
+    query_results = time_queries(conn, dataset, args.iterations, args.seed, only=args.query)
+    conn.close()
+
+    sync_results = {}
+    if not args.skip_syncs and not args.query:
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        fixture_path = os.path.join(FIXTURE_DIR, f"api-x{args.scale:g}-seed{args.seed}.json")
+        if os.path.exists(fixture_path):
+            fixtures = load_fixtures(fixture_path)
+        else:
+            fixtures = build_fixtures(dataset)
+            record_fixtures(fixture_path, fixtures)
+        print("Timing syncs ...")
+        sync_results = time_syncs(fixtures, args.sync_iterations)
+    close_pool()
+
+    results = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'scale': args.scale,
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'row_counts': dataset.counts,
+            'load_seconds': round(load_seconds, 3) if load_seconds is not None else None,
+            'python': platform.python_version(),
+            'postgres': server_version,
+        },
+        'queries': query_results,
+        'syncs': sync_results,
+        'uncovered': uncovered_constants(),
+    }
+
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, 'results', f"{datetime.now():%Y%m%d-%H%M%S}-x{args.scale:g}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, default=str)
+    print(f"Results written to {output}")
+
+    problems = [f"no benchmark case for {name}" for name in results['uncovered']]
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if (baseline['meta']['scale'], baseline['meta']['seed']) != (args.scale, args.seed):
+            raise SystemExit("Baseline was recorded with a different scale or seed")
+        problems += compare(results, baseline, args.tolerance, args.min_delta_ms)
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
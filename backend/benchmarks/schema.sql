@@ -0,0 +1,139 @@
+-- Base tables of the production database, reconstructed from core/queries.py.
+-- There are no foreign keys: the application cascades deletes itself.
+-- The Django migrations (apps.map, apps.detectors, apps.sync, apps.towers) are applied on
+-- top of this schema after the synthetic data has been loaded.
+
+CREATE TABLE "PAD" (
+    "ID" serial PRIMARY KEY,
+    "Nazwa" text NOT NULL,
+    "Adres" text,
+    "Wspolrzedne_X" double precision,
+    "Wspolrzedne_Y" double precision,
+    "RDLP" text,
+    "R_PAD" text,
+    "L_PAD" text,
+    "Teamviewer" text,
+    "Nr_kontaktowy" text
+);
+
+CREATE TABLE "Boxes" (
+    "serial" bigint PRIMARY KEY,
+    "openvpn_ip" text,
+    "local_ip" text,
+    "mac_address" text
+);
+
+CREATE TABLE "Wieze" (
+    "ID" serial PRIMARY KEY,
+    "Nazwa" text NOT NULL,
+    "Instytucja_ID" integer,
+    "Wspolrzedne_X" double precision,
+    "Wspolrzedne_Y" double precision,
+    "Skrypt_od" text,
+    "Skrypt_do" text,
+    "Usluga" text,
+    "Gwarancja" text,
+    "Serwis" text,
+    "Wersja_aplikacji" text,
+    "Instalator" text,
+    "Instrukcja" text,
+    "Azymut" text,
+    "Trasa" text,
+    "Poziom" text,
+    "Uwagi" text,
+    "box" bigint
+);
+CREATE INDEX "Wieze_Instytucja_ID_idx" ON "Wieze" ("Instytucja_ID");
+
+CREATE TABLE "Detektory" (
+    "serial" text PRIMARY KEY,
+    "Wieza_ID" integer,
+    "name" text,
+    "live_view_updated_at" timestamptz
+);
+CREATE INDEX "Detektory_Wieza_ID_idx" ON "Detektory" ("Wieza_ID");
+
+CREATE TABLE hist_det (
+    id serial PRIMARY KEY,
+    serial text NOT NULL,
+    typ text,
+    id_wiezy integer,
+    data date,
+    godzina time,
+    slack boolean,
+    nazwa boolean,
+    nazwastara text,
+    pokrycie boolean,
+    parametry boolean,
+    azymut boolean,
+    horyzont boolean,
+    dziennik text,
+    boxy boolean,
+    boxystare boolean,
+    desktop boolean,
+    winbox boolean,
+    monday boolean,
+    usluga boolean,
+    upublicznienie boolean,
+    sponsor boolean,
+    priv boolean,
+    skrypt boolean
+);
+
+CREATE TABLE "Pracownicy" (
+    id serial PRIMARY KEY,
+    nazwa text NOT NULL
+);
+
+CREATE TABLE "Zgloszenia" (
+    id serial PRIMARY KEY,
+    tytul text,
+    data_godzina timestamp,
+    id_wiezy integer,
+    autor integer,
+    oznaczeni integer,
+    status text,
+    priorytet text,
+    kategoria text,
+    komentarze text
+);
+
+CREATE TABLE "Umowy" (
+    id serial PRIMARY KEY,
+    instytucja text,
+    typ text,
+    skad_sprzedane text,
+    data_rozpoczecia date,
+    data_zakonczenia date,
+    zalacznik_umowy text,
+    uwagi text
+);
+
+CREATE TABLE "Rejestr_Kamer" (
+    id serial PRIMARY KEY,
+    name text,
+    elementy_podrzedne text,
+    serial bigint UNIQUE,
+    nadlesnictwo text,
+    wieza text,
+    status text,
+    instalator text,
+    rodzaj text,
+    czas_start date,
+    czas_end date,
+    data_produkcji date,
+    obudowa text,
+    enkoder_katow text,
+    enkoder_obrazu text,
+    driver_silnika text,
+    procesor text,
+    modul text,
+    gniazdo_glowicy text,
+    data_firmware date,
+    wylacznik_glowicy text,
+    adres text,
+    ip_enkodera text,
+    kanal_ch text,
+    ip_moxy text,
+    uwagi text
+);
@@ -0,0 +1,95 @@
+"""
+Column-wise vs. per-record validation of a SmokeD box payload.
+
+Times BOX_VALIDATOR from external.smoke_api against the scalar helpers of
+core/validators.py called in a loop over the same records, with a share of
+malformed serials, addresses and duplicates mixed in. No database needed.
+
+Usage:
+    python -m benchmarks.validation --rows 100000
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+from .datagen import BOX_SERIAL_BASE
+from .fixtures import box_records
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+def malformed_payload(rows, bad_fraction, seed):
+    rng = random.Random(seed)
+    records = box_records(rng, range(BOX_SERIAL_BASE, BOX_SERIAL_BASE + rows))
+    for record in records:
+        if rng.random() < bad_fraction:
+            field, value = rng.choice((('serial', 'SN-12x'), ('serial', None), ('openvpn_ip', '10.9.300.1'),
+                                       ('mac_address', 'zz:00'), ('serial', records[0]['serial'])))
+            record[field] = value
+    return records
+
+
+def scalar_validate(records):
+    """The per-record equivalent of BOX_VALIDATOR"""
+    from core.batch_validators import IPV4_PATTERN, MAC_PATTERN
+    from core.validators import validate_serial_number
+    ipv4, mac = re.compile(IPV4_PATTERN), re.compile(MAC_PATTERN)
+
+    rows = {}
+    for record in records:
+        valid, _ = validate_serial_number(record.get('serial'))
+        if not valid:
+            continue
+        addresses = [(record.get(k) or '').strip() or None for k in ('openvpn_ip', 'local_ip', 'mac_address')]
+        addresses = [a if a is None or ipv4.fullmatch(a) else None for a in addresses[:2]] + \
+            [addresses[2] if addresses[2] is None or mac.fullmatch(addresses[2]) else None]
+        serial = str(int(record['serial']))
+        rows.pop(serial, None)
+        rows[serial] = (serial, *addresses)
+    return list(rows.values())
+
+
+def best_of(repeat, func, *args):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--bad-fraction', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from external.smoke_api import BOX_VALIDATOR
+
+    records = malformed_payload(args.rows, args.bad_fraction, args.seed)
+    columns = ('serial', 'openvpn_ip', 'local_ip', 'mac_address')
+
+    scalar_seconds, scalar_rows = best_of(args.repeat, scalar_validate, records)
+    batch_seconds, batch = best_of(args.repeat, BOX_VALIDATOR.validate, records)
+    batch_rows = batch.rows(columns)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'valid': len(batch_rows),
+        'rejected': batch.rejected_count,
+        'warned': len(batch.warned()),
+        'scalar_valid': len(scalar_rows),
+        'scalar_seconds': round(scalar_seconds, 4),
+        'batch_seconds': round(batch_seconds, 4),
+        'speedup': round(scalar_seconds / batch_seconds, 1) if batch_seconds else None,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
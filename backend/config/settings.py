@@ -20,6 +20,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'apps.authentication',
+    'apps.map',
+    'apps.detectors',
+    'apps.sync',
+    'apps.towers',
+    'apps.hardware',
+    'apps.tickets',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
@@ -71,6 +78,16 @@ USE_TZ = True
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Every API view needs the login cookie; only /api/auth/login/ opts out (AllowAny)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'apps.authentication.jwt_auth.JWTAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -93,11 +110,16 @@ CORS_ALLOW_HEADERS = [
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
 MONDAY_API_KEY = os.getenv('MONDAY_API_KEY')
 
-LOGIN_URL = "https://api.smokedsystem.com/api/v3/login"
-DETECTORS_URL = "https://api.smokedsystem.com/api/v3/camera/list"
-BOXES_URL = "https://api.smokedsystem.com/api/v3/box/list"
+# Override SMOKED_API_URL to point the syncs at a stand-in (benchmarks/fake_api.py)
+SMOKED_API_URL = os.getenv('SMOKED_API_URL', 'https://api.smokedsystem.com/api/v3').rstrip('/')
+LOGIN_URL = f"{SMOKED_API_URL}/login"
+DETECTORS_URL = f"{SMOKED_API_URL}/camera/list"
+BOXES_URL = f"{SMOKED_API_URL}/box/list"
 
 SMOKED_CREDENTIALS = {
     "username": os.getenv('SMOKED_USERNAME'),
     "password": os.getenv('SMOKED_PASSWORD')
 }
+
+# Bearer token required by /metrics; while unset /metrics answers 403
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
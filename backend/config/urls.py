@@ -4,4 +4,11 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.authentication.urls')),
+    path('api/map/', include('apps.map.urls')),
+    path('api/detectors/', include('apps.detectors.urls')),
+    path('api/sync/', include('apps.sync.urls')),
+    path('api/towers/', include('apps.towers.urls')),
+    path('api/hardware/', include('apps.hardware.urls')),
+    path('api/tickets/', include('apps.tickets.urls')),
+    path('', include('apps.monitoring.urls')),
 ]
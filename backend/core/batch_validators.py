@@ -0,0 +1,187 @@
+"""
+Column-wise validation and normalization of sync payloads.
+
+The scalar helpers in core/validators.py check one value per call. Here a
+whole payload is loaded into a DataFrame and every column is checked at
+once with pandas string/numeric operations and compiled regular
+expressions. The result keeps the cleaned columns and, per row, the first
+error found, so a malformed record is quarantined instead of aborting the
+sync it arrived with. Columns marked optional never reject a record: a bad
+value is stored as NULL and reported as a warning.
+
+Example:
+    validator = BatchValidator({
+        'serial': check_serial,
+        'local_ip': check_pattern(IPV4_PATTERN, "must be an IPv4 address"),
+    }, unique='serial', optional=('local_ip',))
+    result = validator.validate(api_boxes)
+    rows = result.rows(("serial", "local_ip"))
+    for rejected in result.rejected():
+        ...
+"""
+import numpy as np
+import pandas as pd
+
+SERIAL_PATTERN = r'0*\d{1,18}'
+IPV4_PATTERN = r'(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:/\d{1,2})?'
+MAC_PATTERN = r'[0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5}'
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}(?:[ T].*)?'
+
+
+def as_text(values):
+    """Stripped strings with missing and empty values as NA"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    return series.astype('string').str.strip().replace('', pd.NA)
+
+
+def no_errors(length):
+    return np.full(length, None, dtype=object)
+
+
+def flag(errors, mask, message):
+    """Set ``message`` on the rows in ``mask`` that have no error yet"""
+    errors[mask & pd.isna(errors)] = message
+
+
+def _fullmatch(text, pattern):
+    return text.str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool)
+
+
+def check_serial(values, required=True):
+    """Digits-only serial numbers, leading zeros removed (the database format)"""
+    text = as_text(values)
+    missing = text.isna().to_numpy()
+    valid = _fullmatch(text, SERIAL_PATTERN)
+    errors = no_errors(len(text))
+    if required:
+        flag(errors, missing, "is required")
+    flag(errors, ~missing & ~valid, "can only contain digits")
+    cleaned = text.where(valid).str.lstrip('0').replace('', '0')
+    return cleaned, errors
+
+
+def check_pattern(pattern, message):
+    """Optional text column that must match ``pattern`` when present"""
+    def check(values):
+        text = as_text(values)
+        present = text.notna().to_numpy()
+        valid = _fullmatch(text, pattern)
+        errors = no_errors(len(text))
+        flag(errors, present & ~valid, message)
+        return text.where(valid), errors
+    return check
+
+
+def check_timestamp(values):
+    """Optional ISO 8601 timestamps; the original text is kept for the database to parse"""
+    text = as_text(values)
+    present = text.notna().to_numpy()
+    parsed = pd.to_datetime(text, errors='coerce', utc=True, format='ISO8601')
+    valid = parsed.notna().to_numpy()
+    errors = no_errors(len(text))
+    flag(errors, present & ~valid, "must be an ISO 8601 timestamp")
+    return text.where(valid), errors
+
+
+def check_date(values):
+    """Optional YYYY-MM-DD dates (a trailing time is dropped)"""
+    text = as_text(values)
+    present = text.notna().to_numpy()
+    day = text.where(_fullmatch(text, DATE_PATTERN)).str.slice(0, 10)
+    valid = pd.to_datetime(day, errors='coerce', format='%Y-%m-%d').notna().to_numpy()
+    errors = no_errors(len(text))
+    flag(errors, present & ~valid, "must be a date in YYYY-MM-DD format")
+    return day.where(valid), errors
+
+
+class BatchResult:
+    """Cleaned columns of a validated payload plus the first error and warning of every row"""
+
+    def __init__(self, records, frame, errors, warnings):
+        self.records = records
+        self.frame = frame
+        self.errors = errors
+        self.warnings = warnings
+        self.valid = pd.isna(errors)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def valid_count(self):
+        return int(self.valid.sum())
+
+    @property
+    def rejected_count(self):
+        return len(self.frame) - self.valid_count
+
+    def _valid_frame(self, columns):
+        frame = self.frame.loc[self.valid, list(columns)].astype(object)
+        return frame.where(frame.notna(), None)
+
+    def rows(self, columns):
+        """Valid rows as tuples in ``columns`` order, NA as None (ready for COPY)"""
+        return list(self._valid_frame(columns).itertuples(index=False, name=None))
+
+    def dicts(self, columns=None):
+        """Valid rows as dicts, NA as None"""
+        return self._valid_frame(columns or self.frame.columns).to_dict('records')
+
+    def rejected(self):
+        """[{"index", "error", "record"}] for every rejected row, in payload order"""
+        return [
+            {"index": int(i), "error": self.errors[i], "record": self.records[i]}
+            for i in np.flatnonzero(~self.valid)
+        ]
+
+    def warned(self):
+        """[{"index", "error", "record"}] for every valid row stored with an optional field blanked"""
+        return [
+            {"index": int(i), "error": f"{self.warnings[i]} (stored as NULL)", "record": self.records[i]}
+            for i in np.flatnonzero(self.valid & pd.notna(self.warnings))
+        ]
+
+
+class BatchValidator:
+    """
+    Validates a list of dict records column by column.
+
+    Args:
+        checks: {column: check} where check(values) returns (cleaned, errors);
+                errors are prefixed with the column name
+        unique: Column whose duplicate values are rejected (the last one wins,
+                as it would in a row-by-row upsert)
+        optional: Columns whose errors are only warnings; the value becomes NULL
+    """
+
+    def __init__(self, checks, unique=None, optional=()):
+        self.checks = checks
+        self.unique = unique
+        self.optional = frozenset(optional)
+
+    def validate(self, records):
+        records = records if isinstance(records, list) else list(records)
+        # object dtype: no inference, so integer serials never turn into floats
+        raw = pd.DataFrame(
+            [r if isinstance(r, dict) else {} for r in records], index=pd.RangeIndex(len(records)), dtype=object
+        )
+        errors = no_errors(len(records))
+        warnings = no_errors(len(records))
+        flag(errors, np.array([not isinstance(r, dict) for r in records], dtype=bool), "record must be an object")
+
+        frame = raw.copy()
+        for column, check in self.checks.items():
+            values = raw[column] if column in raw else pd.Series([None] * len(records), dtype=object)
+            cleaned, column_errors = check(values)
+            frame[column] = cleaned
+            target = warnings if column in self.optional else errors
+            missing = pd.isna(target) & pd.notna(column_errors)
+            target[missing] = [f"{column} {e}" for e in column_errors[missing]]
+
+        if self.unique is not None and len(frame):
+            key = frame[self.unique]
+            duplicate = (key.duplicated(keep='last') & key.notna()).to_numpy()
+            flag(errors, duplicate, f"{self.unique} appears again later in the payload")
+
+        return BatchResult(records, frame, errors, warnings)
+
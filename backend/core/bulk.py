@@ -0,0 +1,89 @@
+"""
+Bulk loading helpers built on PostgreSQL COPY.
+Rows are streamed from any iterable, so large payloads never have to be
+rendered into one big buffer before loading.
+"""
+import io
+import logging
+from datetime import date, datetime, time
+
+logger = logging.getLogger(__name__)
+
+COPY_NULL = '\\N'
+
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def format_copy_value(value):
+    """Render a single value in COPY text format"""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+class IteratorFile(io.TextIOBase):
+    """Read-only file object producing COPY text lines from an iterable of rows"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ''
+        self.rows_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = '\t'.join(format_copy_value(v) for v in row) + '\n'
+            chunks.append(line)
+            length += len(line)
+            self.rows_read += 1
+
+        data = ''.join(chunks)
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def copy_rows(cursor, table, columns, rows, buffer_size=65536):
+    """
+    Stream rows into a table with COPY FROM STDIN.
+
+    Args:
+        cursor: psycopg2 cursor
+        table: Target table name (already quoted if needed)
+        columns: Column names, in the order values appear in each row
+        rows: Iterable of tuples
+        buffer_size: Bytes requested from the row stream per read
+
+    Returns:
+        int: Number of rows copied
+    """
+    column_list = ', '.join(columns)
+    source = IteratorFile(rows)
+    cursor.copy_expert(
+        f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT text)",
+        source,
+        size=buffer_size
+    )
+    logger.debug(f"Copied {source.rows_read} rows into {table}")
+    return source.rows_read
@@ -1,17 +1,35 @@
 """
 Database connection management with context managers.
 Provides secure and automated database connection handling.
+Connections are borrowed from a per-process pool (see core.pool) and
+cursors record per-query metrics (see core.instrumentation).
 """
+import os
 import psycopg2
 import logging
+import threading
 from contextlib import contextmanager
 from config import DB_CONFIG
+from core.pool import ConnectionPool
+from core.instrumentation import InstrumentedCursor
 
 logger = logging.getLogger(__name__)
 
+POOL_CONFIG = {
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    'min_idle': int(os.getenv('DB_POOL_MIN_IDLE', '1')),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+    'ping_after': float(os.getenv('DB_POOL_PING_AFTER', '0')),
+    'checkout_timeout': float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '10')),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
 def get_connection():
     """
-    Get database connection using psycopg2
+    Open a new database connection using psycopg2
     Returns connection object with proper error handling
     """
     try:
@@ -31,12 +49,34 @@ def get_connection():
         logger.error(f"Unexpected error connecting to database: {e}")
         raise
 
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_connection, **POOL_CONFIG)
+    return _pool
+
+def get_pool_stats():
+    """Return pool counters (in use, idle, wait time, checkout timeouts)"""
+    return get_pool().stats()
+
+def close_pool():
+    """Close all pooled connections, e.g. on worker shutdown"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
 @contextmanager
 def db_connection():
-    """Context manager for database connections with automatic cleanup"""
+    """Context manager for pooled database connections with automatic cleanup"""
     conn = None
+    pool = get_pool()
     try:
-        conn = get_connection()
+        conn = pool.getconn()
         yield conn
     except Exception as e:
         if conn:
@@ -45,14 +85,14 @@ def db_connection():
         raise
     finally:
         if conn:
-            conn.close()
-            logger.debug("Database connection closed")
+            pool.putconn(conn)
+            logger.debug("Database connection returned to pool")
 
 @contextmanager 
 def db_cursor():
     """Context manager for database operations with automatic commit/rollback"""
     with db_connection() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(cursor_factory=InstrumentedCursor)
         try:
             yield cursor, conn
             conn.commit()
@@ -69,7 +109,7 @@ def db_cursor():
 def db_cursor_readonly():
     """Context manager for read-only database operations"""
     with db_connection() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(cursor_factory=InstrumentedCursor)
         try:
             yield cursor
         finally:
@@ -0,0 +1,277 @@
+"""
+Per-query latency instrumentation for cursors handed out by core.connection.
+
+Every execution is labelled with the name of its constant in core.queries
+(``unnamed`` for ad-hoc SQL; execute_values pages are matched by their
+template) and recorded in an in-process latency histogram together with row
+and error counts. Statements slower than DB_SLOW_QUERY_MS are logged; a
+sample of them is followed by an EXPLAIN whose plan goes into the same log
+entry: EXPLAIN (ANALYZE, BUFFERS) for plain SELECTs, which are safe to run
+twice, and a plan without ANALYZE for WITH statements, which may modify data.
+Metrics are per process; render_prometheus() returns them in the Prometheus
+text exposition format.
+"""
+import os
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from psycopg2 import extensions
+from core import queries
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.getenv('DB_SLOW_QUERY_MS', '500')) / 1000
+EXPLAIN_SAMPLE_RATE = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_SAMPLE', '0.1'))
+EXPLAIN_MIN_INTERVAL = 60.0
+
+# Upper bounds in seconds; +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNNAMED = 'unnamed'
+# Only plain SELECTs are re-run (EXPLAIN ANALYZE); a WITH may hold
+# data-modifying CTEs, so it only gets its plan
+ANALYZE_PREFIX = 'select'
+EXPLAINABLE_PREFIXES = ('select', 'with')
+# core.pool stats that go up and down; the rest only ever increase
+POOL_GAUGES = {'max_size', 'in_use', 'idle', 'opening', 'wait_time_max'}
+# Pool counters under their Prometheus names (counters end in _total)
+POOL_COUNTERS = {
+    'checkouts': 'checkouts_total',
+    'waits': 'waits_total',
+    'wait_time_total': 'wait_seconds_total',
+    'checkout_timeouts': 'checkout_timeouts_total',
+    'connections_created': 'connections_created_total',
+    'connections_discarded': 'connections_discarded_total',
+}
+
+_query_names = None
+_values_templates = None
+
+
+def _get_query_names():
+    global _query_names
+    if _query_names is None:
+        names = {}
+        for name, value in vars(queries).items():
+            if not name.isupper():
+                continue
+            if isinstance(value, str):
+                names[value] = name
+            elif isinstance(value, dict):
+                # Families of statements such as UPDATE_DETECTOR_FLAG_BATCH_QUERIES
+                names.update({sql: f"{name}[{key}]" for key, sql in value.items() if isinstance(sql, str)})
+        _query_names = names
+    return _query_names
+
+
+def _get_values_templates():
+    """
+    (prefix, suffix, name) of every constant usable with execute_values, i.e.
+    with a single %s; execute_values sends prefix + VALUES list + suffix as bytes
+    """
+    global _values_templates
+    if _values_templates is None:
+        templates = []
+        for sql, name in list(_get_query_names().items()):
+            parts = sql.replace('%%', '\0').split('%s')
+            if len(parts) == 2:
+                prefix, suffix = (part.replace('\0', '%').encode('utf-8') for part in parts)
+                templates.append((prefix, suffix, name))
+        # Longest template first, so a longer match wins over a shared prefix
+        templates.sort(key=lambda t: len(t[0]) + len(t[1]), reverse=True)
+        _values_templates = templates
+    return _values_templates
+
+
+def query_name(sql):
+    """Return the core.queries constant name of a statement, or ``unnamed``"""
+    if isinstance(sql, str):
+        return _get_query_names().get(sql, UNNAMED)
+    if isinstance(sql, bytes):
+        for prefix, suffix, name in _get_values_templates():
+            if sql.startswith(prefix) and sql.endswith(suffix) and len(sql) > len(prefix) + len(suffix):
+                return name
+    return UNNAMED
+
+
+def register_query_name(sql, name):
+    """Label SQL built at runtime (e.g. from a template) with a stable name"""
+    _get_query_names()[sql] = name
+
+
+class QueryStats:
+    """Latency histogram and counters of one query name"""
+    __slots__ = ('buckets', 'count', 'total', 'rows', 'errors')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.errors = 0
+
+
+class QueryMetrics:
+    """Thread-safe registry of QueryStats keyed by query name"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._last_explain = {}
+
+    def observe(self, name, duration, rows, failed):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = QueryStats()
+            stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.count += 1
+            stats.total += duration
+            if failed:
+                stats.errors += 1
+            elif rows > 0:
+                stats.rows += rows
+
+    def should_explain(self, name):
+        """Sample slow statements, at most one EXPLAIN per name per interval"""
+        if random.random() >= EXPLAIN_SAMPLE_RATE:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explain.get(name, float('-inf')) < EXPLAIN_MIN_INTERVAL:
+                return False
+            self._last_explain[name] = now
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: (list(s.buckets), s.count, s.total, s.rows, s.errors)
+                for name, s in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._last_explain.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+def _explain(conn, sql, params, analyze):
+    """EXPLAIN [(ANALYZE, BUFFERS)] on the same connection, inside a savepoint"""
+    in_transaction = not conn.autocommit and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE
+    cursor = conn.cursor(cursor_factory=extensions.cursor)
+    try:
+        if in_transaction:
+            cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute(("EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN ") + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            if in_transaction:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(cursor, name, sql, params, duration):
+    plan = None
+    keyword = sql.lstrip()[:6].lower() if isinstance(sql, str) else ''
+    if keyword.startswith(EXPLAINABLE_PREFIXES) and query_metrics.should_explain(name):
+        try:
+            plan = _explain(cursor.connection, sql, params, analyze=keyword == ANALYZE_PREFIX)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+
+    if plan:
+        logger.warning(f"Slow query {name} took {duration * 1000:.1f} ms\n{plan}")
+    else:
+        logger.warning(f"Slow query {name} took {duration * 1000:.1f} ms")
+
+
+class InstrumentedCursor(extensions.cursor):
+    """psycopg2 cursor recording latency, rows and errors of every execute"""
+
+    def execute(self, query, vars=None):
+        name = query_name(query)
+        start = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception:
+            query_metrics.observe(name, time.perf_counter() - start, 0, True)
+            raise
+        duration = time.perf_counter() - start
+        query_metrics.observe(name, duration, self.rowcount, False)
+        if duration >= SLOW_QUERY_SECONDS:
+            _log_slow_query(self, name, query, vars, duration)
+        return result
+
+    def executemany(self, query, vars_list):
+        name = query_name(query)
+        start = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception:
+            query_metrics.observe(name, time.perf_counter() - start, 0, True)
+            raise
+        duration = time.perf_counter() - start
+        query_metrics.observe(name, duration, self.rowcount, False)
+        if duration >= SLOW_QUERY_SECONDS:
+            logger.warning(f"Slow query {name} (executemany) took {duration * 1000:.1f} ms")
+        return result
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def render_prometheus(pool_stats=None):
+    """
+    Render query metrics (and optionally pool counters) in the Prometheus
+    text exposition format, version 0.0.4.
+    """
+    lines = [
+        "# HELP db_query_duration_seconds Latency of statements executed through core.connection cursors.",
+        "# TYPE db_query_duration_seconds histogram",
+    ]
+    snapshot = sorted(query_metrics.snapshot().items())
+    for name, (buckets, count, total, _rows, _errors) in snapshot:
+        label = _label(name)
+        cumulative = 0
+        for bound, observed in zip(LATENCY_BUCKETS, buckets):
+            cumulative += observed
+            lines.append(f'db_query_duration_seconds_bucket{{query="{label}",le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f'db_query_duration_seconds_bucket{{query="{label}",le="+Inf"}} {count}')
+        lines.append(f'db_query_duration_seconds_sum{{query="{label}"}} {total!r}')
+        lines.append(f'db_query_duration_seconds_count{{query="{label}"}} {count}')
+
+    lines += [
+        "# HELP db_query_rows_total Rows returned or affected, as reported by cursor.rowcount.",
+        "# TYPE db_query_rows_total counter",
+    ]
+    lines += [f'db_query_rows_total{{query="{_label(name)}"}} {stats[3]}' for name, stats in snapshot]
+
+    lines += [
+        "# HELP db_query_errors_total Statements that raised an error.",
+        "# TYPE db_query_errors_total counter",
+    ]
+    lines += [f'db_query_errors_total{{query="{_label(name)}"}} {stats[4]}' for name, stats in snapshot]
+
+    for key, value in sorted((pool_stats or {}).items()):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key in POOL_COUNTERS:
+            lines.append(f"# TYPE db_pool_{POOL_COUNTERS[key]} counter")
+            lines.append(f"db_pool_{POOL_COUNTERS[key]} {value!r}")
+        elif key in POOL_GAUGES:
+            lines.append(f"# TYPE db_pool_{key} gauge")
+            lines.append(f"db_pool_{key} {value!r}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,144 @@
+"""
+Per-process PostgreSQL LISTEN dispatcher.
+A single dedicated connection listens on every channel the process cares
+about and fans notifications out to in-process subscribers.
+"""
+import os
+import time
+import select
+import logging
+import threading
+import psycopg2
+from psycopg2 import extensions
+from core.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 5.0
+RECONNECT_DELAY_MAX = 30.0
+
+
+class NotificationListener:
+    """
+    Background thread owning one LISTEN connection.
+
+    Callbacks run on the listener thread and must be quick; they receive the
+    notification payload (str). ``on_reconnect`` callbacks run after the
+    connection was re-established, since notifications sent while it was
+    down are lost and subscribers must assume everything changed.
+    """
+
+    def __init__(self, connect=get_connection):
+        self._connect = connect
+        self._subscribers = {}
+        self._reconnect_callbacks = []
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+        self._stopping = False
+        self.connected = False
+        self.notifications_received = 0
+
+    def subscribe(self, channel, callback, on_reconnect=None):
+        """Register a callback for a channel and start listening if needed"""
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+            if on_reconnect is not None:
+                self._reconnect_callbacks.append(on_reconnect)
+            self._pending.add(channel)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+                self._thread.start()
+        os.write(self._wake_w, b'\0')
+
+    def stop(self):
+        self._stopping = True
+        os.write(self._wake_w, b'\0')
+
+    def _run(self):
+        delay = 1.0
+        first = True
+        while not self._stopping:
+            conn = None
+            try:
+                conn = self._connect()
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with self._lock:
+                    self._pending = set(self._subscribers)
+                self._listen_pending(conn)
+                self.connected = True
+                delay = 1.0
+                if not first:
+                    logger.info("LISTEN connection re-established")
+                    self._run_callbacks(list(self._reconnect_callbacks), None)
+                first = False
+                self._loop(conn)
+            except psycopg2.Error as e:
+                logger.warning(f"LISTEN connection lost: {e}; reconnecting in {delay:.0f}s")
+            except Exception as e:
+                logger.error(f"Unexpected error in LISTEN loop: {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            if not self._stopping:
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def _loop(self, conn):
+        while not self._stopping:
+            readable, _, _ = select.select([conn, self._wake_r], [], [], POLL_TIMEOUT)
+            if self._wake_r in readable:
+                os.read(self._wake_r, 1024)
+                self._listen_pending(conn)
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                self.notifications_received += 1
+                with self._lock:
+                    callbacks = list(self._subscribers.get(notify.channel, ()))
+                self._run_callbacks(callbacks, notify.payload)
+
+    def _listen_pending(self, conn):
+        with self._lock:
+            channels, self._pending = self._pending, set()
+        with conn.cursor() as cursor:
+            for channel in channels:
+                cursor.execute(f'LISTEN "{channel}"')
+
+    @staticmethod
+    def _run_callbacks(callbacks, payload):
+        for callback in callbacks:
+            try:
+                if payload is None:
+                    callback()
+                else:
+                    callback(payload)
+            except Exception as e:
+                logger.error(f"Notification callback {callback!r} failed: {e}")
+
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def get_listener():
+    """Return this process's listener (a forked worker gets its own)"""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is None or _listener_pid != os.getpid():
+            _listener = NotificationListener()
+            _listener_pid = os.getpid()
+        return _listener
+
+
+def subscribe(channel, callback, on_reconnect=None):
+    """Subscribe to a NOTIFY channel on the process-wide listener"""
+    listener = get_listener()
+    listener.subscribe(channel, callback, on_reconnect=on_reconnect)
+    return listener
@@ -0,0 +1,253 @@
+"""
+Bounded, thread-safe PostgreSQL connection pool.
+Connections are health-checked on checkout, recycled after a maximum
+lifetime and, when returned, rolled back with their session settings
+(autocommit, readonly, deferrable, isolation level) restored to the
+defaults.
+"""
+import os
+import time
+import threading
+import logging
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection could be checked out within the timeout"""
+
+
+class _PooledConnection:
+    """Bookkeeping for a single physical connection"""
+    __slots__ = ('conn', 'created_at', 'last_used_at', 'owner')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+        self.owner = None
+
+
+class ConnectionPool:
+    """
+    Bounded connection pool.
+
+    Args:
+        connect: Callable returning a new psycopg2 connection
+        max_size: Maximum number of open connections
+        min_idle: Connections kept open when idle connections are pruned
+        max_lifetime: Seconds after which a connection is replaced
+        max_idle: Seconds an idle connection may sit in the pool
+        ping_after: Idle seconds after which checkout runs ``SELECT 1``;
+                    0 pings on every checkout
+        checkout_timeout: Seconds to wait for a free connection
+    """
+
+    def __init__(self, connect, max_size=10, min_idle=1, max_lifetime=1800,
+                 max_idle=300, ping_after=0, checkout_timeout=10):
+        self._connect = connect
+        self.max_size = max_size
+        self.min_idle = min_idle
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = deque()
+        self._in_use = {}
+        self._opening = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._pid = os.getpid()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    def getconn(self):
+        """Check out a healthy connection for the calling thread"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        waited = False
+
+        while True:
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                self._check_fork()
+
+                while not self._idle and self._size() >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.checkout_timeout}s waiting for a database connection "
+                            f"({len(self._in_use)} in use, max {self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._opening += 1
+
+            if entry is None:
+                try:
+                    entry = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._created += 1
+            elif not self._is_usable(entry):
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                entry.owner = threading.get_ident()
+                self._in_use[id(entry.conn)] = entry
+                self._checkouts += 1
+                if waited:
+                    wait_time = time.monotonic() - started
+                    self._waits += 1
+                    self._wait_time += wait_time
+                    self._max_wait_time = max(self._max_wait_time, wait_time)
+            return entry.conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            # Connection from before a fork or not owned by this pool
+            self._close_quietly(conn)
+            return
+
+        entry.owner = None
+        entry.last_used_at = time.monotonic()
+
+        if not self._reset(entry) or self._expired(entry):
+            self._discard(entry)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append(entry)
+            self._prune_idle()
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def stats(self):
+        """Return a snapshot of pool counters"""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "opening": self._opening,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": round(self._wait_time, 6),
+                "wait_time_max": round(self._max_wait_time, 6),
+                "checkout_timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_discarded": self._discarded,
+            }
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _check_fork(self):
+        # Connections must never be shared between processes; a forked
+        # worker starts with an empty pool instead.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._in_use.clear()
+            self._opening = 0
+
+    def _expired(self, entry):
+        return time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _is_usable(self, entry):
+        conn = entry.conn
+        if conn.closed or self._expired(entry):
+            return False
+        if self.ping_after and time.monotonic() - entry.last_used_at < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding dead pooled connection: {e}")
+            return False
+
+    def _reset(self, entry):
+        conn = entry.conn
+        if conn.closed:
+            return False
+        try:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            # Session settings a borrower changed must not leak to the next one
+            if conn.autocommit:
+                conn.autocommit = False
+            if conn.readonly is not None or conn.deferrable is not None:
+                conn.set_session(readonly='default', deferrable='default')
+            if conn.isolation_level is not None:
+                conn.isolation_level = 'default'
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Failed to reset pooled connection: {e}")
+            return False
+
+    def _prune_idle(self):
+        # Called with the lock held; the oldest idle connections sit at the left
+        now = time.monotonic()
+        while len(self._idle) > self.min_idle and now - self._idle[0].last_used_at > self.max_idle:
+            entry = self._idle.popleft()
+            self._discarded += 1
+            self._close_quietly(entry.conn)
+
+    def _discard(self, entry):
+        with self._cond:
+            self._discarded += 1
+            self._cond.notify()
+        self._close_quietly(entry.conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
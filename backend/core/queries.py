@@ -249,13 +249,10 @@ WHERE h.serial = %s
 ORDER BY h.data DESC, h.godzina DESC
 """
 
+# hist_det_latest holds the newest hist_det row per serial (maintained by trigger)
 GET_NEW_DETECTORS = """
 SELECT latest.*, w."Nazwa" as name
-FROM (
-    SELECT DISTINCT ON (serial) *
-    FROM hist_det
-    ORDER BY serial, data DESC, godzina DESC
-) AS latest
+FROM hist_det_latest AS latest
 JOIN "Detektory" d ON latest.serial = d.serial
 JOIN "Wieze" w ON d."Wieza_ID" = w."ID"
 WHERE latest.typ = 'dodanie';
@@ -281,6 +278,28 @@ UPDATE_DETECTOR_FLAG_QUERIES = {
     'nazwa': "UPDATE hist_det SET nazwa = %s WHERE id = %s;"
 }
 
+# Batch variants of the flag updates: one statement per flag for many rows.
+# Keys are the same whitelist; {id_type}/{value_type} come from the catalog
+# (GET_HIST_DET_COLUMN_TYPES), never from user input.
+UPDATE_DETECTOR_FLAG_BATCH_QUERIES = {
+    flag: (
+        f"UPDATE hist_det AS h SET {flag} = v.value "
+        f"FROM (VALUES %s) AS v(id, value) "
+        f"WHERE h.id = v.id RETURNING h.id;"
+    )
+    for flag in UPDATE_DETECTOR_FLAG_QUERIES
+}
+
+UPDATE_DETECTOR_FLAG_BATCH_TEMPLATE = "(%s::{id_type}, %s::{value_type})"
+
+GET_HIST_DET_COLUMN_TYPES = """
+    SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+    FROM pg_attribute a
+    WHERE a.attrelid = 'hist_det'::regclass
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+"""
+
 # Additional queries for detectors operations
 GET_DETECTOR_BY_SERIAL = """
     SELECT "Wieza_ID", "name" FROM "Detektory" WHERE "serial" = %s
@@ -377,7 +396,7 @@ ORDER BY r.serial ASC;
 
 
 INSERT_HARDWARE = """
-INSERT INTO public.Rejestr_Kamer
+INSERT INTO public."Rejestr_Kamer"
 (serial, nadlesnictwo, wieza, status, instalator, czas_start, czas_end, data_produkcji,
  obudowa, enkoder_katow, enkoder_obrazu, driver_silnika, procesor, modul, gniazdo_glowicy,
  data_firmware, wylacznik_glowicy, adres, ip_enkodera, kanal_ch, ip_moxy, uwagi)
@@ -471,4 +490,684 @@ FROM "Wieze" w
 LEFT JOIN "PAD" p ON w."Instytucja_ID" = p."ID"
 LEFT JOIN "Boxes" b ON w."box" = b."serial"
 WHERE w."ID" = %s;
-"""
\ No newline at end of file
+"""
+
+# Version counters maintained by triggers on PAD, Wieze and Boxes
+GET_TABLE_VERSIONS = """
+    SELECT table_name, version FROM table_versions WHERE table_name = ANY(%s)
+"""
+
+# Staging-table merge for SmokeD sync (only rows that really changed are written)
+CREATE_DETECTORS_STAGE = """
+    CREATE TEMP TABLE detectors_stage ON COMMIT DROP AS
+    SELECT serial, "live_view_updated_at" FROM public."Detektory" WITH NO DATA
+"""
+
+MERGE_DETECTORS_STAGE = """
+WITH src AS (
+    SELECT DISTINCT ON (serial) serial, "live_view_updated_at"
+    FROM detectors_stage
+    ORDER BY serial
+),
+updated AS (
+    UPDATE public."Detektory" d
+    SET "live_view_updated_at" = src."live_view_updated_at"
+    FROM src
+    WHERE d.serial = src.serial
+      AND d."live_view_updated_at" IS DISTINCT FROM src."live_view_updated_at"
+    RETURNING d.serial
+),
+inserted AS (
+    INSERT INTO public."Detektory" (serial, "live_view_updated_at", name)
+    SELECT src.serial, src."live_view_updated_at", NULL
+    FROM src
+    WHERE NOT EXISTS (SELECT 1 FROM public."Detektory" d WHERE d.serial = src.serial)
+    ON CONFLICT (serial) DO NOTHING
+    RETURNING serial
+)
+SELECT
+    (SELECT COUNT(*) FROM inserted) AS inserted,
+    (SELECT COUNT(*) FROM updated) AS updated,
+    (SELECT COUNT(*) FROM src) AS staged,
+    (SELECT COUNT(*) FROM public."Detektory" d
+     WHERE NOT EXISTS (SELECT 1 FROM src WHERE src.serial = d.serial)) AS vanished
+"""
+
+# Row-by-row SmokeD upserts (mode="upsert"), sent with execute_values
+UPSERT_DETECTORS_VALUES = """
+    INSERT INTO public."Detektory" (serial, "live_view_updated_at", name)
+    VALUES %s
+    ON CONFLICT (serial)
+    DO UPDATE SET
+        "live_view_updated_at" = EXCLUDED."live_view_updated_at"
+    RETURNING
+        serial,
+        (xmax = 0) AS was_inserted
+"""
+
+CREATE_BOXES_STAGE = """
+    CREATE TEMP TABLE boxes_stage ON COMMIT DROP AS
+    SELECT "serial", "openvpn_ip", "local_ip", "mac_address" FROM "Boxes" WITH NO DATA
+"""
+
+MERGE_BOXES_STAGE = """
+WITH src AS (
+    SELECT DISTINCT ON ("serial") "serial", "openvpn_ip", "local_ip", "mac_address"
+    FROM boxes_stage
+    ORDER BY "serial"
+),
+updated AS (
+    UPDATE "Boxes" b
+    SET "openvpn_ip" = src."openvpn_ip",
+        "local_ip" = src."local_ip",
+        "mac_address" = src."mac_address"
+    FROM src
+    WHERE b."serial" = src."serial"
+      AND (b."openvpn_ip", b."local_ip", b."mac_address")
+          IS DISTINCT FROM (src."openvpn_ip", src."local_ip", src."mac_address")
+    RETURNING b."serial"
+),
+inserted AS (
+    INSERT INTO "Boxes" ("serial", "openvpn_ip", "local_ip", "mac_address")
+    SELECT src."serial", src."openvpn_ip", src."local_ip", src."mac_address"
+    FROM src
+    WHERE NOT EXISTS (SELECT 1 FROM "Boxes" b WHERE b."serial" = src."serial")
+    ON CONFLICT ("serial") DO NOTHING
+    RETURNING "serial"
+)
+SELECT
+    (SELECT COUNT(*) FROM inserted) AS inserted,
+    (SELECT COUNT(*) FROM updated) AS updated,
+    (SELECT COUNT(*) FROM src) AS staged,
+    (SELECT COUNT(*) FROM "Boxes" b
+     WHERE NOT EXISTS (SELECT 1 FROM src WHERE src."serial" = b."serial")) AS vanished
+"""
+
+UPSERT_BOXES_VALUES = """
+    INSERT INTO "Boxes" ("serial", "openvpn_ip", "local_ip", "mac_address")
+    VALUES %s
+    ON CONFLICT ("serial") DO UPDATE SET
+        "openvpn_ip" = EXCLUDED."openvpn_ip",
+        "local_ip" = EXCLUDED."local_ip",
+        "mac_address" = EXCLUDED."mac_address"
+    RETURNING serial, (xmax = 0) AS was_inserted
+"""
+
+# Bulk load of the Monday hardware registry through a COPY staging table
+CREATE_HARDWARE_STAGE = """
+    CREATE TEMP TABLE hardware_stage ON COMMIT DROP AS
+    SELECT serial, nadlesnictwo, wieza, status, instalator, czas_start, czas_end, data_produkcji,
+           obudowa, enkoder_katow, enkoder_obrazu, driver_silnika, procesor, modul, gniazdo_glowicy,
+           data_firmware, wylacznik_glowicy, adres, ip_enkodera, kanal_ch, ip_moxy, uwagi
+    FROM "Rejestr_Kamer" WITH NO DATA
+"""
+
+MERGE_HARDWARE_STAGE = """
+INSERT INTO "Rejestr_Kamer"
+(serial, nadlesnictwo, wieza, status, instalator, czas_start, czas_end, data_produkcji,
+ obudowa, enkoder_katow, enkoder_obrazu, driver_silnika, procesor, modul, gniazdo_glowicy,
+ data_firmware, wylacznik_glowicy, adres, ip_enkodera, kanal_ch, ip_moxy, uwagi)
+SELECT DISTINCT ON (serial)
+    serial, nadlesnictwo, wieza, status, instalator, czas_start, czas_end, data_produkcji,
+    obudowa, enkoder_katow, enkoder_obrazu, driver_silnika, procesor, modul, gniazdo_glowicy,
+    data_firmware, wylacznik_glowicy, adres, ip_enkodera, kanal_ch, ip_moxy, uwagi
+FROM hardware_stage
+ORDER BY serial
+ON CONFLICT (serial) DO UPDATE SET
+    nadlesnictwo = EXCLUDED.nadlesnictwo,
+    wieza = EXCLUDED.wieza,
+    status = EXCLUDED.status,
+    instalator = EXCLUDED.instalator,
+    czas_start = EXCLUDED.czas_start,
+    czas_end = EXCLUDED.czas_end,
+    data_produkcji = EXCLUDED.data_produkcji,
+    obudowa = EXCLUDED.obudowa,
+    enkoder_katow = EXCLUDED.enkoder_katow,
+    enkoder_obrazu = EXCLUDED.enkoder_obrazu,
+    driver_silnika = EXCLUDED.driver_silnika,
+    procesor = EXCLUDED.procesor,
+    modul = EXCLUDED.modul,
+    gniazdo_glowicy = EXCLUDED.gniazdo_glowicy,
+    data_firmware = EXCLUDED.data_firmware,
+    wylacznik_glowicy = EXCLUDED.wylacznik_glowicy,
+    adres = EXCLUDED.adres,
+    ip_enkodera = EXCLUDED.ip_enkodera,
+    kanal_ch = EXCLUDED.kanal_ch,
+    ip_moxy = EXCLUDED.ip_moxy,
+    uwagi = EXCLUDED.uwagi;
+"""
+
+# Keyset-paginated detector history; {filters} is built only from the
+# DETECTOR_HISTORY_FILTERS fragments below and {limit} from HISTORY_PAGE_LIMIT.
+# NULL data/godzina sort as -infinity/00:00 in the ORDER BY, the cursor
+# predicate and the hist_det_keyset_coalesce_idx index alike
+GET_DETECTOR_HISTORY_KEYSET = """
+SELECT 
+    h.id,
+    h.serial,
+    h.typ,
+    h.data,
+    h.godzina,
+    h.id_wiezy,
+    w."Nazwa" AS tower_name,
+    h.slack,
+    h.nazwa,
+    h.nazwastara,
+    h.pokrycie,
+    h.parametry,
+    h.azymut,
+    h.horyzont,
+    h.dziennik,
+    h.boxy,
+    h.boxystare,
+    h.desktop,
+    h.winbox,
+    h.monday,
+    h.usluga,
+    h.upublicznienie,
+    h.sponsor,
+    h.priv,
+    h.skrypt
+FROM hist_det h
+LEFT JOIN "Wieze" w ON h.id_wiezy = w."ID"
+WHERE h.serial = %s
+{filters}
+ORDER BY COALESCE(h.data, '-infinity'::date) DESC, COALESCE(h.godzina, '00:00'::time) DESC, h.id DESC
+{limit}
+"""
+
+DETECTOR_HISTORY_FILTERS = {
+    'after': "AND (COALESCE(h.data, '-infinity'::date), COALESCE(h.godzina, '00:00'::time), h.id) "
+             "< (%s::date, %s::time, %s)",
+    'date_from': "AND h.data >= %s",
+    'date_to': "AND h.data <= %s",
+    'typ': "AND h.typ = %s",
+}
+
+HISTORY_PAGE_LIMIT = "LIMIT %s"
+
+# Maintenance of the hist_det_latest projection
+REBUILD_HIST_DET_LATEST = """
+    LOCK TABLE hist_det IN SHARE MODE;
+    DELETE FROM hist_det_latest;
+    INSERT INTO hist_det_latest
+    SELECT DISTINCT ON (serial) *
+    FROM hist_det
+    ORDER BY serial, data DESC, godzina DESC, id DESC;
+"""
+
+CHECK_HIST_DET_LATEST = """
+WITH expected AS (
+    SELECT DISTINCT ON (h.serial) h.*
+    FROM hist_det h
+    ORDER BY h.serial, h.data DESC, h.godzina DESC, h.id DESC
+)
+SELECT
+    COALESCE(e.serial, l.serial) AS serial,
+    e.id AS expected_id,
+    l.id AS actual_id
+FROM expected e
+FULL JOIN hist_det_latest l ON l.serial = e.serial
+WHERE e.id IS DISTINCT FROM l.id
+   OR e::text IS DISTINCT FROM l::text
+ORDER BY 1
+"""
+
+COUNT_HIST_DET_LATEST = """
+    SELECT COUNT(*) FROM hist_det_latest
+"""
+
+
+# Sync run telemetry (apps/sync migration 0001_sync_runs)
+INSERT_SYNC_RUN = """
+    INSERT INTO sync_runs (
+        job, started_at, finished_at, status, error,
+        duration_seconds, fetch_seconds, normalize_seconds, write_seconds,
+        rows_fetched, rows_inserted, rows_updated, rows_unchanged, rows_vanished, rows_rejected
+    ) VALUES (
+        %(job)s, %(started_at)s, now(), %(status)s, %(error)s,
+        %(duration_seconds)s, %(fetch_seconds)s, %(normalize_seconds)s, %(write_seconds)s,
+        %(rows_fetched)s, %(rows_inserted)s, %(rows_updated)s, %(rows_unchanged)s,
+        %(rows_vanished)s, %(rows_rejected)s
+    )
+"""
+
+# Last run of every job plus duration percentiles over the window. The job
+# names come from a skip scan of the (job, started_at DESC) index and each
+# job's last run from one LATERAL probe of it, so neither grows with history
+GET_SYNC_RUN_STATS = """
+WITH RECURSIVE jobs AS (
+    (SELECT job FROM sync_runs ORDER BY job LIMIT 1)
+    UNION ALL
+    SELECT (SELECT s.job FROM sync_runs s WHERE s.job > j.job ORDER BY s.job LIMIT 1)
+    FROM jobs j
+    WHERE j.job IS NOT NULL
+),
+windowed AS (
+    SELECT job,
+           COUNT(*) AS runs,
+           COUNT(*) FILTER (WHERE status <> 'ok') AS failures,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_seconds) AS p50,
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_seconds) AS p95,
+           percentile_cont(0.99) WITHIN GROUP (ORDER BY duration_seconds) AS p99,
+           AVG(rows_fetched) AS avg_rows_fetched
+    FROM sync_runs
+    WHERE started_at >= now() - make_interval(hours => %(window_hours)s)
+    GROUP BY job
+)
+SELECT l.job, l.started_at, l.finished_at, l.status, l.error,
+       l.duration_seconds, l.fetch_seconds, l.normalize_seconds, l.write_seconds,
+       l.rows_fetched, l.rows_inserted, l.rows_updated, l.rows_unchanged,
+       l.rows_vanished, l.rows_rejected,
+       COALESCE(w.runs, 0) AS runs, COALESCE(w.failures, 0) AS failures,
+       w.p50, w.p95, w.p99, w.avg_rows_fetched
+FROM jobs j
+CROSS JOIN LATERAL (
+    SELECT * FROM sync_runs s
+    WHERE s.job = j.job
+    ORDER BY s.started_at DESC
+    LIMIT 1
+) l
+LEFT JOIN windowed w ON w.job = l.job
+WHERE j.job IS NOT NULL
+ORDER BY l.job
+"""
+
+PRUNE_SYNC_RUNS = """
+    DELETE FROM sync_runs
+    WHERE job = %(job)s
+      AND started_at < now() - make_interval(days => %(retention_days)s)
+"""
+
+# Records rejected by the sync batch validators (apps/sync migration 0002);
+# the insert is used with execute_values
+INSERT_SYNC_QUARANTINE = """
+    INSERT INTO sync_quarantine (job, started_at, row_index, error, record)
+    VALUES %s
+"""
+
+PRUNE_SYNC_QUARANTINE = """
+    DELETE FROM sync_quarantine
+    WHERE job = %(job)s
+      AND started_at < now() - make_interval(days => %(retention_days)s)
+"""
+
+GET_SYNC_QUARANTINE = """
+    SELECT job, started_at, row_index, error, record
+    FROM sync_quarantine
+    WHERE (%(job)s::text IS NULL OR job = %(job)s)
+    ORDER BY started_at DESC, row_index
+    LIMIT %(limit)s
+"""
+
+# Detector sync status in a single scan of "Detektory"
+GET_DETECTOR_SYNC_STATUS = """
+    SELECT COUNT(*) AS total_detectors,
+           MAX("live_view_updated_at") AS last_sync,
+           COUNT(*) FILTER (WHERE "live_view_updated_at" IS NULL) AS missing_live_view
+    FROM public."Detektory"
+"""
+
+# Bulk cascade deletes (apps/towers). Each is one data-modifying CTE: towers,
+# their detectors and the detectors' history go in one statement, history
+# rows are copied to hist_det_archive, and one row of counts is returned per
+# requested ID. CTEs share one snapshot, so every step joins on the rows
+# RETURNed by the previous one rather than re-reading the table.
+BULK_DELETE_INSTITUTIONS = """
+WITH requested AS (
+    SELECT DISTINCT unnest(%(ids)s::integer[]) AS id
+),
+deleted_institutions AS (
+    DELETE FROM "PAD" p
+    USING requested r
+    WHERE p."ID" = r.id
+    RETURNING p."ID"
+),
+deleted_towers AS (
+    DELETE FROM "Wieze" w
+    USING requested r
+    WHERE w."Instytucja_ID" = r.id
+    RETURNING w."ID", w."Instytucja_ID"
+),
+deleted_detectors AS (
+    DELETE FROM "Detektory" d
+    USING deleted_towers t
+    WHERE d."Wieza_ID" = t."ID"
+    RETURNING d."serial", t."Instytucja_ID"
+),
+deleted_history AS (
+    DELETE FROM hist_det h
+    USING deleted_detectors d
+    WHERE h.serial = d."serial"
+    RETURNING h.*
+),
+archived AS (
+    INSERT INTO hist_det_archive
+    SELECT h.*, now(), %(reason)s
+    FROM deleted_history h
+    RETURNING serial
+)
+SELECT r.id,
+       di."ID" IS NOT NULL AS deleted,
+       COALESCE(t.towers, 0) AS towers,
+       COALESCE(d.detectors, 0) AS detectors,
+       COALESCE(a.history_archived, 0) AS history_archived
+FROM requested r
+LEFT JOIN deleted_institutions di ON di."ID" = r.id
+LEFT JOIN (
+    SELECT "Instytucja_ID" AS id, COUNT(*) AS towers FROM deleted_towers GROUP BY 1
+) t ON t.id = r.id
+LEFT JOIN (
+    SELECT "Instytucja_ID" AS id, COUNT(*) AS detectors FROM deleted_detectors GROUP BY 1
+) d ON d.id = r.id
+LEFT JOIN (
+    SELECT d."Instytucja_ID" AS id, COUNT(*) AS history_archived
+    FROM archived a
+    JOIN deleted_detectors d ON d."serial" = a.serial
+    GROUP BY 1
+) a ON a.id = r.id
+ORDER BY r.id
+"""
+
+BULK_DELETE_TOWERS = """
+WITH requested AS (
+    SELECT DISTINCT unnest(%(ids)s::integer[]) AS id
+),
+deleted_towers AS (
+    DELETE FROM "Wieze" w
+    USING requested r
+    WHERE w."ID" = r.id
+    RETURNING w."ID"
+),
+deleted_detectors AS (
+    DELETE FROM "Detektory" d
+    USING requested r
+    WHERE d."Wieza_ID" = r.id
+    RETURNING d."serial", d."Wieza_ID"
+),
+deleted_history AS (
+    DELETE FROM hist_det h
+    USING deleted_detectors d
+    WHERE h.serial = d."serial"
+    RETURNING h.*
+),
+archived AS (
+    INSERT INTO hist_det_archive
+    SELECT h.*, now(), %(reason)s
+    FROM deleted_history h
+    RETURNING serial
+)
+SELECT r.id,
+       dt."ID" IS NOT NULL AS deleted,
+       COALESCE(d.detectors, 0) AS detectors,
+       COALESCE(a.history_archived, 0) AS history_archived
+FROM requested r
+LEFT JOIN deleted_towers dt ON dt."ID" = r.id
+LEFT JOIN (
+    SELECT "Wieza_ID" AS id, COUNT(*) AS detectors FROM deleted_detectors GROUP BY 1
+) d ON d.id = r.id
+LEFT JOIN (
+    SELECT d."Wieza_ID" AS id, COUNT(*) AS history_archived
+    FROM archived a
+    JOIN deleted_detectors d ON d."serial" = a.serial
+    GROUP BY 1
+) a ON a.id = r.id
+ORDER BY r.id
+"""
+
+# Bulk tower import (apps/towers/importer.py). Raw values are COPYed into a
+# text-typed stage, cast and matched to existing towers set-wise, validated
+# in one query and upserted in one statement. A row updates the tower with
+# its "ID", or else the tower of the same institution with the same name
+# (case-insensitive); otherwise it inserts a new tower. Empty cells keep the
+# stored value on update.
+CREATE_TOWER_IMPORT_STAGE = """
+    CREATE TEMP TABLE tower_import_stage (
+        row_number integer PRIMARY KEY,
+        "ID" text,
+        "Nazwa" text,
+        "Instytucja_ID" text,
+        "Wspolrzedne_X" text,
+        "Wspolrzedne_Y" text,
+        "Skrypt_od" text,
+        "Skrypt_do" text,
+        "Usluga" text,
+        "Gwarancja" text,
+        "Serwis" text,
+        "Wersja_aplikacji" text,
+        "Instalator" text,
+        "Instrukcja" text,
+        "Azymut" text,
+        "Trasa" text,
+        "Poziom" text,
+        "Uwagi" text,
+        "box" text,
+        id_int integer,
+        institution_int integer,
+        x double precision,
+        y double precision,
+        box_int bigint,
+        tower_id integer,
+        name_matches integer
+    ) ON COMMIT DROP
+"""
+
+PREPARE_TOWER_IMPORT_STAGE = """
+    UPDATE tower_import_stage SET
+        id_int = CASE WHEN "ID" ~ '^[0-9]{1,9}$' THEN "ID"::integer END,
+        institution_int = CASE WHEN "Instytucja_ID" ~ '^[0-9]{1,9}$' THEN "Instytucja_ID"::integer END,
+        x = CASE WHEN "Wspolrzedne_X" ~ '^[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)$'
+                 THEN "Wspolrzedne_X"::double precision END,
+        y = CASE WHEN "Wspolrzedne_Y" ~ '^[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)$'
+                 THEN "Wspolrzedne_Y"::double precision END,
+        box_int = CASE WHEN "box" ~ '^[0-9]{1,18}$' THEN "box"::bigint END;
+
+    UPDATE tower_import_stage s
+    SET tower_id = w."ID"
+    FROM "Wieze" w
+    WHERE w."ID" = s.id_int;
+
+    UPDATE tower_import_stage s
+    SET tower_id = m.tower_id, name_matches = m.matches
+    FROM (
+        SELECT s2.row_number, MIN(w."ID") AS tower_id, COUNT(*) AS matches
+        FROM tower_import_stage s2
+        JOIN "Wieze" w ON w."Instytucja_ID" = s2.institution_int
+                      AND lower(btrim(w."Nazwa")) = lower(s2."Nazwa")
+        WHERE s2."ID" IS NULL
+        GROUP BY s2.row_number
+    ) m
+    WHERE s.row_number = m.row_number;
+
+    ANALYZE tower_import_stage;
+"""
+
+VALIDATE_TOWER_IMPORT_STAGE = """
+WITH duplicate_keys AS (
+    SELECT row_number,
+           MIN(row_number) OVER (PARTITION BY COALESCE(tower_id::text, institution_int || '/' || lower("Nazwa"))) AS first_row,
+           MIN(row_number) OVER (PARTITION BY box_int) AS first_box_row
+    FROM tower_import_stage
+    WHERE tower_id IS NOT NULL OR (institution_int IS NOT NULL AND "Nazwa" IS NOT NULL)
+),
+errors AS (
+    SELECT row_number, 'ID' AS "column", 'ID must be a positive integer' AS message
+    FROM tower_import_stage WHERE "ID" IS NOT NULL AND id_int IS NULL
+    UNION ALL
+    SELECT row_number, 'ID', 'Tower ' || id_int || ' does not exist'
+    FROM tower_import_stage WHERE id_int IS NOT NULL AND tower_id IS NULL
+    UNION ALL
+    SELECT row_number, 'Nazwa', 'Nazwa is required for new towers'
+    FROM tower_import_stage WHERE "ID" IS NULL AND "Nazwa" IS NULL
+    UNION ALL
+    SELECT row_number, 'Instytucja_ID', 'Instytucja_ID must be a positive integer'
+    FROM tower_import_stage WHERE "Instytucja_ID" IS NOT NULL AND institution_int IS NULL
+    UNION ALL
+    SELECT row_number, 'Instytucja_ID', 'Instytucja_ID is required for new towers'
+    FROM tower_import_stage WHERE "ID" IS NULL AND "Instytucja_ID" IS NULL
+    UNION ALL
+    SELECT s.row_number, 'Instytucja_ID', 'Institution ' || s.institution_int || ' does not exist'
+    FROM tower_import_stage s
+    WHERE s.institution_int IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM "PAD" p WHERE p."ID" = s.institution_int)
+    UNION ALL
+    SELECT row_number, 'Wspolrzedne_X', 'X coordinate must be a number between -180 and 180'
+    FROM tower_import_stage
+    WHERE "Wspolrzedne_X" IS NOT NULL AND (x IS NULL OR x NOT BETWEEN -180 AND 180)
+    UNION ALL
+    SELECT row_number, 'Wspolrzedne_Y', 'Y coordinate must be a number between -90 and 90'
+    FROM tower_import_stage
+    WHERE "Wspolrzedne_Y" IS NOT NULL AND (y IS NULL OR y NOT BETWEEN -90 AND 90)
+    UNION ALL
+    SELECT row_number, 'Wspolrzedne_Y', 'New towers need both coordinates or neither'
+    FROM tower_import_stage
+    WHERE tower_id IS NULL AND ("Wspolrzedne_X" IS NULL) <> ("Wspolrzedne_Y" IS NULL)
+    UNION ALL
+    SELECT row_number, 'box', 'box must be a box serial number'
+    FROM tower_import_stage WHERE "box" IS NOT NULL AND box_int IS NULL
+    UNION ALL
+    SELECT s.row_number, 'box', 'Box ' || s.box_int || ' does not exist'
+    FROM tower_import_stage s
+    WHERE s.box_int IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM "Boxes" b WHERE b."serial" = s.box_int)
+    UNION ALL
+    SELECT row_number, 'Nazwa', name_matches || ' towers of this institution are named ' || "Nazwa"
+    FROM tower_import_stage WHERE name_matches > 1
+    UNION ALL
+    SELECT row_number, 'Nazwa', 'Same tower as row ' || first_row
+    FROM duplicate_keys WHERE row_number <> first_row
+    UNION ALL
+    SELECT d.row_number, 'box', 'Same box as row ' || d.first_box_row
+    FROM duplicate_keys d
+    JOIN tower_import_stage s USING (row_number)
+    WHERE s.box_int IS NOT NULL AND d.row_number <> d.first_box_row
+)
+SELECT row_number, "column", message
+FROM errors
+ORDER BY row_number, "column"
+"""
+
+UPSERT_TOWER_IMPORT_STAGE = """
+WITH src AS (
+    SELECT *
+    FROM tower_import_stage
+    WHERE row_number <> ALL(%(rejected)s::integer[])
+),
+changes AS (
+    SELECT src.row_number, w."ID",
+           COALESCE(src."Nazwa", w."Nazwa") AS "Nazwa",
+           COALESCE(src.institution_int, w."Instytucja_ID") AS "Instytucja_ID",
+           COALESCE(src.x, w."Wspolrzedne_X") AS "Wspolrzedne_X",
+           COALESCE(src.y, w."Wspolrzedne_Y") AS "Wspolrzedne_Y",
+           COALESCE(src."Skrypt_od", w."Skrypt_od") AS "Skrypt_od",
+           COALESCE(src."Skrypt_do", w."Skrypt_do") AS "Skrypt_do",
+           COALESCE(src."Usluga", w."Usluga") AS "Usluga",
+           COALESCE(src."Gwarancja", w."Gwarancja") AS "Gwarancja",
+           COALESCE(src."Serwis", w."Serwis") AS "Serwis",
+           COALESCE(src."Wersja_aplikacji", w."Wersja_aplikacji") AS "Wersja_aplikacji",
+           COALESCE(src."Instalator", w."Instalator") AS "Instalator",
+           COALESCE(src."Instrukcja", w."Instrukcja") AS "Instrukcja",
+           COALESCE(src."Azymut", w."Azymut") AS "Azymut",
+           COALESCE(src."Trasa", w."Trasa") AS "Trasa",
+           COALESCE(src."Poziom", w."Poziom") AS "Poziom",
+           COALESCE(src."Uwagi", w."Uwagi") AS "Uwagi",
+           COALESCE(src.box_int, w."box") AS "box"
+    FROM src
+    JOIN "Wieze" w ON w."ID" = src.tower_id
+),
+updated AS (
+    UPDATE "Wieze" w SET
+        "Nazwa" = c."Nazwa",
+        "Instytucja_ID" = c."Instytucja_ID",
+        "Wspolrzedne_X" = c."Wspolrzedne_X",
+        "Wspolrzedne_Y" = c."Wspolrzedne_Y",
+        "Skrypt_od" = c."Skrypt_od",
+        "Skrypt_do" = c."Skrypt_do",
+        "Usluga" = c."Usluga",
+        "Gwarancja" = c."Gwarancja",
+        "Serwis" = c."Serwis",
+        "Wersja_aplikacji" = c."Wersja_aplikacji",
+        "Instalator" = c."Instalator",
+        "Instrukcja" = c."Instrukcja",
+        "Azymut" = c."Azymut",
+        "Trasa" = c."Trasa",
+        "Poziom" = c."Poziom",
+        "Uwagi" = c."Uwagi",
+        "box" = c."box"
+    FROM changes c
+    WHERE w."ID" = c."ID"
+      AND (w."Nazwa", w."Instytucja_ID", w."Wspolrzedne_X", w."Wspolrzedne_Y", w."Skrypt_od",
+           w."Skrypt_do", w."Usluga", w."Gwarancja", w."Serwis", w."Wersja_aplikacji",
+           w."Instalator", w."Instrukcja", w."Azymut", w."Trasa", w."Poziom", w."Uwagi", w."box")
+          IS DISTINCT FROM
+          (c."Nazwa", c."Instytucja_ID", c."Wspolrzedne_X", c."Wspolrzedne_Y", c."Skrypt_od",
+           c."Skrypt_do", c."Usluga", c."Gwarancja", c."Serwis", c."Wersja_aplikacji",
+           c."Instalator", c."Instrukcja", c."Azymut", c."Trasa", c."Poziom", c."Uwagi", c."box")
+    RETURNING w."ID"
+),
+inserted AS (
+    INSERT INTO "Wieze" (
+        "Nazwa", "Instytucja_ID", "Wspolrzedne_X", "Wspolrzedne_Y",
+        "Skrypt_od", "Skrypt_do", "Usluga",
+        "Gwarancja", "Serwis", "Wersja_aplikacji", "Instalator", "Instrukcja",
+        "Azymut", "Trasa", "Poziom", "Uwagi", "box"
+    )
+    SELECT "Nazwa", institution_int, x, y,
+           "Skrypt_od", "Skrypt_do", "Usluga",
+           "Gwarancja", "Serwis", "Wersja_aplikacji", "Instalator", "Instrukcja",
+           "Azymut", "Trasa", "Poziom", "Uwagi", box_int
+    FROM src
+    WHERE tower_id IS NULL
+    ORDER BY row_number
+    RETURNING "ID", "Nazwa", "Instytucja_ID"
+)
+SELECT src.row_number,
+       COALESCE(src.tower_id, i."ID") AS "ID",
+       CASE
+           WHEN src.tower_id IS NULL THEN 'inserted'
+           WHEN u."ID" IS NOT NULL THEN 'updated'
+           ELSE 'unchanged'
+       END AS status
+FROM src
+LEFT JOIN updated u ON u."ID" = src.tower_id
+LEFT JOIN inserted i ON src.tower_id IS NULL
+                    AND i."Instytucja_ID" = src.institution_int
+                    AND lower(btrim(i."Nazwa")) = lower(src."Nazwa")
+ORDER BY src.row_number
+"""
+
+# In-process detector registry (apps/detectors/registry.py)
+LOAD_DETECTOR_REGISTRY = """
+    SELECT "serial", "Wieza_ID", "name"
+    FROM "Detektory"
+"""
+
+LOAD_DETECTOR_REGISTRY_SERIALS = """
+    SELECT "serial", "Wieza_ID", "name"
+    FROM "Detektory"
+    WHERE "serial" = ANY(%s)
+"""
+
+LOAD_TOWER_REGISTRY = """
+    SELECT w."ID", w."Nazwa", w."Instytucja_ID", p."Nazwa"
+    FROM "Wieze" w
+    LEFT JOIN "PAD" p ON w."Instytucja_ID" = p."ID"
+"""
+
+# Tower points for the in-process spatial index (apps/map/spatial.py)
+LOAD_TOWER_POINTS = """
+    SELECT w."ID", w."Nazwa", w."Instytucja_ID", p."Nazwa" AS "Nadlesnictwo",
+           w."Wspolrzedne_X", w."Wspolrzedne_Y", w."Azymut"
+    FROM "Wieze" w
+    LEFT JOIN "PAD" p ON w."Instytucja_ID" = p."ID"
+    WHERE w."Wspolrzedne_X" IS NOT NULL AND w."Wspolrzedne_Y" IS NOT NULL
+"""
+
+# Tower status for the map cluster index (apps/map/clusters.py); detectors
+# present means at least one Detektory row is assigned to the tower
+LOAD_MAP_CLUSTER_TOWERS = """
+    SELECT w."ID", w."Wspolrzedne_X", w."Wspolrzedne_Y", w."Usluga", w."Serwis",
+           EXISTS (SELECT 1 FROM "Detektory" d WHERE d."Wieza_ID" = w."ID") AS "Detektory"
+    FROM "Wieze" w
+    WHERE w."Wspolrzedne_X" IS NOT NULL AND w."Wspolrzedne_Y" IS NOT NULL
+"""
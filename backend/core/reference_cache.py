@@ -0,0 +1,137 @@
+"""
+Read-through cache for reference data (institutions and towers).
+
+Entries have per-key TTLs and a bounded size. Triggers on PAD, Wieze and
+Boxes send NOTIFY on the ``reference_data_changed`` channel with the table
+name; every process drops the entries depending on that table as soon as
+the notification arrives. While the LISTEN connection is down the cache is
+bypassed, so reads are never served from entries that could be stale.
+Cached values are shared between callers and must not be mutated.
+"""
+import time
+import logging
+import threading
+from cachetools import TLRUCache
+from core.connection import db_cursor_readonly
+from core.notifications import subscribe
+from core.queries import (
+    GET_ALL_INSTITUTIONS, GET_ALL_TOWERS, GET_TOWER_DETAILS_BY_ID
+)
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CHANNEL = 'reference_data_changed'
+CACHE_MAX_ENTRIES = 2048
+
+# key namespace -> (TTL in seconds, tables the result depends on)
+CACHE_POLICIES = {
+    'institutions': (300, ('PAD',)),
+    'towers': (300, ('Wieze', 'PAD', 'Boxes')),
+    'tower_details': (120, ('Wieze', 'PAD', 'Boxes')),
+}
+
+
+def _entry_expiry(_key, entry, _now):
+    return entry[0]
+
+
+class ReferenceCache:
+    """Size-bounded TTL cache whose entries are invalidated per source table"""
+
+    def __init__(self, maxsize=CACHE_MAX_ENTRIES):
+        self._cache = TLRUCache(maxsize=maxsize, ttu=_entry_expiry, timer=time.monotonic)
+        self._by_table = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for ``key`` or load it with ``loader()``.
+        ``key`` is a tuple whose first element names a CACHE_POLICIES entry.
+        """
+        listener = self._ensure_listener()
+        ttl, tables = CACHE_POLICIES[key[0]]
+
+        if listener.connected:
+            with self._lock:
+                entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+
+        self.misses += 1
+        with self._lock:
+            generations = [self._generations.get(t, 0) for t in tables]
+        value = loader()
+
+        with self._lock:
+            # Skip caching when a table changed while we were loading
+            unchanged = generations == [self._generations.get(t, 0) for t in tables]
+            if listener.connected and unchanged:
+                self._cache[key] = (time.monotonic() + ttl, value)
+                for table in tables:
+                    self._by_table.setdefault(table, set()).add(key)
+        return value
+
+    def invalidate_table(self, table):
+        """Drop every entry that depends on ``table``"""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            keys = self._by_table.pop(table, set())
+            for key in keys:
+                self._cache.pop(key, None)
+            self.invalidations += 1
+        logger.debug(f"Reference cache: {len(keys)} entries dropped after change in {table}")
+
+    def clear(self):
+        with self._lock:
+            for table in list(self._generations) + list(self._by_table):
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._cache.clear()
+            self._by_table.clear()
+
+    def _ensure_listener(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = subscribe(REFERENCE_CHANNEL, self.invalidate_table, on_reconnect=self.clear)
+        return self._listener
+
+
+reference_cache = ReferenceCache()
+
+
+def invalidate_tables(*tables):
+    """Drop local entries right after a write, before the NOTIFY arrives"""
+    for table in tables:
+        reference_cache.invalidate_table(table)
+
+
+def _fetch_dicts(query, params=None):
+    with db_cursor_readonly() as cursor:
+        cursor.execute(query, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_all_institutions():
+    """GET_ALL_INSTITUTIONS as a list of dicts"""
+    return reference_cache.get_or_load(('institutions',), lambda: _fetch_dicts(GET_ALL_INSTITUTIONS))
+
+
+def get_all_towers():
+    """GET_ALL_TOWERS as a list of dicts"""
+    return reference_cache.get_or_load(('towers',), lambda: _fetch_dicts(GET_ALL_TOWERS))
+
+
+def get_tower_details(tower_id):
+    """GET_TOWER_DETAILS_BY_ID as a dict, or None if the tower does not exist"""
+    def load():
+        rows = _fetch_dicts(GET_TOWER_DETAILS_BY_ID, (tower_id,))
+        return rows[0] if rows else None
+    return reference_cache.get_or_load(('tower_details', int(tower_id)), load)
+
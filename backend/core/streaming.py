@@ -0,0 +1,304 @@
+"""
+Streaming JSON list and CSV responses.
+Rows are read from a server-side (named) cursor STREAM_BATCH_ROWS at a
+time, encoded straight to bytes and, when the client accepts it,
+compressed batch by batch with brotli or gzip. Neither the result set nor
+the response body is ever held in memory as a whole, so time to first
+byte and worker memory stay flat as the tables grow. orjson and brotli are
+used when installed; without them the stdlib json encoder and gzip are
+used.
+
+The body iterator matches the handler serving the request: under ASGI
+(config.asgi) it is an async iterator whose fetching, encoding and
+compressing run in a worker thread; under WSGI (waitress) it is a plain
+iterator, since Django buffers an async body completely before sending it
+to a WSGI server. Either way each batch is sent as soon as it is encoded.
+A download can last as long as the client is slow to read, so streams use
+their own connection instead of a pooled one, and at most
+MAX_CONCURRENT_STREAMS run per process.
+
+Example:
+    return streaming_json_response(request, GET_ALL_HARDWARE)
+"""
+import io
+import os
+import csv
+import json
+import uuid
+import zlib
+import logging
+import threading
+from datetime import date, time
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from core.connection import get_connection
+from core.instrumentation import InstrumentedCursor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_ROWS = 2000
+MAX_CONCURRENT_STREAMS = int(os.getenv('DB_MAX_STREAMS', '4'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+_stream_slots = threading.BoundedSemaphore(MAX_CONCURRENT_STREAMS)
+
+
+class StreamLimitReached(Exception):
+    """MAX_CONCURRENT_STREAMS downloads are already running in this process"""
+
+
+def _default(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def encode_row(row):
+        return orjson.dumps(row, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+else:
+    def encode_row(row):
+        return json.dumps(row, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick 'br', 'gzip' or None from an Accept-Encoding header"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', accepted.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+
+class ChunkCompressor:
+    """Streaming br/gzip compressor, flushed after every chunk so it reaches the client"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        if self.encoding == 'gzip':
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return chunk
+
+    def finish(self, chunk=b''):
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.finish()
+        if self.encoding == 'gzip':
+            return self._compressor.compress(chunk) + self._compressor.flush()
+        return chunk
+
+
+class JsonArrayFormat:
+    """Rows as the objects of one JSON array"""
+    content_type = 'application/json'
+
+    def begin(self, columns):
+        return b'['
+
+    def rows(self, columns, rows, first):
+        body = b','.join(encode_row(dict(zip(columns, row))) for row in rows)
+        return body if first else b',' + body
+
+    def end(self):
+        return b']'
+
+
+class CsvFormat:
+    """Rows as UTF-8 CSV lines after a header line of the column names"""
+    content_type = 'text/csv; charset=utf-8'
+
+    def _lines(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def begin(self, columns):
+        return self._lines([columns])
+
+    def rows(self, columns, rows, first):
+        return self._lines(rows)
+
+    def end(self):
+        return b''
+
+
+class QueryStream:
+    """
+    A query's rows as chunks in ``row_format``, read through a named cursor
+    on a dedicated connection. Opening it runs the query and fetches the
+    first batch, so database errors surface before the response starts.
+    """
+
+    def __init__(self, query, params=None, encoding=None, batch_rows=STREAM_BATCH_ROWS, row_format=None):
+        self.conn = None
+        self.closed = True
+        self._close_lock = threading.Lock()
+        if not _stream_slots.acquire(blocking=False):
+            raise StreamLimitReached(f"At most {MAX_CONCURRENT_STREAMS} concurrent downloads")
+        self.closed = False
+        self.batch_rows = batch_rows
+        self.format = row_format or JsonArrayFormat()
+        self.compressor = ChunkCompressor(encoding)
+        try:
+            self.conn = get_connection()
+            self.cursor = self.conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=InstrumentedCursor)
+            self.cursor.execute(query, params)
+            self._rows = self.cursor.fetchmany(batch_rows)
+            self.columns = [col[0] for col in self.cursor.description]
+        except Exception:
+            self.close()
+            raise
+        self._head = self.format.begin(self.columns)
+        self._first = True
+
+    def next_chunk(self):
+        """The next compressed chunk, or None when the body is complete"""
+        if self._rows is None:
+            return None
+        if not self._rows:
+            self._rows = None
+            return self.compressor.finish(self._head + self.format.end())
+        chunk = self._head + self.format.rows(self.columns, self._rows, self._first)
+        self._head = b''
+        self._first = False
+        self._rows = self.cursor.fetchmany(self.batch_rows)
+        return self.compressor.compress(chunk)
+
+    def close(self):
+        with self._close_lock:
+            if self.closed:
+                return
+            self.closed = True
+        try:
+            if self.conn is not None:
+                # Ends the read transaction and drops the server-side cursor with it
+                self.conn.close()
+        except Exception as e:
+            logger.warning(f"Closing stream connection failed: {e}")
+        finally:
+            _stream_slots.release()
+
+    def __del__(self):
+        # A response that is never sent must not keep its connection and slot
+        self.close()
+
+
+def _iter_chunks(stream, label):
+    try:
+        while True:
+            chunk = stream.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+    except Exception as e:
+        # Headers are already sent; the client sees a truncated body
+        logger.error(f"Streaming {label} failed mid-response: {e}")
+        raise
+    finally:
+        stream.close()
+
+
+async def _stream_chunks(stream, label):
+    try:
+        while True:
+            chunk = await sync_to_async(stream.next_chunk, thread_sensitive=False)()
+            if chunk is None:
+                return
+            yield chunk
+    except Exception as e:
+        # Headers are already sent; the client sees a truncated body
+        logger.error(f"Streaming {label} failed mid-response: {e}")
+        raise
+    finally:
+        stream.close()
+
+
+def _streaming_response(request, query, params, label, row_format):
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+    stream = QueryStream(query, params, encoding, row_format=row_format)
+
+    # DRF wraps the HttpRequest; the handler type tells ASGI from WSGI
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _stream_chunks(stream, label)
+    else:
+        chunks = _iter_chunks(stream, label)
+    response = StreamingHttpResponse(chunks, content_type=row_format.content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def streaming_json_response(request, query, params=None, label='list'):
+    """
+    Stream a query's rows as a JSON array.
+
+    Args:
+        request: Django/DRF request (Accept-Encoding is honoured)
+        query: SQL from core/queries.py
+        params: Query parameters
+        label: Name used in log messages
+
+    Returns:
+        StreamingHttpResponse: application/json, possibly br/gzip encoded
+
+    Raises:
+        StreamLimitReached: Too many downloads running; answer 503
+    """
+    return _streaming_response(request, query, params, label, JsonArrayFormat())
+
+
+def streaming_csv_response(request, query, params=None, filename='export.csv', label='export'):
+    """
+    Stream a query's rows as a CSV attachment with a header line.
+
+    Args:
+        request: Django/DRF request (Accept-Encoding is honoured)
+        query: SQL from core/queries.py
+        params: Query parameters
+        filename: Name offered in Content-Disposition
+        label: Name used in log messages
+
+    Returns:
+        StreamingHttpResponse: text/csv, possibly br/gzip encoded
+
+    Raises:
+        StreamLimitReached: Too many downloads running; answer 503
+    """
+    response = _streaming_response(request, query, params, label, CsvFormat())
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,192 @@
+"""
+Persistent telemetry of sync runs.
+Each run of a sync function records its phase timings, row counts and
+error in the sync_runs table, and a sample of the payload records it
+rejected or stored with a blanked optional field in sync_quarantine. Both
+tables are pruned per job as new runs are recorded. Recording is best
+effort: a failure to write telemetry is logged and never fails the sync
+itself.
+"""
+import json
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from psycopg2.extras import Json, execute_values
+from core.connection import db_cursor, db_cursor_readonly
+from core.queries import (
+    INSERT_SYNC_RUN, PRUNE_SYNC_RUNS, GET_SYNC_RUN_STATS,
+    INSERT_SYNC_QUARANTINE, PRUNE_SYNC_QUARANTINE, GET_SYNC_QUARANTINE
+)
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('fetch', 'normalize', 'write')
+COUNTERS = ('fetched', 'inserted', 'updated', 'unchanged', 'vanished', 'rejected')
+DEFAULT_WINDOW_HOURS = 24
+# Runs older than this are deleted; also the longest stats window
+SYNC_RUN_RETENTION_DAYS = 90
+# Rejected records kept per run, and for how long
+QUARANTINE_LIMIT = 500
+QUARANTINE_RETENTION_DAYS = 30
+
+
+class SyncRunRecorder:
+    """
+    Context manager measuring one sync run.
+
+    Example:
+        with SyncRunRecorder("boxes") as run:
+            with run.phase("fetch"):
+                payload = ...
+            run.set_counts(fetched=len(payload))
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS)
+        self.quarantined = []
+        self.started_at = None
+        self._start = None
+
+    def __enter__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        status = 'ok' if exc is None else 'failed'
+        error = None if exc is None else f"{exc_type.__name__}: {exc}"[:2000]
+        record_sync_run(self.job, self.started_at, duration, status,
+                        phases=self.phases, counts=self.counts, error=error)
+        if self.quarantined:
+            record_quarantine(self.job, self.started_at, self.quarantined)
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        """Accumulate the time spent inside the block under ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def timed_iter(self, iterable, name):
+        """Yield from ``iterable``, charging the time spent producing items to ``name``"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.phases[name] += time.perf_counter() - start
+                return
+            self.phases[name] += time.perf_counter() - start
+            yield item
+
+    def quarantine(self, rejected):
+        """Keep rejected records ({"index", "error", "record"}) up to QUARANTINE_LIMIT per run"""
+        room = QUARANTINE_LIMIT - len(self.quarantined)
+        if room > 0:
+            self.quarantined.extend(rejected[:room])
+        for entry in rejected[:5]:
+            logger.warning(f"{self.job} sync rejected record {entry['index']}: {entry['error']}")
+
+    def warn(self, warned):
+        """Keep records stored with a blanked optional field, sharing the quarantine limit"""
+        room = QUARANTINE_LIMIT - len(self.quarantined)
+        if room > 0:
+            self.quarantined.extend(warned[:room])
+        for entry in warned[:5]:
+            logger.warning(f"{self.job} sync record {entry['index']}: {entry['error']}")
+        if len(warned) > 5:
+            logger.warning(f"{self.job} sync stored {len(warned)} records with blanked fields")
+
+    def set_counts(self, **counts):
+        for name, value in counts.items():
+            if name in self.counts:
+                self.counts[name] = value
+
+
+def record_sync_run(job, started_at, duration, status, phases=None, counts=None, error=None):
+    """Insert one sync_runs row and prune the job's old runs; errors are logged, never raised"""
+    phases = phases or {}
+    counts = counts or {}
+    try:
+        with db_cursor() as (cursor, conn):
+            cursor.execute(INSERT_SYNC_RUN, {
+                'job': job,
+                'started_at': started_at,
+                'duration_seconds': duration,
+                'fetch_seconds': phases.get('fetch'),
+                'normalize_seconds': phases.get('normalize'),
+                'write_seconds': phases.get('write'),
+                'rows_fetched': counts.get('fetched'),
+                'rows_inserted': counts.get('inserted'),
+                'rows_updated': counts.get('updated'),
+                'rows_unchanged': counts.get('unchanged'),
+                'rows_vanished': counts.get('vanished'),
+                'rows_rejected': counts.get('rejected'),
+                'status': status,
+                'error': error,
+            })
+            cursor.execute(PRUNE_SYNC_RUNS, {'job': job, 'retention_days': SYNC_RUN_RETENTION_DAYS})
+    except Exception as e:
+        logger.warning(f"Could not record {job} sync run: {e}")
+
+
+def record_quarantine(job, started_at, rejected):
+    """Insert rejected records into sync_quarantine and prune old ones; errors are logged, never raised"""
+    rows = [
+        (job, started_at, entry['index'], entry['error'],
+         Json(entry['record'], dumps=lambda value: json.dumps(value, default=str)))
+        for entry in rejected
+    ]
+    try:
+        with db_cursor() as (cursor, conn):
+            execute_values(cursor, INSERT_SYNC_QUARANTINE, rows, page_size=len(rows))
+            cursor.execute(PRUNE_SYNC_QUARANTINE, {'job': job, 'retention_days': QUARANTINE_RETENTION_DAYS})
+    except Exception as e:
+        logger.warning(f"Could not record {job} quarantined records: {e}")
+
+
+def get_quarantine(job=None, limit=100):
+    """Most recently quarantined records, newest run first"""
+    with db_cursor_readonly() as cursor:
+        cursor.execute(GET_SYNC_QUARANTINE, {'job': job, 'limit': limit})
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+
+    entries = []
+    for row in rows:
+        entry = dict(zip(columns, row))
+        entry['started_at'] = entry['started_at'].isoformat()
+        entries.append(entry)
+    return entries
+
+
+def get_sync_run_stats(window_hours=DEFAULT_WINDOW_HOURS):
+    """
+    Last run of every job with p50/p95/p99 of run duration over the window.
+
+    Returns:
+        list: One dict per job, ordered by job name
+    """
+    with db_cursor_readonly() as cursor:
+        cursor.execute(GET_SYNC_RUN_STATS, {'window_hours': window_hours})
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+
+    stats = []
+    for row in rows:
+        record = dict(zip(columns, row))
+        for key in ('started_at', 'finished_at'):
+            if record[key] is not None:
+                record[key] = record[key].isoformat()
+        if record['avg_rows_fetched'] is not None:
+            record['avg_rows_fetched'] = float(record['avg_rows_fetched'])
+        stats.append(record)
+    return stats
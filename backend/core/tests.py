@@ -0,0 +1,211 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import psycopg2
+from psycopg2 import extensions
+from django.test import SimpleTestCase
+
+from core import streaming
+from core.batch_validators import BatchValidator, check_serial, check_pattern, IPV4_PATTERN
+from core.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.pings += 1
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.autocommit = False
+        self.readonly = None
+        self.deferrable = None
+        self._isolation_level = None
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    @property
+    def isolation_level(self):
+        return self._isolation_level
+
+    @isolation_level.setter
+    def isolation_level(self, value):
+        self._isolation_level = None if value == 'default' else value
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def set_session(self, readonly=None, deferrable=None):
+        if readonly == 'default':
+            self.readonly = None
+        if deferrable == 'default':
+            self.deferrable = None
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **kwargs):
+        self.opened = []
+
+        def connect():
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+        return ConnectionPool(connect, **kwargs)
+
+    def test_returned_connection_is_reused(self):
+        pool = self.make_pool(max_size=2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_checkout_pings_by_default(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        pool.getconn()
+        self.assertEqual(conn.pings, 1)
+
+    def test_dead_connection_is_replaced_on_checkout(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.dead = True
+
+        with self.assertLogs('core.pool', 'WARNING'):
+            replacement = pool.getconn()
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['connections_discarded'], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = self.make_pool(max_size=1, checkout_timeout=0.05)
+        pool.getconn()
+        with self.assertRaises(PoolTimeoutError):
+            pool.getconn()
+        self.assertEqual(pool.stats()['checkout_timeouts'], 1)
+
+    def test_waiting_checkout_gets_the_returned_connection(self):
+        pool = self.make_pool(max_size=1, checkout_timeout=5)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+        timer.start()
+        try:
+            self.assertIs(pool.getconn(), conn)
+        finally:
+            timer.join()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time_total'], 0)
+
+    def test_return_rolls_back_and_restores_session_state(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        conn.rollback = mock.Mock(wraps=conn.rollback)
+        pool.putconn(conn)
+        conn.rollback.assert_called_once()
+
+        conn = pool.getconn()
+        conn.autocommit = True
+        conn.readonly = True
+        conn.isolation_level = extensions.ISOLATION_LEVEL_SERIALIZABLE
+        pool.putconn(conn)
+        self.assertFalse(conn.autocommit)
+        self.assertIsNone(conn.readonly)
+        self.assertIsNone(conn.isolation_level)
+
+    def test_expired_connection_is_not_returned_to_the_pool(self):
+        pool = self.make_pool(max_lifetime=0)
+        conn = pool.getconn()
+        time.sleep(0.01)
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+
+class BatchValidatorTests(SimpleTestCase):
+
+    validator = BatchValidator({
+        'serial': check_serial,
+        'local_ip': check_pattern(IPV4_PATTERN, "must be an IPv4 address"),
+    }, unique='serial', optional=('local_ip',))
+
+    def test_serials_are_normalized(self):
+        result = self.validator.validate([{'serial': ' 00123 '}, {'serial': 456}, {'serial': '000'}])
+        self.assertEqual(result.rows(('serial',)), [('123',), ('456',), ('0',)])
+
+    def test_bad_or_missing_serial_rejects_the_record(self):
+        result = self.validator.validate([{'serial': 'SN-1'}, {'serial': None}, {'local_ip': '10.0.0.1'}, 'x'])
+        self.assertEqual(result.valid_count, 0)
+        self.assertEqual([r['error'] for r in result.rejected()], [
+            "serial can only contain digits",
+            "serial is required",
+            "serial is required",
+            "record must be an object",
+        ])
+
+    def test_bad_optional_field_is_stored_as_null_with_a_warning(self):
+        result = self.validator.validate([{'serial': '1', 'local_ip': '10.0.0.300'}, {'serial': '2', 'local_ip': '10.0.0.2'}])
+        self.assertEqual(result.rows(('serial', 'local_ip')), [('1', None), ('2', '10.0.0.2')])
+        self.assertEqual(result.rejected(), [])
+        self.assertEqual([(w['index'], w['error']) for w in result.warned()],
+                         [(0, "local_ip must be an IPv4 address (stored as NULL)")])
+
+    def test_duplicate_serial_keeps_the_last_record(self):
+        result = self.validator.validate([
+            {'serial': '7', 'local_ip': '10.0.0.1'},
+            {'serial': '007', 'local_ip': '10.0.0.2'},
+        ])
+        self.assertEqual(result.rows(('serial', 'local_ip')), [('7', '10.0.0.2')])
+        self.assertEqual(result.rejected()[0]['error'], "serial appears again later in the payload")
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+
+    def test_gzip_is_picked_when_accepted(self):
+        self.assertEqual(streaming.negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(streaming.negotiate_encoding('*'), 'gzip')
+
+    def test_no_encoding_without_an_accepted_one(self):
+        self.assertIsNone(streaming.negotiate_encoding(None))
+        self.assertIsNone(streaming.negotiate_encoding('identity'))
+        self.assertIsNone(streaming.negotiate_encoding('gzip;q=0'))
+        self.assertIsNone(streaming.negotiate_encoding('gzip;q=abc'))
+
+    def test_brotli_only_when_installed(self):
+        with mock.patch.object(streaming, 'brotli', None):
+            self.assertEqual(streaming.negotiate_encoding('br, gzip'), 'gzip')
+        with mock.patch.object(streaming, 'brotli', object()):
+            self.assertEqual(streaming.negotiate_encoding('br, gzip'), 'br')
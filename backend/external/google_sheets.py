@@ -2,50 +2,187 @@
 Google Sheets API integration.
 Provides data export functionality to Google Sheets.
 """
+import time
+import logging
+import threading
 import gspread
+from decimal import Decimal
+from gspread.utils import rowcol_to_a1, ValueRenderOption
 from oauth2client.service_account import ServiceAccountCredentials
 
+logger = logging.getLogger(__name__)
+
+# Maximum number of cells sent in a single batch_update request
+BATCH_CELL_LIMIT = 40000
+
+_client = None
+_client_lock = threading.Lock()
+
 def setup_google_sheets_client():
     """
     Setup Google Sheets client with service account credentials.
-    
+
     Returns:
         gspread.Client: Authorized Google Sheets client
     """
     scope = ['https://spreadsheets.google.com/feeds',
              'https://www.googleapis.com/auth/drive']
-    
+
     creds = ServiceAccountCredentials.from_json_keyfile_name('google-sheets-auth.json', scope)
     client = gspread.authorize(creds)
-    
+
     return client
 
-def export_to_google_sheets(data, spreadsheet_id, worksheet_name):
+def get_google_sheets_client():
     """
-    Export data to specified Google Sheets worksheet.
-    
+    Return the process-wide authorized client, authorizing on first use.
+    The credentials refresh their access token themselves when it expires.
+
+    Returns:
+        gspread.Client: Cached authorized client
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = setup_google_sheets_client()
+    return _client
+
+def _to_cell(value):
+    return '' if value is None else value
+
+def _to_rows(data):
+    """Convert a list of dictionaries into a header row followed by value rows"""
+    headers = list(data[0].keys())
+    rows = [headers]
+    for row in data:
+        rows.append([_to_cell(row.get(h)) for h in headers])
+    return rows
+
+def _comparable(value):
+    """
+    Cell value as a key that matches what an UNFORMATTED_VALUE read returns
+    for it after a RAW write: booleans stay booleans, 1 and 1.0 are the same
+    number, anything else compares as text.
+    """
+    if value is None or value == '':
+        return ('text', '')
+    if isinstance(value, bool):
+        return ('bool', value)
+    if isinstance(value, (int, float, Decimal)):
+        return ('number', float(value))
+    return ('text', str(value))
+
+def _changed_ranges(current, rows, width):
+    """
+    Yield (start_row, block) for contiguous runs of rows that differ from
+    what the sheet currently holds (read unformatted). Rows are 1-based
+    sheet rows.
+    """
+    block_start, block = None, []
+    for index, row in enumerate(rows):
+        existing = current[index] if index < len(current) else []
+        existing = list(existing) + [''] * (width - len(existing))
+        if [_comparable(v) for v in row] != [_comparable(v) for v in existing[:width]]:
+            if block_start is None:
+                block_start = index + 1
+            block.append(row)
+        elif block:
+            yield block_start, block
+            block_start, block = None, []
+    if block:
+        yield block_start, block
+
+def _chunked_updates(ranges, width):
+    """Group range updates into batches of at most BATCH_CELL_LIMIT cells"""
+    rows_per_chunk = max(1, BATCH_CELL_LIMIT // max(width, 1))
+    batch, cells = [], 0
+    for start_row, block in ranges:
+        for offset in range(0, len(block), rows_per_chunk):
+            part = block[offset:offset + rows_per_chunk]
+            first = start_row + offset
+            batch.append({
+                'range': f"{rowcol_to_a1(first, 1)}:{rowcol_to_a1(first + len(part) - 1, width)}",
+                'values': part,
+            })
+            cells += len(part) * width
+            if cells >= BATCH_CELL_LIMIT:
+                yield batch
+                batch, cells = [], 0
+    if batch:
+        yield batch
+
+def sync_to_google_sheets(data, spreadsheet_id, worksheet_name, incremental=False):
+    """
+    Write data to a worksheet using chunked batch updates.
+
     Args:
         data: List of dictionaries to export
         spreadsheet_id: Google Sheets spreadsheet ID
         worksheet_name: Name of worksheet to update
-        
+        incremental: Read the sheet once and rewrite only the rows that changed
+
     Returns:
-        bool: True if export successful
+        dict: Rows written, ranges updated, API calls and duration
     """
-    client = setup_google_sheets_client()
+    start_time = time.perf_counter()
+    stats = {"rows": len(data), "rows_written": 0, "ranges_updated": 0, "api_calls": 0}
+
+    client = get_google_sheets_client()
     sheet = client.open_by_key(spreadsheet_id)
     worksheet = sheet.worksheet(worksheet_name)
-    
-    # Clear existing data
-    worksheet.clear()
-    
-    # Export new data
-    if data:
-        # Convert data to list format for Google Sheets
-        headers = list(data[0].keys())
-        worksheet.append_row(headers)
-        
-        for row in data:
-            worksheet.append_row(list(row.values()))
-    
+    stats["api_calls"] += 2
+
+    rows = _to_rows(data) if data else []
+    width = len(rows[0]) if rows else 0
+
+    if incremental and rows:
+        # Unformatted values, so TRUE, 1 or a date format in the sheet do not hide equal cells
+        current = worksheet.get_all_values(value_render_option=ValueRenderOption.unformatted)
+        stats["api_calls"] += 1
+        current_width = max((len(r) for r in current), default=0)
+        ranges = list(_changed_ranges(current, rows, width))
+        if len(current) > len(rows) or current_width > width:
+            # Stale rows or columns beyond the new data are cleared in one call
+            worksheet.batch_clear([
+                f"{rowcol_to_a1(len(rows) + 1, 1)}:{rowcol_to_a1(max(len(current), len(rows) + 1), max(current_width, 1))}",
+                f"{rowcol_to_a1(1, width + 1)}:{rowcol_to_a1(max(len(current), 1), max(current_width, width + 1))}",
+            ])
+            stats["api_calls"] += 1
+    else:
+        worksheet.clear()
+        stats["api_calls"] += 1
+        ranges = [(1, rows)] if rows else []
+
+    if rows and (worksheet.row_count < len(rows) or worksheet.col_count < width):
+        worksheet.resize(rows=max(worksheet.row_count, len(rows)), cols=max(worksheet.col_count, width))
+        stats["api_calls"] += 1
+
+    for batch in _chunked_updates(ranges, width):
+        worksheet.batch_update(batch, value_input_option='RAW')
+        stats["api_calls"] += 1
+        stats["ranges_updated"] += len(batch)
+        stats["rows_written"] += sum(len(update['values']) for update in batch)
+
+    stats["duration"] = round(time.perf_counter() - start_time, 3)
+    logger.info(
+        f"Google Sheets export to '{worksheet_name}' finished in {stats['duration']:.2f}s: "
+        f"{stats['rows_written']} rows in {stats['ranges_updated']} ranges, {stats['api_calls']} API calls"
+    )
+    return stats
+
+def export_to_google_sheets(data, spreadsheet_id, worksheet_name, incremental=False):
+    """
+    Export data to specified Google Sheets worksheet.
+
+    Args:
+        data: List of dictionaries to export
+        spreadsheet_id: Google Sheets spreadsheet ID
+        worksheet_name: Name of worksheet to update
+        incremental: Only rewrite ranges whose values changed
+
+    Returns:
+        bool: True if export successful
+    """
+    sync_to_google_sheets(data, spreadsheet_id, worksheet_name, incremental=incremental)
     return True
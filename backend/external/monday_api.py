@@ -2,83 +2,282 @@
 Monday.com API integration.
 Fetches project management data for map visualization and inserts into PostgreSQL.
 """
+import os
+import re
 import json
+import time
+import logging
+import argparse
 import requests
-import psycopg2
 import pandas as pd
-from database.queries import INSERT_HARDWARE
-from config import MONDAY_API_KEY, DB_CONFIG
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from core.connection import db_cursor, db_connection
+from core.bulk import copy_rows
+from core.sync_runs import SyncRunRecorder
+from core.batch_validators import BatchValidator, check_serial, check_date
+from core.queries import INSERT_HARDWARE, CREATE_HARDWARE_STAGE, MERGE_HARDWARE_STAGE
+from config import MONDAY_API_KEY
 
+logger = logging.getLogger(__name__)
 
-def get_monday_data():
+MONDAY_API_URL = os.getenv('MONDAY_API_URL', 'https://api.monday.com/v2')
+MONDAY_PAGE_LIMIT = 500
+TICKETS_QUERY_PATH = 'static/queries/tickets.graphql'
+HARDWARE_QUERY_PATH = 'static/queries/hardware.graphql'
+
+NEXT_ITEMS_PAGE_QUERY = """
+query ($cursor: String!, $limit: Int!) {
+  complexity { query after reset_in_x_seconds }
+  next_items_page(cursor: $cursor, limit: $limit) {
+    cursor
+    items { id name column_values { id text value } }
+  }
+}
+"""
+
+HARDWARE_COLUMNS = (
+    "serial", "nadlesnictwo", "wieza", "status", "instalator", "czas_start", "czas_end",
+    "data_produkcji", "obudowa", "enkoder_katow", "enkoder_obrazu", "driver_silnika",
+    "procesor", "modul", "gniazdo_glowicy", "data_firmware", "wylacznik_glowicy",
+    "adres", "ip_enkodera", "kanal_ch", "ip_moxy", "uwagi"
+)
+
+# Kolumny typu data — pusty tekst z Monday zapisujemy jako NULL
+HARDWARE_DATE_COLUMNS = {"czas_start", "czas_end", "data_produkcji", "data_firmware"}
+
+# Walidacja kolumnowa strony rekordów: numer seryjny z nazwy itemu i daty;
+# błędna data nie odrzuca rekordu, tylko zapisuje NULL z ostrzeżeniem
+HARDWARE_VALIDATOR = BatchValidator({
+    "serial": check_serial,
+    **{column: check_date for column in sorted(HARDWARE_DATE_COLUMNS)},
+}, unique="serial", optional=HARDWARE_DATE_COLUMNS)
+
+
+class MondayAPIError(Exception):
+    """Błąd zwrócony przez Monday.com API"""
+
+
+def create_monday_session() -> requests.Session:
     """
-    Pobiera dane biletów z Monday.com (do wizualizacji mapy).
+    Sesja HTTP z pulą połączeń i ponawianiem błędów 5xx dla Monday.com.
+    """
+    session = requests.Session()
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["POST"],
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Globalna sesja dla puli połączeń
+monday_session = create_monday_session()
+
+
+@lru_cache(maxsize=None)
+def load_graphql_query(path: str) -> str:
+    """
+    Wczytuje zapytanie .graphql z dysku tylko raz na proces.
+    """
+    with open(path, 'r') as file:
+        return file.read()
+
+
+class MondayClient:
+    """
+    Klient Monday.com, który przechodzi po wszystkich stronach items_page
+    (kursor + next_items_page) i pilnuje budżetu złożoności API.
+
+    Zapytanie pierwszej strony (plik .graphql) musi pobierać
+    ``items_page { cursor items { ... } }``.
     """
-    url = 'https://api.monday.com/v2'
-    headers = {'Authorization': MONDAY_API_KEY, 'Content-Type': 'application/json'}
 
-    with open('static/queries/tickets.graphql', 'r') as file:
-        graphql_query = file.read()
+    def __init__(self, api_key=None, url=MONDAY_API_URL, session=None,
+                 page_limit=MONDAY_PAGE_LIMIT, max_complexity_retries=3):
+        self.url = url
+        self.headers = {'Authorization': api_key or MONDAY_API_KEY, 'Content-Type': 'application/json'}
+        self.session = session or monday_session
+        self.page_limit = page_limit
+        self.max_complexity_retries = max_complexity_retries
+        self.budget_after = None
+        self.budget_reset_in = None
+        self.last_query_cost = None
+        self.requests_made = 0
 
-    items_response = requests.post(url, json={'query': graphql_query}, headers=headers)
+    def execute(self, query: str, variables: dict | None = None) -> dict:
+        """
+        Wykonuje zapytanie GraphQL i zwraca pole ``data``.
+        Czeka na odnowienie budżetu złożoności, gdy ten się kończy.
+        """
+        for attempt in range(self.max_complexity_retries + 1):
+            self._wait_for_budget()
+            response = self.session.post(
+                self.url,
+                json={'query': query, 'variables': variables or {}},
+                headers=self.headers,
+                timeout=60
+            )
+            self.requests_made += 1
+
+            if response.status_code == 429:
+                wait = float(response.headers.get('Retry-After', 30))
+                logger.warning(f"Monday.com rate limit hit, waiting {wait:.0f}s")
+                time.sleep(wait)
+                continue
+
+            try:
+                payload = response.json()
+            except ValueError:
+                raise MondayAPIError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+            errors = payload.get('errors') or []
+            if payload.get('error_code') == 'ComplexityException' or any(
+                    'complexity' in str(e.get('message', '')).lower() for e in errors):
+                message = payload.get('error_message') or str(errors)
+                wait = self._reset_seconds(message)
+                logger.warning(f"Monday.com complexity budget exhausted, waiting {wait:.0f}s")
+                time.sleep(wait)
+                continue
+
+            if response.status_code != 200 or errors or 'data' not in payload:
+                raise MondayAPIError(f"HTTP {response.status_code}: {errors or response.text[:500]}")
+
+            self._record_complexity(payload['data'].get('complexity'))
+            return payload['data']
+
+        raise MondayAPIError("Monday.com request still throttled after retries")
+
+    def iter_pages(self, query_path: str):
+        """
+        Generator stron items. Kolejna strona jest pobierana w tle, podczas
+        gdy wywołujący przetwarza bieżącą.
+        """
+        data = self.execute(load_graphql_query(query_path))
+        items_page = data['boards'][0]['groups'][0]['items_page']
+        items, cursor = items_page.get('items', []), items_page.get('cursor')
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='monday-prefetch') as executor:
+            while True:
+                pending = executor.submit(self._next_page, cursor) if cursor else None
+                yield items
+                if pending is None:
+                    return
+                items, cursor = pending.result()
+
+    def iter_items(self, query_path: str):
+        """
+        Generator pojedynczych items ze wszystkich stron tablicy.
+        """
+        for items in self.iter_pages(query_path):
+            yield from items
+
+    def _next_page(self, cursor: str):
+        data = self.execute(NEXT_ITEMS_PAGE_QUERY, {'cursor': cursor, 'limit': self.page_limit})
+        page = data['next_items_page']
+        return page.get('items', []), page.get('cursor')
+
+    def _record_complexity(self, complexity: dict | None):
+        if not complexity:
+            return
+        self.last_query_cost = complexity.get('query')
+        self.budget_after = complexity.get('after')
+        self.budget_reset_in = complexity.get('reset_in_x_seconds')
+
+    def _wait_for_budget(self):
+        if self.budget_after is None or self.last_query_cost is None:
+            return
+        if self.budget_after < self.last_query_cost:
+            wait = self.budget_reset_in or 60
+            logger.info(f"Monday.com complexity budget low ({self.budget_after}), waiting {wait}s")
+            time.sleep(wait)
+            self.budget_after = None
+
+    @staticmethod
+    def _reset_seconds(message: str) -> float:
+        match = re.search(r'(\d+)\s*seconds', message)
+        return float(match.group(1)) if match else 60.0
+
+
+def item_to_row(item: dict, labels_map: dict) -> dict:
+    """
+    Zamienia item biletu na płaski wiersz (id, name, kolumny).
+    """
+    row = {'id': item['id'], 'name': item['name']}
+    for col in item['column_values']:
+        col_id = col['id']
+        if col_id in labels_map:
+            dropdown_values = col['value']
+            if dropdown_values:
+                value_ids = json.loads(dropdown_values).get('ids', [])
+                row[col_id] = ', '.join(
+                    [labels_map[col_id].get(str(v_id), str(v_id)) for v_id in value_ids]
+                )
+            else:
+                row[col_id] = col['text']
+        else:
+            row[col_id] = col['text']
+    return row
+
+
+def iter_monday_data(client: MondayClient | None = None):
+    """
+    Generator wierszy biletów z Monday.com (wszystkie strony).
+    """
+    client = client or MondayClient()
     labels_map = {}
-    items_list = []
-
-    if items_response.status_code == 200:
-        raw_json = items_response.json()
-        items = raw_json['data']['boards'][0]['groups'][0]['items_page']['items']
-        for item in items:
-            row = {'id': item['id'], 'name': item['name']}
-            for col in item['column_values']:
-                col_id = col['id']
-                if col_id in labels_map:
-                    dropdown_values = col['value']
-                    if dropdown_values:
-                        value_ids = json.loads(dropdown_values).get('ids', [])
-                        row[col_id] = ', '.join(
-                            [labels_map[col_id].get(str(v_id), str(v_id)) for v_id in value_ids]
-                        )
-                    else:
-                        row[col_id] = col['text']
-                else:
-                    row[col_id] = col['text']
-            items_list.append(row)
-
-    return pd.DataFrame(items_list)
+    for item in client.iter_items(TICKETS_QUERY_PATH):
+        yield item_to_row(item, labels_map)
 
 
-def get_monday_hardware():
+def get_monday_data():
     """
-    Pobiera dane hardware z Monday.com (surowe items).
+    Pobiera dane biletów z Monday.com (do wizualizacji mapy).
     """
-    url = 'https://api.monday.com/v2'
-    headers = {'Authorization': MONDAY_API_KEY, 'Content-Type': 'application/json'}
+    try:
+        return pd.DataFrame(iter_monday_data())
+    except (MondayAPIError, requests.exceptions.RequestException) as e:
+        logger.error(f"Failed to fetch Monday.com tickets: {e}")
+        return pd.DataFrame()
 
-    with open('static/queries/hardware.graphql', 'r') as file:
-        graphql_query = file.read()
 
-    items_response = requests.post(url, json={'query': graphql_query}, headers=headers)
-    print("Status code:", items_response.status_code)
+def iter_hardware_records(client: MondayClient | None = None):
+    """
+    Generator rekordów SQL hardware ze wszystkich stron tablicy.
+    Mapowanie bieżącej strony odbywa się równolegle z pobieraniem kolejnej.
+    """
+    client = client or MondayClient()
+    for items in client.iter_pages(HARDWARE_QUERY_PATH):
+        yield from validate_hardware_page(items).dicts()
 
+
+def get_monday_hardware():
+    """
+    Pobiera dane hardware z Monday.com (surowe items).
+    """
     try:
-        raw_json = items_response.json()
-        items = raw_json['data']['boards'][0]['groups'][0]['items_page']['items']
-        return items
+        return list(MondayClient().iter_items(HARDWARE_QUERY_PATH))
     except Exception as e:
-        print("Błąd przy wyciąganiu items:", e)
-        print("Odpowiedź tekstowa:", items_response.text[:500])
+        logger.error(f"Błąd przy wyciąganiu items: {e}")
         return []
 
 
 def map_item_to_record(item: dict) -> dict:
     """
     Mapuje pojedynczy item z Monday API na rekord SQL.
+    Numer seryjny (nazwa itemu) i daty nie są tu sprawdzane — robi to
+    validate_hardware_page() dla całej strony naraz.
     """
     cols = {c["id"]: c["text"] for c in item.get("column_values", [])}
-    serial = int(item.get("name", "0").lstrip("0") or 0)
 
     return {
-        "serial": serial,
+        "serial": item.get("name"),
         "nadlesnictwo": cols.get("tekst__1", ""),
         "wieza": cols.get("tekst7__1", ""),
         "status": cols.get("status9", ""),
@@ -95,45 +294,142 @@ def map_item_to_record(item: dict) -> dict:
         "wylacznik_glowicy": cols.get("sprawd___1", ""),
         "adres": cols.get("tekst_mknaq1qa", ""),
         "ip_enkodera": cols.get("tekst_mknat611", ""),
-        "kanal_CH": cols.get("tekst_mknawgmc", ""),
+        "kanal_ch": cols.get("tekst_mknawgmc", ""),
         "ip_moxy": cols.get("tekst_mknaz218", ""),
         "uwagi": cols.get("tekst8__1", "")
     }
 
 
+def validate_hardware_page(items: list):
+    """
+    Mapuje stronę items na rekordy i waliduje je kolumnami (BatchResult).
+    Rekordy z błędnym numerem seryjnym są odrzucane, a nie przerywają
+    synchronizacji; błędne daty zapisywane są jako NULL.
+    """
+    return HARDWARE_VALIDATOR.validate([map_item_to_record(item) for item in items])
+
+
 def map_items_to_records(items: list) -> list[dict]:
     """
-    Mapuje listę items na listę rekordów SQL.
+    Mapuje listę items na listę poprawnych rekordów SQL.
+    """
+    return validate_hardware_page(items).dicts()
+
+
+def hardware_row(record: dict) -> tuple:
+    """
+    Zamienia rekord na krotkę w kolejności HARDWARE_COLUMNS.
     """
-    return [map_item_to_record(item) for item in items]
+    return tuple(
+        (record.get(col) or None) if col in HARDWARE_DATE_COLUMNS else record.get(col)
+        for col in HARDWARE_COLUMNS
+    )
 
 
-def insert_to_postgres(records: list[dict]):
+def copy_hardware(cursor, records) -> int:
     """
-    Wstawia rekordy do bazy PostgreSQL.
+    Ładuje rekordy przez COPY do tabeli tymczasowej i scala je jednym
+    INSERT ... SELECT ... ON CONFLICT (serial) do Rejestr_Kamer.
     """
-    if not records:
-        print("Brak rekordów do wstawienia.")
-        return
+    cursor.execute(CREATE_HARDWARE_STAGE)
+    copied = copy_rows(cursor, "hardware_stage", HARDWARE_COLUMNS, (hardware_row(r) for r in records))
+    cursor.execute(MERGE_HARDWARE_STAGE)
+    return copied
 
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
 
+def insert_hardware_rowwise(cursor, records) -> int:
+    """
+    Dotychczasowa ścieżka: jedno INSERT_HARDWARE na rekord (używana w benchmarku).
+    """
+    count = 0
     for record in records:
-        cur.execute(INSERT_HARDWARE, record)
+        params = dict(zip(HARDWARE_COLUMNS, hardware_row(record)))
+        cursor.execute(INSERT_HARDWARE, params)
+        count += 1
+    return count
+
+
+def insert_to_postgres(records) -> int:
+    """
+    Wstawia rekordy do bazy PostgreSQL w jednej transakcji.
+    Przyjmuje dowolny iterowalny strumień rekordów (np. generator), więc
+    cały rejestr nie musi być trzymany w pamięci.
+    """
+    with db_cursor() as (cur, conn):
+        count = copy_hardware(cur, records)
 
-    conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Wstawiono/zaaktualizowano {len(records)} rekordów.")
+    if not count:
+        logger.warning("Brak rekordów do wstawienia.")
+    else:
+        logger.info(f"Wstawiono/zaaktualizowano {count} rekordów.")
+    return count
 
 
-if __name__ == "__main__":
-    items = get_monday_hardware()
-    records = map_items_to_records(items)
+def sync_monday_hardware() -> int:
+    """
+    Pełna synchronizacja rejestru kamer: strony z Monday trafiają prosto do COPY.
+    """
+    start = time.perf_counter()
+    with SyncRunRecorder("hardware") as run:
+        totals = {"fetched": 0, "rejected": 0}
 
-    # opcjonalnie debug w Pandas
-    df = pd.DataFrame(records)
-    print(df.head())
+        def records():
+            for items in run.timed_iter(MondayClient().iter_pages(HARDWARE_QUERY_PATH), "fetch"):
+                with run.phase("normalize"):
+                    batch = validate_hardware_page(items)
+                    run.quarantine(batch.rejected())
+                    run.warn(batch.warned())
+                    totals["fetched"] += len(batch)
+                    totals["rejected"] += batch.rejected_count
+                yield from batch.dicts()
+
+        with run.phase("write"):
+            count = insert_to_postgres(records())
+        # Strony są pobierane i mapowane w trakcie COPY — odejmujemy ich czas
+        run.phases["write"] -= run.phases["fetch"] + run.phases["normalize"]
+        run.set_counts(**totals)
+    logger.info(
+        f"Monday hardware sync completed in {time.perf_counter() - start:.2f}s: "
+        f"{count} records, {totals['rejected']} rejected"
+    )
+    return count
+
+
+def benchmark_insert(records: list[dict]) -> dict:
+    """
+    Porównuje przepustowość COPY i ścieżki wiersz-po-wierszu.
+    Każdy wariant działa w osobnej transakcji, która jest wycofywana.
+
+    Returns:
+        dict: wiersze/s dla obu ścieżek oraz przyspieszenie
+    """
+    results = {"rows": len(records)}
+    for name, loader in (("copy", copy_hardware), ("rowwise", insert_hardware_rowwise)):
+        with db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                start = time.perf_counter()
+                loader(cur, records)
+                elapsed = time.perf_counter() - start
+            finally:
+                conn.rollback()
+                cur.close()
+        results[f"{name}_seconds"] = round(elapsed, 4)
+        results[f"{name}_rows_per_second"] = round(len(records) / elapsed, 1) if elapsed else None
+
+    if results["copy_seconds"]:
+        results["speedup"] = round(results["rowwise_seconds"] / results["copy_seconds"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronizacja rejestru kamer z Monday.com")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="porównaj COPY z wstawianiem wiersz-po-wierszu (bez zapisu)")
+    args = parser.parse_args()
 
-    insert_to_postgres(records)
+    if args.benchmark:
+        records = map_items_to_records(get_monday_hardware())
+        print(benchmark_insert(records))
+    else:
+        sync_monday_hardware()
@@ -2,11 +2,23 @@
 SmokeD System API integration.
 Handles authentication and data fetching from SmokeD Web.
 """
+import jwt
+import time
 import requests
 import logging
+import threading
 from datetime import datetime, timezone
 from django.conf import settings
-#from database.connection import db_cursor, db_connection
+from core.connection import db_cursor, db_connection
+from core.instrumentation import InstrumentedCursor
+from core.bulk import copy_rows
+from core.sync_runs import SyncRunRecorder
+from core.batch_validators import BatchValidator, check_serial, check_pattern, check_timestamp, IPV4_PATTERN, MAC_PATTERN
+from core.queries import (
+    CREATE_DETECTORS_STAGE, MERGE_DETECTORS_STAGE,
+    CREATE_BOXES_STAGE, MERGE_BOXES_STAGE, GET_DETECTOR_SYNC_STATUS,
+    UPSERT_DETECTORS_VALUES, UPSERT_BOXES_VALUES
+)
 from psycopg2.extras import execute_values
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -69,29 +81,136 @@ def get_jwt_token(login_url, payload):
         logger.error(f"Unexpected error getting JWT token: {e}")
         raise
 
-def make_authenticated_request(api_url, token):
+class SmokedTokenProvider:
+    """
+    Process-wide cache of the SmokeD service token.
+
+    The token is reused until shortly before it expires. Inside the refresh
+    window callers keep using the current token while a single background
+    thread logs in again; concurrent refreshes are coalesced behind one lock
+    so parallel syncs share one login.
+    """
+
+    def __init__(self, login_url, credentials, refresh_margin=300, default_ttl=3600):
+        self.login_url = login_url
+        self.credentials = credentials
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._background = None
+        self.logins = 0
+
+    def get_token(self):
+        """Return a valid token, logging in only when none is cached"""
+        token, expires_at = self._token, self._expires_at
+        now = time.time()
+        if token and now < expires_at - self.refresh_margin:
+            return token
+        if token and now < expires_at:
+            self._refresh_in_background(token)
+            return token
+        return self.refresh(rejected_token=token)
+
+    def refresh(self, rejected_token=None):
+        """
+        Log in again unless another thread already replaced ``rejected_token``.
+
+        Args:
+            rejected_token: Token known to be stale (e.g. rejected with 401)
+
+        Returns:
+            str: Fresh token
+        """
+        with self._refresh_lock:
+            if self._token and self._token != rejected_token and time.time() < self._expires_at:
+                return self._token
+            token = get_jwt_token(self.login_url, self.credentials)
+            self._token = token
+            self._expires_at = self._token_expiry(token)
+            self.logins += 1
+            return token
+
+    def seed(self, token):
+        """Adopt a token obtained by another process (the sync scheduler passes its own to job processes)"""
+        expires_at = self._token_expiry(token)
+        if time.time() >= expires_at:
+            return
+        with self._refresh_lock:
+            self._token = token
+            self._expires_at = expires_at
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after the credentials change"""
+        with self._refresh_lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def _refresh_in_background(self, token):
+        with self._state_lock:
+            if self._background is not None and self._background.is_alive():
+                return
+            self._background = threading.Thread(
+                target=self._background_refresh,
+                args=(token,),
+                name="smoked-token-refresh",
+                daemon=True
+            )
+            self._background.start()
+
+    def _background_refresh(self, token):
+        try:
+            self.refresh(rejected_token=token)
+        except Exception as e:
+            logger.warning(f"Background SmokeD token refresh failed: {e}")
+
+    def _token_expiry(self, token):
+        # The SmokeD token is a JWT; its signature is checked by SmokeD, we only read exp
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            if exp:
+                return float(exp)
+        except jwt.InvalidTokenError:
+            pass
+        return time.time() + self.default_ttl
+
+def _authenticated_get(api_url, token):
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "User-Agent": "mantaMap/1.0"
+    }
+    return api_session.get(
+        api_url,
+        headers=headers,
+        timeout=30,
+        verify=True
+    )
+
+def make_authenticated_request(api_url, token=None):
     """
     Make authenticated request to SmokedSystem API.
 
     Args:
         api_url: API endpoint URL
-        token: JWT authentication token
+        token: JWT authentication token; when omitted the shared service
+               token is used and a 401 triggers one forced refresh and retry
 
     Returns:
         dict: JSON response from API
     """
     try:
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "User-Agent": "mantaMap/1.0"
-        }
+        use_provider = token is None
+        if use_provider:
+            token = smoked_token_provider.get_token()
+
+        response = _authenticated_get(api_url, token)
+        if response.status_code == 401 and use_provider:
+            logger.info(f"SmokeD rejected the cached token for {api_url}, refreshing")
+            token = smoked_token_provider.refresh(rejected_token=token)
+            response = _authenticated_get(api_url, token)
 
-        response = api_session.get(
-            api_url,
-            headers=headers,
-            timeout=30,
-            verify=True
-        )
         response.raise_for_status()
         logger.info(f"Successfully made request to {api_url}")
         return response.json()
@@ -104,152 +223,219 @@ def make_authenticated_request(api_url, token):
 
 login_payload = settings.SMOKED_CREDENTIALS
 
-def normalize_serial_to_db_format(s: str | int | None) -> str | None:
-    """
-    Convert serial number to database format (removes leading zeros).
-    Preserves None when no value provided.
-    """
-    if s is None:
-        return None
-    return str(int(s))
+# Shared service token for all syncs in this process
+smoked_token_provider = SmokedTokenProvider(settings.LOGIN_URL, login_payload)
 
-def sync_detectors_and_live_view():
-    """
-    Batch synchronization function that processes all detectors at once.
-    """
-    start_time = datetime.now()
-    try:
-        token = get_jwt_token(settings.LOGIN_URL, login_payload)
-        api_response = make_authenticated_request(settings.DETECTORS_URL, token)
-        api_detectors = api_response.get('data', [])
-
-        if not api_detectors:
-            logger.warning("No detectors received from API")
-            return 0, 0
-
-        # Process all data in memory
-        api_data = []
-        for api_detector in api_detectors:
-            serial = normalize_serial_to_db_format(api_detector.get('serial'))
-            if serial:
-                live_view_data = api_detector.get('live_view_updated_at')
-                api_data.append((serial, live_view_data))
-
-        if not api_data:
-            logger.warning("No valid detector data from API")
-            return 0, 0
-
-        # Single batch operation for all detectors
-        with db_connection() as conn:
-            cursor = conn.cursor()
+SYNC_MODES = ("upsert", "merge")
 
-            query = '''
-                INSERT INTO public."Detektory" (serial, "live_view_updated_at", name)
-                VALUES %s
-                ON CONFLICT (serial) 
-                DO UPDATE SET 
-                    "live_view_updated_at" = EXCLUDED."live_view_updated_at"
-                RETURNING 
-                    serial,
-                    (xmax = 0) AS was_inserted
-            '''
-
-            upsert_data = [(serial, live_view, None) for serial, live_view in api_data]
-
-            execute_values(
-                cursor,
-                query,
-                upsert_data,
-                template=None,
-                page_size=1000
-            )
+DETECTOR_VALIDATOR = BatchValidator({
+    "serial": check_serial,
+    "live_view_updated_at": check_timestamp,
+}, unique="serial", optional=("live_view_updated_at",))
 
-            results = cursor.fetchall()
-            added_count = sum(1 for row in results if row[1])
-            updated_count = len(results) - added_count
+BOX_VALIDATOR = BatchValidator({
+    "serial": check_serial,
+    "openvpn_ip": check_pattern(IPV4_PATTERN, "must be an IPv4 address"),
+    "local_ip": check_pattern(IPV4_PATTERN, "must be an IPv4 address"),
+    "mac_address": check_pattern(MAC_PATTERN, "must be a MAC address"),
+}, unique="serial", optional=("openvpn_ip", "local_ip", "mac_address"))
 
-            conn.commit()
-            cursor.close()
+def empty_sync_result(mode):
+    """Result returned when the API gives nothing to synchronize"""
+    if mode == "merge":
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "vanished": 0}
+    return 0, 0
 
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Detectors sync completed in {duration:.2f}s: {added_count} new, {updated_count} updated")
-        return added_count, updated_count
+def merge_via_stage(create_stage_query, stage_table, columns, rows, merge_query):
+    """
+    Stream rows into a temporary staging table with COPY and merge them into
+    the target table, writing only rows whose values actually changed.
 
-    except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.error(f"Detectors sync failed after {duration:.2f}s: {e}")
-        raise
+    Args:
+        create_stage_query: Statement creating the ON COMMIT DROP staging table
+        stage_table: Name of the staging table
+        columns: Staging columns, in the order values appear in each row
+        rows: Iterable of tuples to stage
+        merge_query: Statement returning inserted, updated, staged, vanished
 
-def sync_boxes_to_db():
+    Returns:
+        dict: Counts of inserted, updated, unchanged and vanished rows
+    """
+    with db_cursor() as (cursor, conn):
+        cursor.execute(create_stage_query)
+        copy_rows(cursor, stage_table, columns, rows)
+        cursor.execute(merge_query)
+        inserted, updated, staged, vanished = cursor.fetchone()
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": staged - inserted - updated,
+        "vanished": vanished
+    }
+
+def sync_detectors_and_live_view(mode="upsert"):
+    """
+    Batch synchronization function that processes all detectors at once.
+
+    Args:
+        mode: "upsert" rewrites every row and returns (added, updated);
+              "merge" stages the payload with COPY, writes only changed rows
+              and returns a dict with inserted/updated/unchanged/vanished counts
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode: {mode}")
+    start_time = datetime.now()
+    with SyncRunRecorder("detectors") as run:
+        try:
+            with run.phase("fetch"):
+                api_response = make_authenticated_request(settings.DETECTORS_URL)
+                api_detectors = api_response.get('data', [])
+            run.set_counts(fetched=len(api_detectors))
+
+            if not api_detectors:
+                logger.warning("No detectors received from API")
+                return empty_sync_result(mode)
+
+            # Validate whole columns at once; records with a bad serial are quarantined,
+            # a bad live_view_updated_at is stored as NULL with a warning
+            with run.phase("normalize"):
+                batch = DETECTOR_VALIDATOR.validate(api_detectors)
+                api_data = batch.rows(("serial", "live_view_updated_at"))
+            run.quarantine(batch.rejected())
+            run.warn(batch.warned())
+            run.set_counts(rejected=batch.rejected_count)
+
+            if not api_data:
+                logger.warning("No valid detector data from API")
+                return empty_sync_result(mode)
+
+            if mode == "merge":
+                with run.phase("write"):
+                    report = merge_via_stage(
+                        CREATE_DETECTORS_STAGE, "detectors_stage",
+                        ("serial", '"live_view_updated_at"'), api_data, MERGE_DETECTORS_STAGE
+                    )
+                run.set_counts(**report)
+                duration = (datetime.now() - start_time).total_seconds()
+                logger.info(
+                    f"Detectors merge completed in {duration:.2f}s: {report['inserted']} new, "
+                    f"{report['updated']} updated, {report['unchanged']} unchanged, {report['vanished']} vanished"
+                )
+                return report
+
+            # Single batch operation for all detectors
+            with run.phase("write"), db_connection() as conn:
+                cursor = conn.cursor(cursor_factory=InstrumentedCursor)
+
+                upsert_data = [(serial, live_view, None) for serial, live_view in api_data]
+
+                # fetch=True collects RETURNING rows of every page, not just the last
+                results = execute_values(
+                    cursor,
+                    UPSERT_DETECTORS_VALUES,
+                    upsert_data,
+                    template=None,
+                    page_size=1000,
+                    fetch=True
+                )
+                added_count = sum(1 for row in results if row[1])
+                updated_count = len(results) - added_count
+
+                conn.commit()
+                cursor.close()
+
+            run.set_counts(inserted=added_count, updated=updated_count)
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"Detectors sync completed in {duration:.2f}s: {added_count} new, {updated_count} updated")
+            return added_count, updated_count
+
+        except Exception as e:
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.error(f"Detectors sync failed after {duration:.2f}s: {e}")
+            raise
+
+def sync_boxes_to_db(mode="upsert"):
     """
     Synchronizuje dane boxów z API do tabeli 'Boxes'.
     Upsertuje rekordy: wstawia nowe, aktualizuje tylko zmienione pola.
+
+    Args:
+        mode: "upsert" (zwraca (added, updated)) lub "merge" — COPY do tabeli
+              tymczasowej i zapis tylko zmienionych wierszy (zwraca dict
+              z licznikami inserted/updated/unchanged/vanished)
     """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode: {mode}")
     start_time = datetime.now()
-    try:
-        # --- Pobranie danych z API ---
-        token = get_jwt_token(settings.LOGIN_URL, login_payload)
-        api_response = make_authenticated_request(settings.BOXES_URL, token)
-        api_boxes = api_response.get('data', [])
-
-        if not api_boxes:
-            logger.warning("Brak danych z API — tabela Boxes nie została zmieniona.")
-            return 0, 0
-
-        # --- Normalizacja danych ---
-        upsert_data = []
-        for box in api_boxes:
-            serial = normalize_serial_to_db_format(box.get('serial'))
-            if not serial:
-                continue
-            upsert_data.append((
-                serial,
-                box.get('openvpn_ip'),
-                box.get('local_ip'),
-                box.get('mac_address')
-            ))
-
-        if not upsert_data:
-            logger.warning("Brak prawidłowych rekordów do synchronizacji.")
-            return 0, 0
-
-        # --- Batch upsert w bazie ---
-        with db_connection() as conn:
-            cursor = conn.cursor()
-
-            query = '''
-                INSERT INTO "Boxes" ("serial", "openvpn_ip", "local_ip", "mac_address")
-                VALUES %s
-                ON CONFLICT ("serial") DO UPDATE SET
-                    "openvpn_ip" = EXCLUDED."openvpn_ip",
-                    "local_ip" = EXCLUDED."local_ip",
-                    "mac_address" = EXCLUDED."mac_address"
-                RETURNING serial, (xmax = 0) AS was_inserted
-            '''
-
-            execute_values(
-                cursor,
-                query,
-                upsert_data,
-                template=None,
-                page_size=1000
-            )
-
-            results = cursor.fetchall()
-            added_count = sum(1 for row in results if row[1])
-            updated_count = len(results) - added_count
-
-            conn.commit()
-            cursor.close()
-
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Boxes sync completed in {duration:.2f}s: {added_count} new, {updated_count} updated")
-        return added_count, updated_count
-
-    except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.error(f"Boxes sync failed after {duration:.2f}s: {e}")
-        raise
+    with SyncRunRecorder("boxes") as run:
+        try:
+            # --- Pobranie danych z API ---
+            with run.phase("fetch"):
+                api_response = make_authenticated_request(settings.BOXES_URL)
+                api_boxes = api_response.get('data', [])
+            run.set_counts(fetched=len(api_boxes))
+
+            if not api_boxes:
+                logger.warning("Brak danych z API — tabela Boxes nie została zmieniona.")
+                return empty_sync_result(mode)
+
+            # --- Walidacja kolumnowa; rekordy z błędnym numerem seryjnym trafiają do
+            # kwarantanny, błędne adresy zapisujemy jako NULL z ostrzeżeniem ---
+            with run.phase("normalize"):
+                batch = BOX_VALIDATOR.validate(api_boxes)
+                upsert_data = batch.rows(("serial", "openvpn_ip", "local_ip", "mac_address"))
+            run.quarantine(batch.rejected())
+            run.warn(batch.warned())
+            run.set_counts(rejected=batch.rejected_count)
+
+            if not upsert_data:
+                logger.warning("Brak prawidłowych rekordów do synchronizacji.")
+                return empty_sync_result(mode)
+
+            if mode == "merge":
+                with run.phase("write"):
+                    report = merge_via_stage(
+                        CREATE_BOXES_STAGE, "boxes_stage",
+                        ('"serial"', '"openvpn_ip"', '"local_ip"', '"mac_address"'),
+                        upsert_data, MERGE_BOXES_STAGE
+                    )
+                run.set_counts(**report)
+                duration = (datetime.now() - start_time).total_seconds()
+                logger.info(
+                    f"Boxes merge completed in {duration:.2f}s: {report['inserted']} new, "
+                    f"{report['updated']} updated, {report['unchanged']} unchanged, {report['vanished']} vanished"
+                )
+                return report
+
+            # --- Batch upsert w bazie ---
+            with run.phase("write"), db_connection() as conn:
+                cursor = conn.cursor(cursor_factory=InstrumentedCursor)
+
+                # fetch=True collects RETURNING rows of every page, not just the last
+                results = execute_values(
+                    cursor,
+                    UPSERT_BOXES_VALUES,
+                    upsert_data,
+                    template=None,
+                    page_size=1000,
+                    fetch=True
+                )
+                added_count = sum(1 for row in results if row[1])
+                updated_count = len(results) - added_count
+
+                conn.commit()
+                cursor.close()
+
+            run.set_counts(inserted=added_count, updated=updated_count)
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"Boxes sync completed in {duration:.2f}s: {added_count} new, {updated_count} updated")
+            return added_count, updated_count
+
+        except Exception as e:
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.error(f"Boxes sync failed after {duration:.2f}s: {e}")
+            raise
 
 def get_sync_status():
     """
@@ -258,23 +444,8 @@ def get_sync_status():
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
-
-            cursor.execute("SELECT COUNT(*) FROM public.\"Detektory\"")
-            total_detectors = cursor.fetchone()[0]
-
-            cursor.execute("""
-                SELECT MAX(\"live_view_updated_at\") 
-                FROM public.\"Detektory\" 
-                WHERE \"live_view_updated_at\" IS NOT NULL
-            """)
-            last_sync = cursor.fetchone()[0]
-
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM public.\"Detektory\" 
-                WHERE \"live_view_updated_at\" IS NULL
-            """)
-            missing_live_view = cursor.fetchone()[0]
+            cursor.execute(GET_DETECTOR_SYNC_STATUS)
+            total_detectors, last_sync, missing_live_view = cursor.fetchone()
             cursor.close()
 
         return {